@@ -1,17 +1,118 @@
-from flask import Flask, render_template, jsonify, request, send_file
+from flask import Flask, Response, render_template, jsonify, request, send_file
 from flask_cors import CORS
-import subprocess
-import threading
-import uuid
 import os
 import json
 from datetime import datetime
 import csv
 
+from config.filters import REGISTRY
+from utils.downloads import FORMATS, DownloadCache, file_version, version_tag
+from utils.enrichment_stats import StatsCache
+from utils.job_store import JobStore
+from utils.jobs import JobEngine, StageBusy
+from utils.pipeline import PIPELINE_FILES, STAGES
+from utils.venue_index import VenueIndex
+
 app = Flask(__name__)
 CORS(app)
 
-tasks = {}
+STAGE_NAMES = [stage.name for stage in STAGES]
+
+# Stages run in-process on a bounded pool; each stage allows one active job
+# so two clicks can't run the same stage over the same output file. Job
+# history and logs live in SQLite with bounded retention, not in memory.
+jobs = JobEngine(
+    max_workers=int(os.getenv('JOB_WORKERS', '2')),
+    store=JobStore(max_jobs=int(os.getenv('JOB_HISTORY_MAX', '500')),
+                   max_age_days=int(os.getenv('JOB_HISTORY_DAYS', '30'))),
+    # A full pipeline run writes every stage's file, and each stage reads
+    # the file the stage before it writes
+    conflicts={
+        'pipeline': tuple(STAGE_NAMES),
+        **{stage.name: (previous.name,) for previous, stage in zip(STAGES, STAGES[1:])},
+    },
+)
+
+# Comment lines sent on idle event streams so proxies don't drop them
+SSE_KEEPALIVE_SECONDS = 15
+
+# Downloadable and queryable venue files, most enriched last; /api/venues
+# defaults to the last one that exists
+VENUE_FILES = PIPELINE_FILES
+venue_indexes = {filename: VenueIndex(filename) for filename in VENUE_FILES}
+downloads = DownloadCache()
+stats_cache = StatsCache()
+
+
+def latest_venue_file():
+    return next((f for f in reversed(VENUE_FILES) if os.path.exists(f)), VENUE_FILES[0])
+
+
+def split_arg(name):
+    """Comma-separated (or repeated) query parameter as a list."""
+    return [value.strip() for raw in request.args.getlist(name) for value in raw.split(',') if value.strip()]
+
+
+def bool_arg(name):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    if value.lower() in ('true', '1', 'yes'):
+        return True
+    if value.lower() in ('false', '0', 'no'):
+        return False
+    raise ValueError(f"{name} must be true or false")
+
+
+def count_rows(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return sum(1 for _ in csv.reader(f)) - 1
+
+
+def run_seed(progress):
+    import build_essex
+    build_essex.main(progress=progress)
+    return {'message': 'Seed data generation completed',
+            'records': count_rows(str(build_essex.OUT))}
+
+
+def run_google(progress, refresh_all=False):
+    import google_website_enricher
+    websites = google_website_enricher.main(progress=progress, refresh_all=refresh_all)
+    return {'message': 'Google enrichment completed', 'websites': websites}
+
+
+def run_scrape(progress):
+    from venue_contact_enricher_unified import enrich_venues
+    enrich_venues(progress=progress)
+    return {'message': 'Contact scraping completed'}
+
+
+def run_verify(progress, dry_run=False):
+    import hunter_email_enricher
+    report = hunter_email_enricher.main(dry_run=dry_run, progress=progress)
+    if report is None:
+        raise RuntimeError('Hunter enrichment did not run (check HUNTER_API_KEY and the input file)')
+    return {'message': 'Email verification completed', 'report': report}
+
+
+def run_full_pipeline(progress, start='seed', stop='verify', refresh_all=False, dry_run=None):
+    import pipeline
+    results = pipeline.run_pipeline(progress=progress, start=start, stop=stop,
+                                    refresh_all=refresh_all, dry_run=dry_run)
+    return {'message': f"Pipeline completed ({start} to {stop})", 'stages': results}
+
+
+def start_job(stage, fn, **kwargs):
+    try:
+        job = jobs.submit(stage, fn, **kwargs)
+    except StageBusy as e:
+        # Hand back the running job so the client can follow it instead
+        return jsonify({'error': str(e), 'task_id': e.job_id}), 409
+    return jsonify({'task_id': job.id})
+
 
 @app.route('/')
 def index():
@@ -19,169 +120,224 @@ def index():
 
 @app.route('/api/seed-data', methods=['POST'])
 def seed_data():
-    task_id = str(uuid.uuid4())
-    tasks[task_id] = {'status': 'running', 'progress': 0, 'message': 'Starting seed data generation...'}
-    
-    def run_task():
-        try:
-            tasks[task_id]['message'] = 'Running build_essex.py...'
-            result = subprocess.run(['python', 'build_essex.py'], 
-                                    capture_output=True, text=True)
-            if result.returncode == 0:
-                tasks[task_id]['status'] = 'completed'
-                tasks[task_id]['progress'] = 100
-                tasks[task_id]['message'] = 'Seed data generation completed'
-                
-                if os.path.exists('essex_licensed_venues.csv'):
-                    with open('essex_licensed_venues.csv', 'r') as f:
-                        reader = csv.reader(f)
-                        row_count = sum(1 for row in reader) - 1
-                        tasks[task_id]['records'] = row_count
-            else:
-                tasks[task_id]['status'] = 'failed'
-                tasks[task_id]['message'] = f'Error: {result.stderr}'
-        except Exception as e:
-            tasks[task_id]['status'] = 'failed'
-            tasks[task_id]['message'] = str(e)
-    
-    thread = threading.Thread(target=run_task)
-    thread.start()
-    
-    return jsonify({'task_id': task_id})
+    return start_job('seed', run_seed)
 
 @app.route('/api/google-enrich', methods=['POST'])
 def google_enrich():
-    mode = request.json.get('mode', 'missing')
-    task_id = str(uuid.uuid4())
-    tasks[task_id] = {'status': 'running', 'progress': 0, 'message': 'Starting Google enrichment...'}
-    
-    def run_task():
-        try:
-            tasks[task_id]['message'] = 'Running google_website_enricher.py...'
-            cmd = ['python', 'google_website_enricher.py']
-            if mode == 'all':
-                cmd.append('--refresh-all')
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                tasks[task_id]['status'] = 'completed'
-                tasks[task_id]['progress'] = 100
-                tasks[task_id]['message'] = 'Google enrichment completed'
-            else:
-                tasks[task_id]['status'] = 'failed'
-                tasks[task_id]['message'] = f'Error: {result.stderr}'
-        except Exception as e:
-            tasks[task_id]['status'] = 'failed'
-            tasks[task_id]['message'] = str(e)
-    
-    thread = threading.Thread(target=run_task)
-    thread.start()
-    
-    return jsonify({'task_id': task_id})
+    mode = (request.json or {}).get('mode', 'missing')
+    return start_job('google', run_google, refresh_all=(mode == 'all'))
 
 @app.route('/api/scrape-contacts', methods=['POST'])
 def scrape_contacts():
-    task_id = str(uuid.uuid4())
-    tasks[task_id] = {'status': 'running', 'progress': 0, 'message': 'Starting contact scraping...'}
-    
-    def run_task():
-        try:
-            tasks[task_id]['message'] = 'Running venue_contact_enricher_unified.py...'
-            result = subprocess.run(['python', 'venue_contact_enricher_unified.py'], 
-                                    capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                tasks[task_id]['status'] = 'completed'
-                tasks[task_id]['progress'] = 100
-                tasks[task_id]['message'] = 'Contact scraping completed'
-            else:
-                tasks[task_id]['status'] = 'failed'
-                tasks[task_id]['message'] = f'Error: {result.stderr}'
-        except Exception as e:
-            tasks[task_id]['status'] = 'failed'
-            tasks[task_id]['message'] = str(e)
-    
-    thread = threading.Thread(target=run_task)
-    thread.start()
-    
-    return jsonify({'task_id': task_id})
+    return start_job('scrape', run_scrape)
 
 @app.route('/api/verify-emails', methods=['POST'])
 def verify_emails():
-    dry_run = request.json.get('dry_run', False)
-    task_id = str(uuid.uuid4())
-    tasks[task_id] = {'status': 'running', 'progress': 0, 'message': 'Starting email verification...'}
-    
-    def run_task():
-        try:
-            tasks[task_id]['message'] = 'Running hunter_email_enricher.py...'
-            
-            env = os.environ.copy()
-            if dry_run:
-                env['HUNTER_DRY_RUN'] = 'true'
-                tasks[task_id]['message'] = 'Running in dry-run mode (sample only)...'
-            
-            result = subprocess.run(['python', 'hunter_email_enricher.py'], 
-                                    capture_output=True, text=True, env=env)
-            
-            if result.returncode == 0:
-                tasks[task_id]['status'] = 'completed'
-                tasks[task_id]['progress'] = 100
-                tasks[task_id]['message'] = 'Email verification completed'
-                
-                if os.path.exists('hunter_enrichment_report.json'):
-                    with open('hunter_enrichment_report.json', 'r') as f:
-                        report = json.load(f)
-                        tasks[task_id]['report'] = report
-            else:
-                tasks[task_id]['status'] = 'failed'
-                tasks[task_id]['message'] = f'Error: {result.stderr}'
-        except Exception as e:
-            tasks[task_id]['status'] = 'failed'
-            tasks[task_id]['message'] = str(e)
-    
-    thread = threading.Thread(target=run_task)
-    thread.start()
-    
-    return jsonify({'task_id': task_id})
+    dry_run = (request.json or {}).get('dry_run', False)
+    return start_job('verify', run_verify, dry_run=dry_run)
+
+@app.route('/api/pipeline', methods=['POST'])
+def start_pipeline():
+    """Run the stages from `from` to `to` (default all) as one job, Google streaming into scraping."""
+    options = request.json or {}
+    start = options.get('from', STAGE_NAMES[0])
+    stop = options.get('to', STAGE_NAMES[-1])
+    if start not in STAGE_NAMES or stop not in STAGE_NAMES or STAGE_NAMES.index(start) > STAGE_NAMES.index(stop):
+        return jsonify({'error': f"from/to must be stages in order: {', '.join(STAGE_NAMES)}"}), 400
+    return start_job('pipeline', run_full_pipeline, start=start, stop=stop,
+                     refresh_all=options.get('mode') == 'all', dry_run=options.get('dry_run'))
 
 @app.route('/api/status/<task_id>')
 def get_status(task_id):
-    if task_id in tasks:
-        return jsonify(tasks[task_id])
+    snapshot = jobs.lookup(task_id)
+    if snapshot:
+        return jsonify(snapshot)
     return jsonify({'status': 'not_found'}), 404
 
+@app.route('/api/events/<task_id>')
+def task_events(task_id):
+    """Server-sent events: a progress event whenever the job changes, until it finishes."""
+    job = jobs.get(task_id)
+    if not job:
+        # Already finished: a single done event with the stored snapshot
+        snapshot = jobs.lookup(task_id)
+        if not snapshot:
+            return jsonify({'status': 'not_found'}), 404
+        return Response(f"event: done\ndata: {json.dumps(snapshot)}\n\n", mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache'})
+    
+    def stream():
+        # Subscribers block on the job's condition, so idle streams cost nothing
+        # and a burst of updates collapses into the latest snapshot
+        version = -1
+        while True:
+            new_version, snapshot = job.wait_for_change(version, timeout=SSE_KEEPALIVE_SECONDS)
+            if new_version == version:
+                yield ': keepalive\n\n'
+                continue
+            version = new_version
+            event = 'done' if snapshot['status'] in ('completed', 'failed', 'cancelled') else 'progress'
+            yield f"event: {event}\ndata: {json.dumps(snapshot)}\n\n"
+            if event == 'done':
+                return
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/cancel/<task_id>', methods=['POST'])
+def cancel_task(task_id):
+    if jobs.cancel(task_id):
+        return jsonify(jobs.lookup(task_id))
+    return jsonify({'error': 'Task not found or already finished'}), 404
+
+@app.route('/api/jobs')
+def list_jobs():
+    return jsonify(jobs.list(
+        stage=request.args.get('stage'),
+        status=request.args.get('status'),
+        limit=request.args.get('limit', 50, type=int),
+        before=request.args.get('before'),
+        before_id=request.args.get('before_id'),
+    ))
+
+@app.route('/api/jobs/<task_id>/logs')
+def job_logs(task_id):
+    if not jobs.lookup(task_id):
+        return jsonify({'status': 'not_found'}), 404
+    return jsonify(jobs.logs(task_id, limit=request.args.get('limit', 200, type=int)))
+
+@app.route('/api/venues')
+def query_venues():
+    """
+    Filtered, sorted, paginated venues from one of the pipeline CSVs.
+
+    Filters: postcode (prefixes), business_type, extraction_status (all
+    comma-separated), has_email, bbox=min_lon,min_lat,max_lon,max_lat.
+    sort=<column> or -<column>, limit, cursor (from next_cursor), fields.
+    """
+    filename = request.args.get('file') or latest_venue_file()
+    index = venue_indexes.get(filename)
+    if index is None:
+        return jsonify({'error': f'Unknown file: {filename}'}), 400
+    
+    try:
+        bbox = None
+        if request.args.get('bbox'):
+            bbox = tuple(float(v) for v in request.args['bbox'].split(','))
+            if len(bbox) != 4:
+                raise ValueError('bbox must be min_lon,min_lat,max_lon,max_lat')
+        sort = request.args.get('sort', 'name')
+        page = index.query(
+            postcode_prefixes=split_arg('postcode'),
+            business_types=split_arg('business_type'),
+            statuses=split_arg('extraction_status'),
+            has_email=bool_arg('has_email'),
+            bbox=bbox,
+            sort=sort.lstrip('-'),
+            descending=sort.startswith('-'),
+            limit=request.args.get('limit', 100, type=int),
+            cursor=request.args.get('cursor'),
+            fields=split_arg('fields'),
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if page is None:
+        return jsonify({'error': 'File not found'}), 404
+    return jsonify(page)
+
+@app.route('/api/stats')
+def enrichment_stats():
+    """
+    Coverage, histograms and anomaly samples for a pipeline CSV (`file`,
+    default the most enriched), plus a keyed diff against `compare` if
+    given. Cached per file version, so repeat calls don't re-read the file.
+    """
+    filename = request.args.get('file') or latest_venue_file()
+    compare = request.args.get('compare')
+    for name in filter(None, (filename, compare)):
+        if name not in VENUE_FILES:
+            return jsonify({'error': f'Unknown file: {name}'}), 400
+    try:
+        result = {'file': filename, 'stats': stats_cache.analyze(filename)}
+        if compare:
+            result['diff'] = stats_cache.diff(compare, filename)
+    except FileNotFoundError as e:
+        return jsonify({'error': f'File not found: {os.path.basename(str(e))}'}), 404
+    return jsonify(result)
+
+@app.route('/api/filters')
+def filter_status():
+    """
+    Version and list sizes of the filters in use. The filter file is
+    reloaded automatically when it changes; `?reload=1` checks right away.
+    """
+    try:
+        force = bool_arg('reload')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if force:
+        REGISTRY.reload()
+    else:
+        REGISTRY.get_engine()
+    return jsonify(REGISTRY.get_stats())
+
 @app.route('/api/files')
 def list_files():
     files = []
-    csv_files = [
-        'essex_licensed_venues.csv',
-        'essex_venues_google.csv',
-        'essex_venues_enriched.csv',
-        'essex_venues_hunter_enriched.csv'
-    ]
-    
-    for filename in csv_files:
-        if os.path.exists(filename):
-            stat = os.stat(filename)
+    for filename in VENUE_FILES:
+        version = file_version(filename)
+        if version:
             files.append({
                 'name': filename,
-                'size': stat.st_size,
-                'modified': datetime.fromtimestamp(stat.st_mtime).isoformat()
+                'size': version[1],
+                'modified': datetime.fromtimestamp(version[0] / 1e9).isoformat(),
+                'etag': version_tag(version),
+                'formats': [fmt for fmt in FORMATS if downloads.supports(fmt)],
             })
     
-    return jsonify(files)
+    # Pollers get a 304 until some file changes
+    response = jsonify(files)
+    response.set_etag('files-' + '.'.join(f['etag'] for f in files))
+    return response.make_conditional(request)
 
 @app.route('/api/download/<filename>')
 def download_file(filename):
-    allowed_files = ['essex_licensed_venues.csv', 'essex_venues_google.csv', 'essex_venues_enriched.csv', 'essex_venues_hunter_enriched.csv']
-    if filename in allowed_files and os.path.exists(filename):
-        return send_file(filename, as_attachment=True)
-    return jsonify({'error': 'File not found'}), 404
+    """
+    Download a pipeline CSV, or ?format=jsonl|parquet built once per file
+    version. Responses carry an ETag (If-None-Match gives 304) and support
+    byte ranges; clients accepting gzip get a pre-compressed copy unless
+    they ask for a range.
+    """
+    if filename not in VENUE_FILES or not os.path.exists(filename):
+        return jsonify({'error': 'File not found'}), 404
+    fmt = request.args.get('format', 'csv')
+    if not downloads.supports(fmt):
+        return jsonify({'error': f'Unsupported format: {fmt}',
+                        'formats': [f for f in FORMATS if downloads.supports(f)]}), 400
+    
+    # Ranges address the identity encoding, so range requests are never gzipped
+    gzipped = (FORMATS[fmt]['compressible'] and 'Range' not in request.headers
+               and 'gzip' in request.accept_encodings)
+    try:
+        path, version = downloads.get(filename, fmt, gzipped=gzipped)
+    except FileNotFoundError:
+        return jsonify({'error': 'File not found'}), 404
+    
+    # Tag with the version the body was built from; the source may have
+    # been rewritten since
+    etag = f"{version_tag(version)}-{fmt}" + ('-gzip' if gzipped else '')
+    download_name = os.path.splitext(filename)[0] + FORMATS[fmt]['suffix']
+    response = send_file(path, mimetype=FORMATS[fmt]['mimetype'], as_attachment=True,
+                         download_name=download_name, etag=etag, max_age=0, conditional=True)
+    if gzipped:
+        response.headers['Content-Encoding'] = 'gzip'
+    if FORMATS[fmt]['compressible']:
+        response.vary.add('Accept-Encoding')
+    return response
 
 if __name__ == '__main__':
     os.makedirs('templates', exist_ok=True)
     os.makedirs('static/css', exist_ok=True)
     os.makedirs('static/js', exist_ok=True)
-    app.run(debug=True, port=5001)
\ No newline at end of file
+    app.run(debug=True, port=5001, threaded=True)
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""
+Fuzz and benchmark contact extraction against pathological HTML.
+
+Checks that worst-case extract_emails/extract_phones time stays bounded
+regardless of input size or shape. Exits non-zero if any case goes over.
+"""
+
+import random
+import string
+import sys
+import time
+
+from venue_contact_enricher_unified import EnhancedContactExtractor
+
+
+# Generous ceiling: the document's time budget plus a window's worth of
+# regex work in each of the three passes
+MAX_SECONDS = EnhancedContactExtractor.TIME_BUDGET_SECONDS + 1.0
+
+SIZES = [10_000, 100_000, 1_000_000, 5_000_000]
+
+
+def adversarial_cases(size):
+    """Inputs shaped to trigger backtracking in the contact regexes."""
+    return {
+        'word_run': 'a' * size,
+        'dash_run': 'a-' * (size // 2),
+        'at_run': 'a@' * (size // 2),
+        'dot_run': 'a.' * (size // 2),
+        'dots_around_at': 'a.' * (size // 4) + '@' + 'b.' * (size // 4),
+        'asset_names': 'ab-cd@ef-' * (size // 9),
+        'unclosed_src': 'src="' * (size // 5),
+        'many_emails': 'ab.cd-ef@' * (size // 9),
+        'digit_run': '0' * size,
+        'spaced_digits': '01 ' * (size // 3),
+        'plus44_run': '+44 ' * (size // 4),
+    }
+
+
+def random_case(size, seed):
+    """Random soup of characters the patterns care about."""
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + '@.-_%+ ()"\'=<>/'
+    return ''.join(rng.choice(alphabet) for _ in range(size))
+
+
+def time_case(html):
+    start = time.perf_counter()
+    # Both passes share the document's budget, as in extract_contacts
+    scan = EnhancedContactExtractor.start_scan(html)
+    EnhancedContactExtractor.extract_emails(html, scan=scan)
+    EnhancedContactExtractor.extract_phones(html, scan=scan)
+    return time.perf_counter() - start
+
+
+def main():
+    """Run every case at every size and report the worst timings."""
+    print("Contact Extraction Worst-Case Benchmark")
+    print("=" * 60)
+
+    results = []
+    for size in SIZES:
+        cases = adversarial_cases(size)
+        for seed in range(3):
+            cases[f'random_{seed}'] = random_case(min(size, 200_000), seed)
+
+        for name, html in cases.items():
+            elapsed = time_case(html)
+            results.append((elapsed, name, len(html)))
+            flag = '  OVER' if elapsed > MAX_SECONDS else ''
+            print(f"  {name:<16} {len(html):>10,} chars  {elapsed:6.3f}s{flag}")
+
+    worst = max(results)
+    print("-" * 60)
+    print(f"Worst case: {worst[1]} ({worst[2]:,} chars) in {worst[0]:.3f}s")
+    print(f"Budget hits recorded: {EnhancedContactExtractor.budget_hits}")
+    print(f"Limit: {MAX_SECONDS:.1f}s")
+
+    return 1 if worst[0] > MAX_SECONDS else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Check and benchmark domain filtering.
+
+Runs the hand-written edge cases in config/domain_filter_edge_cases.csv
+through check_url, then compares it with the old substring filter on the
+real venue websites in config/domain_filter_corpus.csv (built by
+build_filter_corpus.py). Times the hostname trie against the substring
+scan on those URLs and on long URLs. Exits non-zero if the corpus is
+missing or empty, if an edge case disagrees, or if on real data the new
+filter excludes a URL the old one kept or gives a different reason.
+"""
+
+import csv
+import os
+import sys
+import time
+
+from build_filter_corpus import CORPUS_FILE, substring_decision
+from config.filter_engine import FilterEngine
+from config.filters import REGISTRY, check_url, get_engine
+
+EDGE_CASES_FILE = "config/domain_filter_edge_cases.csv"
+
+ROUNDS = 20_000
+PATH_LENGTHS = [100, 1_000, 10_000]
+
+
+def load_corpus(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def substring_scan(url):
+    """The old should_exclude_domain: substring tests on the whole URL."""
+    return substring_decision(url)[0]
+
+
+def compare_with_substring(rows):
+    """
+    Split real-corpus rows where check_url differs from the substring
+    label into (regressions, now_kept): regressions are new exclusions or
+    changed reasons; now_kept are URLs only the substring test excluded,
+    i.e. a listed domain outside the hostname or inside a longer label.
+    """
+    regressions, now_kept = [], []
+    for row in rows:
+        decision = check_url(row['url'])
+        was_excluded = row['excluded'] == 'true'
+        if decision.excluded and (not was_excluded or decision.reason != row['reason']):
+            regressions.append((row, decision))
+        elif was_excluded and not decision.excluded:
+            now_kept.append((row, decision))
+    return regressions, now_kept
+
+
+def check_corpus(rows):
+    """Rows where check_url disagrees with the expected decision or reason."""
+    failures = []
+    for row in rows:
+        decision = check_url(row['url'])
+        expected = row['excluded'] == 'true'
+        if decision.excluded != expected or decision.reason != row['reason']:
+            failures.append((row, decision))
+    return failures
+
+
+def time_calls(check, urls, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for url in urls:
+            check(url)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(urls)) * 1e6
+
+
+def main():
+    print("Domain Filter Regression And Benchmark")
+    print("=" * 60)
+
+    edge_cases = load_corpus(EDGE_CASES_FILE)
+    failures = check_corpus(edge_cases)
+    substring_wrong = sum(1 for row in edge_cases if substring_scan(row['url']) != (row['excluded'] == 'true'))
+    print(f"Edge cases: {len(edge_cases)} URLs, {len(failures)} failures "
+          f"(substring scan would get {substring_wrong} wrong)")
+    for row, decision in failures:
+        print(f"  FAIL {row['url']}: expected {row['excluded']}/{row['reason'] or '-'}, "
+              f"got {decision.excluded}/{decision.reason or '-'}")
+
+    rows = load_corpus(CORPUS_FILE)
+    if not rows:
+        # Without real websites the edge cases alone say nothing about regressions
+        print(f"FAIL Real websites: {CORPUS_FILE} is missing or empty; run "
+              f"build_filter_corpus.py after a pipeline run to build it")
+        return 1
+    regressions, now_kept = compare_with_substring(rows)
+    print(f"Real websites: {len(rows)} URLs, {len(rows) - len(regressions) - len(now_kept)} "
+          f"decided as before, {len(regressions)} regressions, {len(now_kept)} now kept")
+    for row, decision in regressions:
+        print(f"  REGRESSION {row['url']}: substring {row['excluded']}/{row['reason'] or '-'}, "
+              f"now {decision.excluded}/{decision.reason or '-'}")
+    for row, _ in now_kept:
+        print(f"  now kept (review) {row['url']}: substring excluded it as {row['reason']}")
+    urls = [row['url'] for row in rows]
+
+    print("-" * 60)
+    print(f"{'case':<24} {'substring':>12} {'trie':>12} {'cached':>12}")
+    cases = {'corpus': (urls, ROUNDS // 10)}
+    for length in PATH_LENGTHS:
+        path = ('/menu-and-drinks' * (length // 16 + 1))[:length]
+        cases[f'path_{length:,}'] = ([url.rstrip('/') + path for url in urls], max(ROUNDS // length, 5))
+
+    # Same lists without memoization, so the trie column is parse plus lookup
+    uncached = FilterEngine(REGISTRY.config.lists, cache_size=0)
+    for name, (case_urls, rounds) in cases.items():
+        baseline = time_calls(substring_scan, case_urls, rounds)
+        trie = time_calls(uncached.check_url, case_urls, rounds)
+        get_engine().clear_cache()
+        cached = time_calls(check_url, case_urls, rounds)
+        print(f"{name:<24} {baseline:>10.2f}us {trie:>10.2f}us {cached:>10.2f}us")
+
+    print("-" * 60)
+    print(f"Cache: {get_engine().get_stats()['urls']}")
+
+    return 1 if failures or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,8 +5,12 @@ Implements two-tier approach for maximum reliability.
 
 import os
 import asyncio
+import json
 import requests
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any
 from urllib.parse import urlparse
 from dotenv import load_dotenv
@@ -20,6 +24,54 @@ except ImportError:
 
 load_dotenv()
 
+# Resource types aborted during Browser API renders unless allowlisted.
+# Scripts and XHR stay enabled so JavaScript-rendered contact details appear.
+BLOCKED_RESOURCE_TYPES = {
+    'image', 'media', 'font', 'stylesheet', 'texttrack',
+    'eventsource', 'websocket', 'manifest', 'other'
+}
+
+# Third-party trackers and widgets that never carry venue contact details
+BLOCKED_THIRD_PARTY_HOSTS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+    'facebook.net', 'hotjar.com', 'clarity.ms', 'googlesyndication.com',
+    'adservice.google.com', 'cookiebot.com', 'onetrust.com', 'tiktok.com',
+    'youtube.com', 'vimeo.com', 'gstatic.com'
+)
+
+# Stop waiting once the page shows a mailto/tel link or something contact-like
+READINESS_SCRIPT = r"""() => {
+    if (document.querySelector('a[href^="mailto:"], a[href^="tel:"]')) return true;
+    const text = document.body ? document.body.innerText : '';
+    return /[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}/.test(text)
+        || /(\+44|\b0)[\d\s]{9,12}\d/.test(text);
+}"""
+
+
+def load_resource_allowlist(raw: str) -> Dict[str, set]:
+    """
+    Parse BRIGHTDATA_RESOURCE_ALLOWLIST, a JSON mapping of domain to resource
+    types. A malformed value is reported and ignored rather than stopping
+    the client from starting.
+    """
+    try:
+        data = json.loads(raw or '{}')
+    except ValueError as e:
+        print(f"Warning: ignoring BRIGHTDATA_RESOURCE_ALLOWLIST, not valid JSON: {e}")
+        return {}
+    if not isinstance(data, dict):
+        print("Warning: ignoring BRIGHTDATA_RESOURCE_ALLOWLIST, expected a JSON object of domain -> types")
+        return {}
+    allowlist = {}
+    for domain, types in data.items():
+        if isinstance(types, str):
+            types = [types]
+        if not isinstance(types, list) or not all(isinstance(t, str) for t in types):
+            print(f"Warning: ignoring BRIGHTDATA_RESOURCE_ALLOWLIST entry for {domain}, expected a list of types")
+            continue
+        allowlist[domain.lower()] = set(types)
+    return allowlist
+
 
 class BrightDataClient:
     """Unified BrightData client with Browser API and Web Unlocker fallback."""
@@ -36,17 +88,48 @@ class BrightDataClient:
         # Web Unlocker API endpoint
         self.unlocker_url = "https://api.brightdata.com/request"
         
-        # Rate limiting
+        # Rate limiting; Unlocker calls come from fetch and hedge threads
         self.last_request_time = 0
         self.min_request_interval = 1.0
+        self._rate_lock = threading.Lock()
+        
+        # Hedged mode: start Web Unlocker alongside a slow Browser API render
+        self.hedge_enabled = os.getenv('BRIGHTDATA_HEDGE', 'false').lower() == 'true'
+        self.hedge_delay = float(os.getenv('BRIGHTDATA_HEDGE_DELAY', '8'))
+        self.min_hedge_delay = 2.0
+        self.hedge_stats: Dict[str, Dict[str, Any]] = {}
+        self._hedge_lock = threading.Lock()
+        # Own pool so asyncio.run() doesn't wait on a losing Unlocker request
+        self._hedge_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='unlocker-hedge')
         
+        # Browser API resource blocking and readiness wait
+        self.block_resources = os.getenv('BRIGHTDATA_BLOCK_RESOURCES', 'true').lower() == 'true'
+        self.readiness_timeout = float(os.getenv('BRIGHTDATA_READINESS_TIMEOUT', '2'))
+        # JSON mapping of domain -> resource types to let through, e.g. {"example.com": ["stylesheet"]}
+        self.resource_allowlist = load_resource_allowlist(os.getenv('BRIGHTDATA_RESOURCE_ALLOWLIST', '{}'))
+        # Renders run on several fetch threads; update through _add_render_stats
+        self._stats_lock = threading.Lock()
+        self.render_stats = {
+            'renders': 0,
+            'render_seconds': 0.0,
+            'bytes': 0,
+            'blocked_requests': 0,
+            'ready_early': 0,
+        }
+        
+    def _add_render_stats(self, **deltas):
+        with self._stats_lock:
+            for key, delta in deltas.items():
+                self.render_stats[key] += delta
+    
     def _rate_limit(self):
         """Ensure rate limiting between requests."""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.min_request_interval:
-            time.sleep(self.min_request_interval - time_since_last)
-        self.last_request_time = time.time()
+        with self._rate_lock:
+            current_time = time.time()
+            time_since_last = current_time - self.last_request_time
+            if time_since_last < self.min_request_interval:
+                time.sleep(self.min_request_interval - time_since_last)
+            self.last_request_time = time.time()
     
     async def scrape_with_browser(self, url: str, timeout: int = 30) -> Optional[str]:
         """
@@ -71,19 +154,36 @@ class BrightDataClient:
                 
                 try:
                     page = await browser.new_page()
+                    render_start = time.time()
+                    page_bytes = 0
+                    
+                    if self.block_resources:
+                        await page.route('**/*', self._resource_filter(url))
+                    
+                    # Approximate: responses without a Content-Length header
+                    # (chunked transfers) aren't counted
+                    def count_bytes(response):
+                        nonlocal page_bytes
+                        page_bytes += int(response.headers.get('content-length', 0) or 0)
+                    page.on('response', count_bytes)
+                    
                     print(f"    Navigating to {url}")
                     
                     # Set timeout and navigate
                     page.set_default_timeout(timeout * 1000)
                     await page.goto(url, wait_until='domcontentloaded', timeout=timeout * 1000)
                     
-                    # Wait a bit for dynamic content
-                    await page.wait_for_timeout(2000)
+                    # Wait only as long as it takes for contact details or network idle
+                    if await self._wait_until_ready(page):
+                        self._add_render_stats(ready_early=1)
                     
                     # Get the HTML content
                     html = await page.content()
                     print(f"    Successfully retrieved {len(html)} characters via Browser API")
                     
+                    self._add_render_stats(renders=1, render_seconds=time.time() - render_start,
+                                           bytes=page_bytes)
+                    
                     return html
                     
                 finally:
@@ -93,6 +193,65 @@ class BrightDataClient:
             print(f"    Browser API error: {str(e)}")
             return None
     
+    def _resource_filter(self, url: str):
+        """Build a Playwright route handler that aborts non-document resources."""
+        site = urlparse(url).netloc.lower()
+        if site.startswith('www.'):
+            site = site[4:]
+        allowed = set()
+        for domain, types in self.resource_allowlist.items():
+            if site == domain or site.endswith('.' + domain):
+                allowed |= types
+        
+        async def handle(route):
+            request = route.request
+            host = urlparse(request.url).netloc.lower()
+            resource_type = request.resource_type
+            blocked = (
+                (resource_type in BLOCKED_RESOURCE_TYPES and resource_type not in allowed)
+                or any(host == h or host.endswith('.' + h) for h in BLOCKED_THIRD_PARTY_HOSTS)
+            )
+            if blocked and resource_type != 'document':
+                self._add_render_stats(blocked_requests=1)
+                await route.abort()
+            else:
+                await route.continue_()
+        
+        return handle
+    
+    async def _wait_until_ready(self, page) -> bool:
+        """
+        Wait up to `readiness_timeout` seconds for contact details to appear
+        or the network to go idle. Returns True if the page was ready early.
+        """
+        timeout_ms = self.readiness_timeout * 1000
+        waits = {
+            asyncio.ensure_future(page.wait_for_function(READINESS_SCRIPT, timeout=timeout_ms)),
+            asyncio.ensure_future(page.wait_for_load_state('networkidle', timeout=timeout_ms)),
+        }
+        done, pending = await asyncio.wait(waits, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        return any(not task.cancelled() and task.exception() is None for task in done)
+    
+    def get_render_summary(self) -> str:
+        """Get a formatted summary of Browser API render cost."""
+        with self._stats_lock:
+            stats = dict(self.render_stats)
+        renders = stats['renders']
+        avg_time = stats['render_seconds'] / renders if renders else 0
+        avg_kb = stats['bytes'] / renders / 1024 if renders else 0
+        return "\n".join([
+            "BROWSER RENDER STATISTICS",
+            "=" * 60,
+            f"Pages rendered:                {renders}",
+            f"Average render time:           {avg_time:.1f}s",
+            f"Average KB per page (approx.): {avg_kb:.1f}",
+            f"Ready before timeout:          {stats['ready_early']}",
+            f"Blocked resource requests:     {stats['blocked_requests']}",
+        ])
+    
     def scrape_with_unlocker(self, url: str, timeout: int = 30) -> Optional[str]:
         """
         Scrape using Web Unlocker API (Direct HTTP).
@@ -136,9 +295,132 @@ class BrightDataClient:
             print(f"    Request error: {e}")
             return None
     
+    def _domain_hedge_stats(self, domain: str) -> Dict[str, Any]:
+        if domain not in self.hedge_stats:
+            self.hedge_stats[domain] = {
+                'browser_wins': 0,
+                'unlocker_wins': 0,
+                'hedges_fired': 0,
+                'fallbacks': 0,
+                'browser_failures': 0,
+                'unlocker_failures': 0,
+                'browser_latencies': deque(maxlen=20),
+                'unlocker_latencies': deque(maxlen=20),
+            }
+        return self.hedge_stats[domain]
+    
+    def hedge_delay_for(self, url: str, timeout: float) -> float:
+        """
+        Seconds to wait on the Browser API before firing Web Unlocker.
+        Starts at the configured delay, then tracks the domain's typical
+        browser latency and shortens when Unlocker keeps winning races.
+        
+        Latencies come from every render that returned a page, won or not,
+        and renders cancelled after losing count at their elapsed time (a
+        lower bound), so slow renders aren't left out. Failed attempts
+        aren't page latencies and aren't wins for either tier.
+        """
+        domain = urlparse(url).netloc.lower()
+        with self._hedge_lock:
+            stats = self._domain_hedge_stats(domain)
+            latencies = sorted(stats['browser_latencies'])
+            wins = stats['browser_wins'] + stats['unlocker_wins']
+            unlocker_rate = stats['unlocker_wins'] / wins if wins else 0.0
+        
+        delay = self.hedge_delay
+        if len(latencies) >= 3:
+            delay = latencies[int(len(latencies) * 0.75)]
+        if wins >= 3 and unlocker_rate > 0.5:
+            delay /= 2
+        return max(self.min_hedge_delay, min(delay, timeout))
+    
+    def _record_attempt(self, url: str, tier: str, latency: float, ok: bool):
+        """Record a completed 'browser' or 'unlocker' attempt, successful or not."""
+        domain = urlparse(url).netloc.lower()
+        with self._hedge_lock:
+            stats = self._domain_hedge_stats(domain)
+            if ok:
+                stats[f'{tier}_latencies'].append(latency)
+            else:
+                stats[f'{tier}_failures'] += 1
+    
+    def _record_hedge(self, url: str, winner: Optional[str], outcome: str):
+        """Record how a hedged scrape ended: 'unhedged', 'fallback' or 'hedged'."""
+        domain = urlparse(url).netloc.lower()
+        with self._hedge_lock:
+            stats = self._domain_hedge_stats(domain)
+            if outcome == 'fallback':
+                # The Browser API had already failed, so there was no race to win
+                stats['fallbacks'] += 1
+                return
+            if outcome == 'hedged':
+                stats['hedges_fired'] += 1
+            if winner == 'browser':
+                stats['browser_wins'] += 1
+            elif winner == 'unlocker':
+                stats['unlocker_wins'] += 1
+    
+    async def scrape_hedged(self, url: str, timeout: int = 45) -> Optional[str]:
+        """
+        Start the Browser API and, if it hasn't returned within the hedge
+        delay, fire Web Unlocker in parallel. The first valid HTML wins and
+        the Browser API task is cancelled if it loses (an in-flight Unlocker
+        request can't be aborted, so its result is simply discarded). A
+        Browser API failure before the delay falls back to Web Unlocker
+        without counting as a hedge.
+        """
+        delay = self.hedge_delay_for(url, timeout)
+        start = time.time()
+        browser_task = asyncio.ensure_future(self.scrape_with_browser(url, timeout))
+        loop = asyncio.get_running_loop()
+        
+        done, _ = await asyncio.wait({browser_task}, timeout=delay)
+        if done:
+            html = browser_task.result()
+            self._record_attempt(url, 'browser', time.time() - start, bool(html))
+            if html:
+                self._record_hedge(url, 'browser', 'unhedged')
+                return html
+            
+            print(f"    Browser API failed after {time.time() - start:.1f}s, falling back to Web Unlocker...")
+            unlocker_start = time.time()
+            html = await loop.run_in_executor(self._hedge_executor, self.scrape_with_unlocker, url, timeout)
+            self._record_attempt(url, 'unlocker', time.time() - unlocker_start, bool(html))
+            self._record_hedge(url, None, 'fallback')
+            return html
+        
+        print(f"    Browser API slow after {time.time() - start:.1f}s, hedging with Web Unlocker...")
+        unlocker_start = time.time()
+        unlocker_task = loop.run_in_executor(self._hedge_executor, self.scrape_with_unlocker, url, timeout)
+        pending = {browser_task, unlocker_task}
+        winner, result = None, None
+        
+        try:
+            while pending and not winner:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    tier = 'browser' if task is browser_task else 'unlocker'
+                    html = task.result()
+                    self._record_attempt(url, tier, time.time() - (start if tier == 'browser' else unlocker_start),
+                                         bool(html))
+                    if html and not winner:
+                        winner, result = tier, html
+        finally:
+            if browser_task in pending:
+                # Lost the race: it would have taken at least this long
+                self._record_attempt(url, 'browser', time.time() - start, True)
+            for task in pending:
+                task.cancel()
+        
+        self._record_hedge(url, winner, 'hedged')
+        if winner:
+            print(f"    Hedge won by {'Browser API' if winner == 'browser' else 'Web Unlocker'}")
+        return result
+    
     def scrape_url(self, url: str, timeout: int = 45) -> Optional[str]:
         """
         Main scraping method that always tries Browser API first, then Web Unlocker.
+        In hedged mode both run concurrently once the Browser API is slow.
         Returns HTML content or None if both methods fail.
         """
         if not url or not isinstance(url, str) or not url.strip():
@@ -148,6 +430,13 @@ class BrightDataClient:
         url = url.strip()
         print(f"\n  Scraping: {url}")
         
+        if PLAYWRIGHT_AVAILABLE and self.hedge_enabled:
+            try:
+                return asyncio.run(self.scrape_hedged(url, timeout))
+            except Exception as e:
+                print(f"    Hedged scrape failed: {e}")
+                return self.scrape_with_unlocker(url, timeout)
+        
         # Always try Browser API first if available
         if PLAYWRIGHT_AVAILABLE:
             print(f"  Trying Browser API first...")
@@ -164,6 +453,27 @@ class BrightDataClient:
         print(f"  Trying Web Unlocker API as fallback...")
         return self.scrape_with_unlocker(url, timeout)
     
+    def get_hedge_summary(self) -> str:
+        """Get a formatted summary of hedged request win rates."""
+        with self._hedge_lock:
+            browser = sum(s['browser_wins'] for s in self.hedge_stats.values())
+            unlocker = sum(s['unlocker_wins'] for s in self.hedge_stats.values())
+            fired = sum(s['hedges_fired'] for s in self.hedge_stats.values())
+            fallbacks = sum(s['fallbacks'] for s in self.hedge_stats.values())
+            browser_failures = sum(s['browser_failures'] for s in self.hedge_stats.values())
+            unlocker_failures = sum(s['unlocker_failures'] for s in self.hedge_stats.values())
+        return "\n".join([
+            "HEDGE STATISTICS",
+            "=" * 60,
+            f"Domains scraped:               {len(self.hedge_stats)}",
+            f"Hedges fired:                  {fired}",
+            f"Browser API wins:              {browser}",
+            f"Web Unlocker wins:             {unlocker}",
+            f"Fallbacks after browser error: {fallbacks}",
+            f"Browser API failures:          {browser_failures}",
+            f"Web Unlocker failures:         {unlocker_failures}",
+        ])
+    
     def classify_url(self, url: str) -> str:
         """
         Classify URL to help determine scraping strategy.
@@ -1,11 +1,12 @@
-import os, zipfile, io, requests, csv, time
+import os, zipfile, io, requests, csv, threading, time
 from pathlib import Path
 from difflib import SequenceMatcher
 from bs4 import BeautifulSoup   # pip install beautifulsoup4 lxml
-from config.filters import should_exclude_business_name
+from config.filters import get_engine
 from utils.filtering import FilterStatistics
+from utils.pipeline import STAGE_FILES
 
-OUT = Path("essex_licensed_venues.csv")
+OUT = Path(STAGE_FILES['seed'].output_file)
 cols = ["name","business_type","website","lat","lon",
         "address_line1","address_line2","postcode"]
 
@@ -124,13 +125,15 @@ def find_osm_website(name, postcode, cache=None, offline_data=None):
         )
         resp.raise_for_status()
         data = resp.json()
-<<<<<<< HEAD
     except requests.exceptions.Timeout:
         print(f"Overpass request timed out for {name!r} {postcode}")
         return None
     except requests.exceptions.RequestException as e:
         print(f"Overpass request error for {name!r} {postcode}: {e}")
         return None
+    except Exception as e:
+        print(f"Overpass error for {name!r} {postcode}: {e}")
+        return None
 
     for el in data.get("elements", []):
         tags = el.get("tags", {})
@@ -138,26 +141,44 @@ def find_osm_website(name, postcode, cache=None, offline_data=None):
             return tags["contact:website"]
         if "website" in tags:
             return tags["website"]
-        return None
-    except Exception as e:
-        print(f"Overpass error for {name!r} {postcode}: {e}")
-        return None
+    return None
 
-def main(skip_osm=False):
+def main(skip_osm=False, progress=None, skip_google=False):
     """
     Main function to build Essex venue list.
     
     Args:
         skip_osm: If True, skip OSM enrichment entirely (useful when OSM is down)
+        progress: Optional callback progress(done, total, message) for each step;
+            an exception it raises (e.g. cancellation) stops the run
+        skip_google: If True, leave Google search to the separate google stage
+    
+    Returns:
+        Number of rows written to OUT
     """
     rows = []
-    filter_stats = FilterStatistics()
+    filter_stats = FilterStatistics("build_essex_filter_log.csv")
+    
+    # Set when the caller's progress callback asks to stop, so that isn't
+    # mistaken for an enrichment error below
+    stop_requested = threading.Event()
+    caller_progress = progress
+    if caller_progress:
+        def progress(done, total, message):
+            try:
+                caller_progress(done, total, message)
+            except BaseException:
+                stop_requested.set()
+                raise
     
     # Check for environment variable to skip OSM
     if os.getenv("SKIP_OSM", "").lower() in ("true", "1", "yes"):
         skip_osm = True
         print("SKIP_OSM environment variable set - skipping OSM enrichment")
-    for la_id in (109,110,113,117,119,121,125,128,134,143,148,152,196,199):
+    la_ids = (109,110,113,117,119,121,125,128,134,143,148,152,196,199)
+    for i, la_id in enumerate(la_ids):
+        if progress:
+            progress(i, len(la_ids), f"Fetching FHRS data for LA {la_id}")
         print(f"Processing LA ID: {la_id}")
         xml_content = fetch(
             f"https://ratings.food.gov.uk/OpenDataFiles/FHRS{la_id}en-GB.xml")
@@ -167,6 +188,8 @@ def main(skip_osm=False):
             print(f"Skipping LA ID {la_id} due to fetch error.")
 
     # Optional: bring in the Open-Pubs CSV and append pubs we don't already have
+    if progress:
+        progress(0, 0, "Downloading Open-Pubs CSV")
     print("Downloading Open-Pubs CSV...")
     opubs = requests.get(
         "https://www.getthedata.com/downloads/open_pubs.csv.zip",
@@ -265,6 +288,8 @@ def main(skip_osm=False):
                 
                 # Progress indicator
                 if idx % 10 == 0:
+                    if progress:
+                        progress(idx, len(deduped_rows), f"OSM lookups: {osm_enriched} websites found")
                     print(f"  Progress: {idx}/{len(deduped_rows)} checked, {osm_enriched} enriched ({osm_cached} from cache)")
                     # Only sleep for non-cached requests
                     if not was_cached:
@@ -286,22 +311,28 @@ def main(skip_osm=False):
     print("\nApplying business name filters...")
     pre_filter_count = len(deduped_rows)
     filtered_rows = []
-    for row in deduped_rows:
-        if not should_exclude_business_name(row.get('name', '')):
+    decisions = get_engine().check_names(row.get('name', '') for row in deduped_rows)
+    for row, decision in zip(deduped_rows, decisions):
+        if not decision.excluded:
             filtered_rows.append(row)
         else:
-            filter_stats.log_filter(row.get('name', ''), 'Excluded business type', 'business_name')
+            filter_stats.log_filter(row.get('name', ''), decision.reason, decision.filter_type, decision.version)
     
     print(f"Filtered out {pre_filter_count - len(filtered_rows)} venues before enrichment")
     
     # Optional: use Google Programmable Search to fill any remaining blanks
     g_api_key = os.getenv("GOOGLE_API_KEY")
     g_cx = os.getenv("GOOGLE_CX")
-    if g_api_key and g_cx:
+    if skip_google:
+        print("Skipping Google enrichment (run as a separate pipeline stage)")
+    elif g_api_key and g_cx:
         try:
             import google_website_enricher
-            google_website_enricher.enrich_rows_with_google(filtered_rows, g_api_key, g_cx, filter_stats=filter_stats)
+            google_website_enricher.enrich_rows_with_google(filtered_rows, g_api_key, g_cx, filter_stats=filter_stats,
+                                                            progress=progress)
         except Exception as exc:
+            if stop_requested.is_set():
+                raise
             print(f"Google enrichment failed: {exc}")
     else:
         print("Skipping Google enrichment. Set GOOGLE_API_KEY and GOOGLE_CX to enable.")
@@ -314,9 +345,11 @@ def main(skip_osm=False):
         w.writerows(filtered_rows)
     
     # Save filter log
-    if filter_stats.filter_log:
+    if filter_stats.logged:
         filter_stats.save_log("build_essex_filter_log.csv")
         print(f"Filter log saved to: build_essex_filter_log.csv")
+    
+    return len(filtered_rows)
 
 if __name__ == "__main__":
     main()
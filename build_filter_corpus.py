@@ -0,0 +1,85 @@
+"""
+Build the domain-filter regression corpus from real venue websites.
+
+Reads the website column of the pipeline CSVs (seed, Google and scraper
+outputs, whichever exist, or the files given) and labels each distinct
+URL with the decision and reason of the old substring filter, which
+tested every listed domain against the whole URL. benchmark_filters.py
+then compares the hostname-suffix filter against those labels.
+
+The seed file as committed has no websites (OSM and Google fill them in
+later stages), so run this after a pipeline run has produced them.
+
+Usage:
+    python build_filter_corpus.py [FILE ...] [--output PATH]
+"""
+
+import argparse
+import csv
+import os
+import sys
+from typing import Dict, List, Tuple
+
+from config.filter_engine import DOMAIN_CATEGORIES
+from config.filters import REGISTRY
+from utils.pipeline import STAGE_FILES
+
+CORPUS_FILE = "config/domain_filter_corpus.csv"
+CORPUS_FIELDS = ['url', 'excluded', 'reason', 'source']
+
+# Pipeline outputs that carry a website column, earliest stage first
+DEFAULT_SOURCES = [STAGE_FILES[stage].output_file for stage in ('seed', 'google', 'scrape')]
+
+
+def substring_decision(url: str) -> Tuple[bool, str]:
+    """(excluded, reason) from the old filter: substring tests on the whole URL."""
+    url_lower = url.lower().strip()
+    lists = REGISTRY.config.lists
+    for _, key, reason, _ in DOMAIN_CATEGORIES:
+        if any(domain in url_lower for domain in lists[key]):
+            return True, reason
+    return False, ''
+
+
+def collect_websites(paths: List[str]) -> Dict[str, str]:
+    """Distinct non-empty websites across `paths`, mapped to the first file they appear in."""
+    websites: Dict[str, str] = {}
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                website = (row.get('website') or '').strip()
+                if website:
+                    websites.setdefault(website, path)
+    return websites
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the domain-filter corpus from venue websites")
+    parser.add_argument('files', nargs='*', help="CSVs with a website column (default: pipeline outputs)")
+    parser.add_argument('--output', default=CORPUS_FILE, help=f"Corpus to write (default: {CORPUS_FILE})")
+    args = parser.parse_args(argv)
+
+    paths = [path for path in (args.files or DEFAULT_SOURCES) if os.path.exists(path)]
+    websites = collect_websites(paths)
+    if not websites:
+        print(f"No websites found in {', '.join(paths) or 'any pipeline output'}; nothing written")
+        return 1
+
+    rows = []
+    for url in sorted(websites):
+        excluded, reason = substring_decision(url)
+        rows.append({'url': url, 'excluded': 'true' if excluded else 'false',
+                     'reason': reason, 'source': websites[url]})
+
+    with open(args.output, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CORPUS_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    excluded = sum(1 for row in rows if row['excluded'] == 'true')
+    print(f"Wrote {len(rows)} websites from {len(paths)} file(s) to {args.output} "
+          f"({excluded} excluded by the substring filter)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,93 +1,112 @@
 """
-Quick script to check enrichment status and identify problematic venues.
+Check enrichment status and identify problematic venues in any pipeline
+output, optionally comparing it against an earlier run.
+
+Usage:
+    python check_enrichment_status.py [FILE] [--compare OLD_FILE] [--json]
 """
 
-import csv
-from collections import Counter
+import argparse
+import json
+import os
+import sys
+
+from utils.enrichment_stats import StatsCache, analyze_file
+from utils.pipeline import PIPELINE_FILES
 
 
 def analyze_enrichment_file(filename):
     """Analyze an enrichment CSV file and return statistics."""
-    with open(filename, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        venues = list(reader)
+    return analyze_file(filename)
+
+
+def print_stats(filename, stats):
+    print(f"\n{filename}:")
+    print("-" * 60)
+    total = stats['total']
+    print(f"Total venues: {total}")
+    if not total:
+        return
+    print(f"With email: {stats['with_email']} ({stats['with_email_pct']:.1f}%)")
+    print(f"With phone: {stats['with_phone']} ({stats['with_phone_pct']:.1f}%)")
+    
+    print(f"\nField coverage:")
+    for field, coverage in stats['coverage'].items():
+        print(f"  {field:<24} {coverage['count']:>7}  ({coverage['pct']:.1f}%)")
     
-    stats = {
-        'total': len(venues),
-        'with_email': sum(1 for v in venues if v.get('email_found')),
-        'with_phone': sum(1 for v in venues if v.get('phone_found')),
-        'status_counts': Counter(v.get('extraction_status', 'unknown') for v in venues),
-        'facebook_urls': sum(1 for v in venues if 'facebook.com' in v.get('website', '')),
-        'tripadvisor_urls': sum(1 for v in venues if 'tripadvisor' in v.get('website', '')),
-        'png_emails': [v for v in venues if '.png' in v.get('email_found', '')],
-        'failed_venues': [v for v in venues if v.get('extraction_status') == 'failed'][:5]
-    }
+    for field, counts in stats['histograms'].items():
+        print(f"\n{field} breakdown:")
+        for value, count in counts.items():
+            print(f"  {value}: {count}")
     
-    return stats
+    if stats['listing_hosts']:
+        print(f"\nListing sites used as website:")
+        for host, count in stats['listing_hosts'].items():
+            print(f"  {host}: {count}")
+    
+    if stats['anomalies']:
+        print(f"\nAnomalies:")
+        for anomaly, entry in stats['anomalies'].items():
+            print(f"  {anomaly}: {entry['count']}")
+            for sample in entry['samples'][:3]:
+                detail = f" - {sample['detail']}" if sample['detail'] else ''
+                print(f"    - {sample['name']} ({sample['postcode']}){detail}")
 
 
-def main():
-    """Compare original and fixed enrichment files."""
-    print("Essex Venues Enrichment Status Check")
-    print("=" * 60)
-    
-    # Analyze original file
-    print("\nOriginal enriched file (essex_venues_enriched.csv):")
+def print_diff(diff):
+    print(f"\nChanges from {diff['old_file']} to {diff['new_file']}:")
     print("-" * 60)
+    print(f"Venues: {diff['old_total']} -> {diff['new_total']} "
+          f"(+{diff['added']} added, -{diff['removed']} removed, {diff['unchanged']} unchanged)")
+    print(f"Emails gained: +{diff['gained_email']}")
+    print(f"Emails lost: -{diff['lost_email']}")
+    if diff['changed_fields']:
+        print(f"\nChanged fields:")
+        for field, count in diff['changed_fields'].items():
+            print(f"  {field}: {count}")
+    if diff['status_transitions']:
+        print(f"\nStatus transitions:")
+        for transition, count in diff['status_transitions'].items():
+            print(f"  {transition}: {count}")
+    for kind, samples in diff['samples'].items():
+        print(f"\nExample {kind.replace('_', ' ')}:")
+        for sample in samples[:3]:
+            detail = f" - {sample['detail']}" if sample['detail'] else ''
+            print(f"  - {sample['name']} ({sample['postcode']}){detail}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Enrichment statistics for a pipeline CSV")
+    parser.add_argument('file', nargs='?', help="CSV to analyze (default: most enriched pipeline output)")
+    parser.add_argument('--compare', metavar='OLD_FILE', help="Earlier run to diff against, keyed by venue")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable JSON")
+    args = parser.parse_args(argv)
     
-    try:
-        original_stats = analyze_enrichment_file('essex_venues_enriched.csv')
-        
-        print(f"Total venues: {original_stats['total']}")
-        print(f"With email: {original_stats['with_email']} ({original_stats['with_email']/original_stats['total']*100:.1f}%)")
-        print(f"With phone: {original_stats['with_phone']} ({original_stats['with_phone']/original_stats['total']*100:.1f}%)")
-        print(f"\nFacebook URLs: {original_stats['facebook_urls']}")
-        print(f"TripAdvisor URLs: {original_stats['tripadvisor_urls']}")
-        print(f"PNG emails found: {len(original_stats['png_emails'])}")
-        
-        print(f"\nStatus breakdown:")
-        for status, count in original_stats['status_counts'].items():
-            print(f"  {status}: {count}")
-        
-        if original_stats['png_emails']:
-            print(f"\nExample PNG emails:")
-            for v in original_stats['png_emails'][:3]:
-                print(f"  - {v['name']}: {v['email_found']}")
-        
-    except FileNotFoundError:
-        print("File not found!")
+    filename = args.file or next((f for f in reversed(PIPELINE_FILES) if os.path.exists(f)), None)
+    if not filename or not os.path.exists(filename):
+        print(f"File not found: {filename or ', '.join(PIPELINE_FILES)}")
+        return 1
+    if args.compare and not os.path.exists(args.compare):
+        print(f"File not found: {args.compare}")
+        return 1
     
-    # Check if fixed file exists
-    print("\n\nFixed enriched file (essex_venues_enriched_fixed.csv):")
-    print("-" * 60)
+    # Results are cached per file version, shared with the web UI's /api/stats
+    cache = StatsCache()
+    stats = cache.analyze(filename)
+    diff = cache.diff(args.compare, filename) if args.compare else None
     
-    try:
-        fixed_stats = analyze_enrichment_file('essex_venues_enriched_fixed.csv')
-        
-        print(f"Total venues: {fixed_stats['total']}")
-        print(f"With email: {fixed_stats['with_email']} ({fixed_stats['with_email']/fixed_stats['total']*100:.1f}%)")
-        print(f"With phone: {fixed_stats['with_phone']} ({fixed_stats['with_phone']/fixed_stats['total']*100:.1f}%)")
-        print(f"\nPNG emails found: {len(fixed_stats['png_emails'])}")
-        
-        print(f"\nStatus breakdown:")
-        for status, count in fixed_stats['status_counts'].items():
-            print(f"  {status}: {count}")
-        
-        # Calculate improvements
-        if 'original_stats' in locals():
-            print("\n\nImprovements:")
-            print("-" * 60)
-            email_improvement = fixed_stats['with_email'] - original_stats['with_email']
-            phone_improvement = fixed_stats['with_phone'] - original_stats['with_phone']
-            print(f"Additional emails found: +{email_improvement}")
-            print(f"Additional phones found: +{phone_improvement}")
-            print(f"PNG emails removed: {len(original_stats['png_emails']) - len(fixed_stats['png_emails'])}")
-            
-    except FileNotFoundError:
-        print("Fixed file not found - run venue_contact_enricher_brightdata.py to create it")
+    if args.json:
+        print(json.dumps({'stats': stats, 'diff': diff} if diff else stats, indent=2))
+        return 0
     
+    print("Essex Venues Enrichment Status Check")
+    print("=" * 60)
+    print_stats(filename, stats)
+    if diff:
+        print_diff(diff)
     print("\n" + "=" * 60)
+    return 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
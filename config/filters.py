@@ -1,116 +1,256 @@
 """
 Centralized filter configuration for the venue enrichment pipeline.
+
+The exclusion lists live in a versioned JSON or YAML file (FILTER_CONFIG,
+default config/filters.json). Each distinct content is compiled once and
+cached on disk by its hash, and a changed file is picked up by running
+processes within FILTER_RELOAD_SECONDS, without a restart.
 """
 
-# Business names to exclude (case-insensitive)
-EXCLUDED_BUSINESS_NAMES = [
-    "mcdonald's", "mcdonalds", "burger king", "kfc", 
-    "subway", "starbucks", "costa coffee", "costa",
-    "pret a manger", "pret", "five guys", "taco bell",
-    "nandos", "nando's", "popeyes", "wendy's", "wendys",
-    "greggs", "pizza hut", "dominos", "domino's", 
-    "papa johns", "papa john's", "john lewis"
-]
-
-# Keywords that indicate non-alcohol venues
-EXCLUDED_KEYWORDS = [
-    "coffee", "cafe", "tea", "bakery", "sandwich"
-]
-
-# Domains to exclude (government, educational, etc.)
-EXCLUDED_DOMAINS = [
-    ".gov", ".gov.uk", ".nhs.uk", ".ac.uk", ".edu",
-    ".police.uk", ".mod.uk", ".parliament.uk"
-]
-
-# Property listing and aggregator domains
-PROPERTY_LISTING_DOMAINS = [
-    "zoopla.co.uk", "rightmove.co.uk", "onthemarket.com",
-    "primelocation.com", "purplebricks.co.uk", "foxtons.co.uk",
-    "knight-frank.co.uk", "savills.co.uk", "hamptons.co.uk",
-    "spareroom.co.uk", "openrent.com"
-]
-
-# Business directory and aggregator sites
-BUSINESS_DIRECTORIES = [
-    "yell.com", "yelp.com", "yelp.co.uk", "tripadvisor.com",
-    "tripadvisor.co.uk", "scoot.co.uk", "192.com",
-    "thomsonlocal.com", "opentable.com", "opentable.co.uk",
-    "bookatable.com", "bookatable.co.uk", "timeout.com",
-    "designmynight.com", "hardens.com", "allinlondon.co.uk",
-    "squaremeal.co.uk", "londontown.com", "visitlondon.com"
-]
-
-# Social media domains (for filtering when needed)
-SOCIAL_MEDIA_DOMAINS = [
-    "facebook.com", "instagram.com", "twitter.com", "x.com",
-    "linkedin.com", "tiktok.com", "youtube.com", "pinterest.com"
-]
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config.filter_engine import FilterDecision, FilterEngine
+
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+
+FILTER_CONFIG = os.getenv("FILTER_CONFIG", str(Path(__file__).with_name("filters.json")))
+
+# Lists a filter file may hold
+LIST_KEYS = (
+    "business_names",            # chains to exclude (case-insensitive substring)
+    "keywords",                  # words that indicate non-alcohol venues
+    "excluded_domains",          # government, educational, etc. (hostname suffix)
+    "property_listing_domains",  # property listing and aggregator sites
+    "business_directories",      # business directory and aggregator sites
+    "social_media_domains",      # social media (for filtering when needed)
+)
+
+# Bumped when the compiled form changes, invalidating cached compilations
+COMPILED_FORMAT = 1
+
+
+class FilterConfig:
+    """One loaded filter file: its lists, label and content version."""
+
+    def __init__(self, lists: Dict[str, List[str]], label: str = '', path: str = ''):
+        self.lists = {key: list(lists.get(key, [])) for key in LIST_KEYS}
+        self.label = label
+        self.path = path
+        # Hash of the lists alone: relabelling a file doesn't recompile it
+        canonical = json.dumps(self.lists, sort_keys=True, ensure_ascii=False)
+        self.content_hash = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+        self.version = f"{label}+{self.content_hash[:8]}" if label else self.content_hash[:12]
+
+
+def load_filter_config(path: str = FILTER_CONFIG) -> FilterConfig:
+    """Read and validate a filter file (.json, or .yaml/.yml with PyYAML)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            if not YAML_AVAILABLE:
+                raise RuntimeError(f"{path} is YAML but PyYAML is not installed")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected a mapping of list name to entries")
+    unknown = set(data) - set(LIST_KEYS) - {'version'}
+    if unknown:
+        raise ValueError(f"{path}: unknown keys {', '.join(sorted(unknown))}")
+    for key in LIST_KEYS:
+        entries = data.get(key, [])
+        if not isinstance(entries, list) or not all(isinstance(e, str) for e in entries):
+            raise ValueError(f"{path}: '{key}' must be a list of strings")
+    return FilterConfig(data, label=str(data.get('version', '')), path=path)
+
+
+class FilterRegistry:
+    """
+    The current filter config and its compiled engine, shared by every
+    consumer in the process.
+
+    Compiled matchers are cached on disk under `cache_dir` by content hash,
+    so a process only compiles lists it has never seen. `get_engine` checks
+    the file at most every `reload_seconds` and swaps in a new engine if it
+    changed; a file that fails to load leaves the current engine in place.
+    """
+
+    def __init__(self, path: str = FILTER_CONFIG, cache_dir: str = "cache/filters",
+                 reload_seconds: float = 5.0, cache_size: int = 65536):
+        self.path = path
+        self.cache_dir = Path(cache_dir)
+        self.reload_seconds = reload_seconds
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._file_version = None
+        self._checked = 0.0
+        self.config: Optional[FilterConfig] = None
+        self.engine: Optional[FilterEngine] = None
+        self.loaded_at = ''
+        self.stats = {"reloads": 0, "compiled": 0, "cache_hits": 0, "errors": 0}
+        self.last_error = ''
+        self.reload(force=True)
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _compiled_path(self, content_hash: str) -> Path:
+        return self.cache_dir / f"{content_hash}.json"
+
+    def _load_compiled(self, content_hash: str) -> Optional[Dict]:
+        """Load a cached compilation from disk"""
+        path = self._compiled_path(content_hash)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if data.get("format") == COMPILED_FORMAT and data.get("hash") == content_hash:
+                return data["compiled"]
+        except Exception as e:
+            print(f"Error loading compiled filters: {e}")
+        return None
+
+    def _save_compiled(self, content_hash: str, compiled: Dict):
+        """Save a compilation to disk"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._compiled_path(content_hash)
+            tmp = path.with_name(path.name + '.tmp')
+            with open(tmp, 'w') as f:
+                json.dump({"format": COMPILED_FORMAT, "hash": content_hash, "compiled": compiled,
+                           "updated": datetime.now().isoformat()}, f)
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"Error saving compiled filters: {e}")
+
+    def _build(self, config: FilterConfig) -> FilterEngine:
+        compiled = self._load_compiled(config.content_hash)
+        if compiled is not None:
+            self.stats["cache_hits"] += 1
+            return FilterEngine(config.lists, config.version, self.cache_size, compiled=compiled)
+        engine = FilterEngine(config.lists, config.version, self.cache_size)
+        self.stats["compiled"] += 1
+        self._save_compiled(config.content_hash, engine.compiled())
+        return engine
+
+    def reload(self, force: bool = False) -> bool:
+        """Load the file if it changed (or always with `force`); True if the engine was replaced."""
+        with self._lock:
+            self._checked = time.monotonic()
+            version = self._stat()
+            if not force and version == self._file_version:
+                return False
+            try:
+                config = load_filter_config(self.path)
+            except Exception as e:
+                if self.engine is None:
+                    raise
+                self.stats["errors"] += 1
+                self.last_error = str(e)
+                print(f"Error reloading filters from {self.path}, keeping {self.config.version}: {e}")
+                # Don't retry the same broken file on every call
+                self._file_version = version
+                return False
+            self._file_version = version
+            if self.config is not None and config.version == self.config.version:
+                return False
+            previous = self.config.version if self.config else None
+            self.engine = self._build(config)
+            self.config = config
+            self.loaded_at = datetime.now().isoformat()
+            self.last_error = ''
+            if previous:
+                self.stats["reloads"] += 1
+                print(f"Filters reloaded: {previous} -> {config.version}")
+            return True
+
+    def get_engine(self) -> FilterEngine:
+        if time.monotonic() - self._checked >= self.reload_seconds:
+            self.reload()
+        return self.engine
+
+    def get_stats(self) -> Dict:
+        """Get registry statistics"""
+        config = self.config
+        return {
+            "version": config.version,
+            "label": config.label,
+            "content_hash": config.content_hash,
+            "path": self.path,
+            "loaded_at": self.loaded_at,
+            "lists": {key: len(values) for key, values in config.lists.items()},
+            "last_error": self.last_error,
+            **self.stats,
+            "memo": self.engine.get_stats(),
+        }
+
+
+REGISTRY = FilterRegistry(
+    FILTER_CONFIG,
+    reload_seconds=float(os.getenv("FILTER_RELOAD_SECONDS", "5")),
+    cache_size=int(os.getenv("FILTER_CACHE_SIZE", "65536")),
+)
+
+
+def get_engine() -> FilterEngine:
+    """The engine for the current filter file, reloaded if it changed."""
+    return REGISTRY.get_engine()
+
+
+def filter_version() -> str:
+    return get_engine().version
+
+
+def check_name(name: str) -> FilterDecision:
+    """Decision and reason for a business name in one pass."""
+    return get_engine().check_name(name)
+
+
+def check_url(url: str) -> FilterDecision:
+    """Decision and reason for a URL/domain in one pass."""
+    return get_engine().check_url(url)
 
 
 def should_exclude_business_name(name: str) -> bool:
     """Check if a business name should be excluded."""
-    if not name:
-        return True
-        
-    name_lower = name.lower().strip()
-    
-    # Check exact matches for excluded chains
-    for excluded in EXCLUDED_BUSINESS_NAMES:
-        if excluded in name_lower:
-            return True
-    
-    # Check for excluded keywords
-    for keyword in EXCLUDED_KEYWORDS:
-        if keyword in name_lower:
-            return True
-    
-    return False
+    return get_engine().check_name(name).excluded
 
 
 def should_exclude_domain(url: str) -> bool:
     """Check if a URL/domain should be excluded."""
-    if not url:
-        return True
-        
-    url_lower = url.lower().strip()
-    
-    # Check government/educational domains
-    for domain in EXCLUDED_DOMAINS:
-        if domain in url_lower:
-            return True
-    
-    # Check property listing sites
-    for domain in PROPERTY_LISTING_DOMAINS:
-        if domain in url_lower:
-            return True
-    
-    # Check business directories
-    for domain in BUSINESS_DIRECTORIES:
-        if domain in url_lower:
-            return True
-    
-    return False
+    return get_engine().check_url(url).excluded
 
 
 def get_filter_reason(name: str = None, url: str = None) -> str:
     """Get a human-readable reason for why something was filtered."""
+    engine = get_engine()
     reasons = []
-    
-    if name and should_exclude_business_name(name):
-        name_lower = name.lower()
-        if any(chain in name_lower for chain in EXCLUDED_BUSINESS_NAMES):
-            reasons.append("Excluded chain/franchise")
-        elif any(kw in name_lower for kw in EXCLUDED_KEYWORDS):
-            reasons.append("Non-alcohol venue (coffee/cafe/tea)")
-    
-    if url and should_exclude_domain(url):
-        url_lower = url.lower()
-        if any(d in url_lower for d in EXCLUDED_DOMAINS):
-            reasons.append("Government/educational domain")
-        elif any(d in url_lower for d in PROPERTY_LISTING_DOMAINS):
-            reasons.append("Property listing site")
-        elif any(d in url_lower for d in BUSINESS_DIRECTORIES):
-            reasons.append("Business directory/aggregator")
-    
-    return " | ".join(reasons) if reasons else "Unknown reason"
\ No newline at end of file
+
+    if name:
+        decision = engine.check_name(name)
+        if decision.excluded:
+            reasons.append(decision.reason)
+
+    if url:
+        decision = engine.check_url(url)
+        if decision.excluded:
+            reasons.append(decision.reason)
+
+    return " | ".join(reasons) if reasons else "Unknown reason"
@@ -2,6 +2,7 @@
 
 import csv
 import os
+import sys
 import time
 from pathlib import Path
 from typing import List, Dict, Optional
@@ -9,8 +10,10 @@ from typing import List, Dict, Optional
 import requests
 from dotenv import load_dotenv
 
-from config.filters import should_exclude_business_name, get_filter_reason
+from config.filters import get_engine
+from utils.budget_scheduler import BudgetScheduler, type_value
 from utils.filtering import FilterStatistics
+from utils.pipeline import STAGE_FILES
 
 # Load environment variables from .env file
 load_dotenv()
@@ -24,7 +27,8 @@ API_KEY_ENV = "GOOGLE_API_KEY"
 CX_ENV = "GOOGLE_CX"
 
 
-CSV_PATH = Path("essex_licensed_venues.csv")
+CSV_PATH = Path(STAGE_FILES['google'].input_file)
+OUTPUT_PATH = Path(STAGE_FILES['google'].output_file)
 
 
 def search_business_url(name: str, postcode: str, *, api_key: str, cx: str) -> Optional[str]:
@@ -49,7 +53,7 @@ def search_business_url(name: str, postcode: str, *, api_key: str, cx: str) -> O
 
 
 
-def enrich_rows_with_google(rows: List[Dict[str, str]], api_key: str, cx: str, max_requests: int = 1000, delay_seconds: float = 0.5, filter_stats: FilterStatistics = None) -> None:
+def enrich_rows_with_google(rows: List[Dict[str, str]], api_key: str, cx: str, max_requests: int = 1000, delay_seconds: float = 0.5, filter_stats: FilterStatistics = None, scheduler: BudgetScheduler = None, progress=None, refresh_all: bool = False, on_row=None) -> None:
     """Update rows in-place with website URLs using Google search.
     
     Args:
@@ -59,30 +63,52 @@ def enrich_rows_with_google(rows: List[Dict[str, str]], api_key: str, cx: str, m
         max_requests: Maximum number of API requests to make (default: 1000)
         delay_seconds: Delay between requests in seconds (default: 0.5)
         filter_stats: FilterStatistics object for tracking filters (optional)
+        scheduler: BudgetScheduler to spend max_requests on the highest-yield
+            rows first instead of in file order (optional)
+        progress: Callback progress(done, total, message) after each request (optional)
+        refresh_all: Also search rows that already have a website (default: False)
+        on_row: Callback on_row(index, row) as soon as a row's website is final,
+            so a downstream stage can start on it (optional)
     """
     requests_made = 0
     
     # Apply business name filters at the start
+    candidates = [(idx, row) for idx, row in enumerate(rows)
+                  if (refresh_all or not row.get("website")) and row.get("name") and row.get("postcode")]
+    decisions = get_engine().check_names(row.get("name", "") for _, row in candidates)
     rows_needing_enrichment = []
-    for idx, row in enumerate(rows):
-        if not row.get("website") and row.get("name") and row.get("postcode"):
-            if should_exclude_business_name(row.get("name", "")):
-                if filter_stats:
-                    filter_stats.log_filter(
-                        row.get("name", ""),
-                        get_filter_reason(name=row.get("name", "")),
-                        'business_name'
-                    )
-            else:
-                rows_needing_enrichment.append((idx, row))
+    for (idx, row), decision in zip(candidates, decisions):
+        if decision.excluded:
+            if filter_stats:
+                filter_stats.log_filter(row.get("name", ""), decision.reason, decision.filter_type, decision.version)
+        else:
+            rows_needing_enrichment.append((idx, row))
     
     total_to_enrich = len(rows_needing_enrichment)
     print(f"Found {total_to_enrich} rows needing website enrichment after filtering")
     
-    if total_to_enrich > max_requests:
+    if scheduler:
+        by_idx = dict(rows_needing_enrichment)
+        planned = scheduler.plan(
+            [(idx, f"type:{row.get('business_type', '').strip().lower()}",
+              type_value(row.get('business_type', ''), scheduler.type_values))
+             for idx, row in rows_needing_enrichment],
+            max_requests
+        )
+        rows_needing_enrichment = [(idx, by_idx[idx]) for idx in planned]
+        if total_to_enrich > max_requests:
+            print(f"WARNING: Only processing the {max_requests} highest-yield rows to avoid excessive API usage")
+    elif total_to_enrich > max_requests:
         print(f"WARNING: Only processing first {max_requests} rows to avoid excessive API usage")
         rows_needing_enrichment = rows_needing_enrichment[:max_requests]
     
+    # Rows that won't be searched are final now
+    if on_row:
+        searched = {idx for idx, _ in rows_needing_enrichment}
+        for idx, row in enumerate(rows):
+            if idx not in searched:
+                on_row(idx, row)
+    
     for i, (idx, row) in enumerate(rows_needing_enrichment):
         print(f"Processing {i+1}/{min(total_to_enrich, max_requests)}: {row['name']} ({row['postcode']})")
         
@@ -93,6 +119,13 @@ def enrich_rows_with_google(rows: List[Dict[str, str]], api_key: str, cx: str, m
         else:
             print(f"  No website found")
         
+        if scheduler:
+            scheduler.record(idx, bool(url))
+        if on_row:
+            on_row(idx, row)
+        if progress:
+            progress(i + 1, len(rows_needing_enrichment), f"Google search {i + 1}/{len(rows_needing_enrichment)}")
+        
         requests_made += 1
         
         # Rate limiting - Google Custom Search API allows 100 queries per day for free tier
@@ -120,73 +153,101 @@ def enrich_csv_file(path: Path = CSV_PATH, api_key: Optional[str] = None, cx: Op
         w.writerows(rows)
 
 
+def main(progress=None, refresh_all: bool = False, stream=None) -> int:
+    """
+    Enrich CSV_PATH with Google results into OUTPUT_PATH; returns rows with websites.
+    
+    With a RowStream, each row is also handed downstream as soon as its
+    website is final, before the output file is written.
+    """
+    api_key = os.getenv(API_KEY_ENV)
+    cx = os.getenv(CX_ENV)
+    
+    # Debug output
+    print(f"API Key loaded: {'Yes' if api_key else 'No'}")
+    print(f"CX (Search Engine ID) loaded: {'Yes' if cx else 'No'}")
+    
+    if not api_key:
+        print(f"\nError: {API_KEY_ENV} not found in environment variables.")
+        print("Please add it to your .env file as: GOOGLE_API_KEY=your_api_key_here")
+    
+    if not cx:
+        print(f"\nError: {CX_ENV} not found in environment variables.")
+        print("Please add it to your .env file as: GOOGLE_CX=your_search_engine_id_here")
+        print("You can find your Search Engine ID at: https://programmablesearchengine.google.com/")
+    
+    if not api_key or not cx:
+        raise RuntimeError(
+            "Google API credentials missing. Please check the messages above."
+        )
+    
+    # Initialize filter statistics
+    filter_stats = FilterStatistics("google_enricher_filter_log.csv")
+    
+    # Load the original CSV
+    path = CSV_PATH
+    print(f"Loading data from {path}")
+    with path.open(newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+        # The output keeps the input's columns, plus website if it had none
+        fieldnames = list(reader.fieldnames or [])
+    if "website" not in fieldnames:
+        fieldnames.append("website")
+    print(f"Loaded {len(rows)} total rows")
+    if stream:
+        stream.start(fieldnames, len(rows))
+    
+    # Count existing websites
+    existing_websites = sum(1 for row in rows if row.get("website"))
+    print(f"Rows with existing websites: {existing_websites}")
+    
+    # Enrich rows with Google search
+    # Set max_requests to prevent excessive API usage
+    # Google Custom Search API free tier allows 100 queries per day
+    # Setting a reasonable limit with ability to override via environment variable
+    max_requests = int(os.getenv("GOOGLE_MAX_REQUESTS", "2500"))
+    delay_seconds = float(os.getenv("GOOGLE_DELAY_SECONDS", "0.5"))
+    
+    # Rank rows by expected yield so the cap is spent on pubs before restaurants
+    scheduler = BudgetScheduler("google")
+    
+    print(f"\nStarting enrichment (max requests: {max_requests}, delay: {delay_seconds}s)")
+    try:
+        enrich_rows_with_google(rows, api_key, cx, max_requests=max_requests, delay_seconds=delay_seconds,
+                                filter_stats=filter_stats, scheduler=scheduler, progress=progress,
+                                refresh_all=refresh_all,
+                                # The scraper adds its own columns, so it gets a copy of each row
+                                on_row=(lambda idx, row: stream.put(idx, dict(row))) if stream else None)
+    finally:
+        scheduler.save()
+    
+    # Save to new file (no additional filtering needed as it's done upfront)
+    output_path = OUTPUT_PATH
+    print(f"\nSaving enriched data to {output_path}")
+    with output_path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=fieldnames)
+        w.writeheader()
+        w.writerows(rows)
+    
+    # Print filter statistics
+    print("\n" + filter_stats.get_summary())
+    print("\n" + scheduler.get_summary())
+    
+    # Save filter log
+    filter_stats.save_log("google_enricher_filter_log.csv")
+    print(f"\nFilter log saved to: google_enricher_filter_log.csv")
+    
+    # Final statistics
+    final_websites = sum(1 for row in rows if row.get("website"))
+    print(f"\nEnrichment complete!")
+    print(f"Total rows: {len(rows)}")
+    print(f"Final rows with websites: {final_websites}")
+    return final_websites
+
+
 if __name__ == "__main__":
     try:
-        api_key = os.getenv(API_KEY_ENV)
-        cx = os.getenv(CX_ENV)
-        
-        # Debug output
-        print(f"API Key loaded: {'Yes' if api_key else 'No'}")
-        print(f"CX (Search Engine ID) loaded: {'Yes' if cx else 'No'}")
-        
-        if not api_key:
-            print(f"\nError: {API_KEY_ENV} not found in environment variables.")
-            print("Please add it to your .env file as: GOOGLE_API_KEY=your_api_key_here")
-        
-        if not cx:
-            print(f"\nError: {CX_ENV} not found in environment variables.")
-            print("Please add it to your .env file as: GOOGLE_CX=your_search_engine_id_here")
-            print("You can find your Search Engine ID at: https://programmablesearchengine.google.com/")
-        
-        if not api_key or not cx:
-            raise RuntimeError(
-                "Google API credentials missing. Please check the messages above."
-            )
-        
-        # Initialize filter statistics
-        filter_stats = FilterStatistics()
-        
-        # Load the original CSV
-        path = CSV_PATH
-        print(f"Loading data from {path}")
-        with path.open(newline="", encoding="utf-8") as f:
-            rows = list(csv.DictReader(f))
-        print(f"Loaded {len(rows)} total rows")
-        
-        # Count existing websites
-        existing_websites = sum(1 for row in rows if row.get("website"))
-        print(f"Rows with existing websites: {existing_websites}")
-        
-        # Enrich rows with Google search
-        # Set max_requests to prevent excessive API usage
-        # Google Custom Search API free tier allows 100 queries per day
-        # Setting a reasonable limit with ability to override via environment variable
-        max_requests = int(os.getenv("GOOGLE_MAX_REQUESTS", "2500"))
-        delay_seconds = float(os.getenv("GOOGLE_DELAY_SECONDS", "0.5"))
-        
-        print(f"\nStarting enrichment (max requests: {max_requests}, delay: {delay_seconds}s)")
-        enrich_rows_with_google(rows, api_key, cx, max_requests=max_requests, delay_seconds=delay_seconds, filter_stats=filter_stats)
-        
-        # Save to new file (no additional filtering needed as it's done upfront)
-        output_path = Path("essex_venues_google.csv")
-        print(f"\nSaving enriched data to {output_path}")
-        with output_path.open("w", newline="", encoding="utf-8") as f:
-            w = csv.DictWriter(f, fieldnames=rows[0].keys())
-            w.writeheader()
-            w.writerows(rows)
-        
-        # Print filter statistics
-        print("\n" + filter_stats.get_summary())
-        
-        # Save filter log
-        filter_stats.save_log("google_enricher_filter_log.csv")
-        print(f"\nFilter log saved to: google_enricher_filter_log.csv")
-        
-        # Final statistics
-        final_websites = sum(1 for row in rows if row.get("website"))
-        print(f"\nEnrichment complete!")
-        print(f"Total rows: {len(rows)}")
-        print(f"Final rows with websites: {final_websites}")
-        
+        main(refresh_all="--refresh-all" in sys.argv)
     except Exception as exc:
         print(f"Error: {exc}")
@@ -1,14 +1,23 @@
 #!/usr/bin/env python3
 import os
-import time
 import csv
 import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 import requests
 from dotenv import load_dotenv
 
+from config.filters import check_url
+from utils.budget_scheduler import BudgetScheduler, domain_pattern, type_value
+from utils.email_prescreen import EmailPrescreen, MailDomainResolver
+from utils.hunter_cache import HunterCache
+from utils.pipeline import STAGE_FILES
+from utils.rate_limiter import RateLimiter
+from utils.url_resolver import URLResolver
+
 load_dotenv()
 
 logging.basicConfig(
@@ -21,11 +30,34 @@ logger = logging.getLogger(__name__)
 class HunterClient:
     BASE_URL = "https://api.hunter.io/v2"
     
-    def __init__(self, api_key: str):
+    # Hunter's published limits: domain search 15 req/s and 500 req/min,
+    # email verifier 10 req/s and 300 req/min
+    SEARCH_LIMITS = [(15, 1), (500, 60)]
+    VERIFY_LIMITS = [(10, 1), (300, 60)]
+    
+    def __init__(self, api_key: str, cache: Optional[HunterCache] = None):
         self.api_key = api_key
+        self.cache = cache
         self.session = requests.Session()
         self.credits_used = 0
-        self.rate_limit_delay = float(os.getenv('HUNTER_DELAY_SECONDS', '1.0'))
+        self._credits_lock = threading.Lock()
+        
+        # Shared by every worker thread so concurrency never exceeds the limits.
+        # Per-minute caps can be lowered for plans below the published limits.
+        search_per_minute = int(os.getenv('HUNTER_SEARCHES_PER_MINUTE', self.SEARCH_LIMITS[1][0]))
+        verify_per_minute = int(os.getenv('HUNTER_VERIFICATIONS_PER_MINUTE', self.VERIFY_LIMITS[1][0]))
+        self.search_limiter = RateLimiter([self.SEARCH_LIMITS[0], (search_per_minute, 60)])
+        self.verify_limiter = RateLimiter([self.VERIFY_LIMITS[0], (verify_per_minute, 60)])
+    
+    def _count_credit(self):
+        with self._credits_lock:
+            self.credits_used += 1
+    
+    def is_cached_search(self, domain: str, limit: int = 10) -> bool:
+        return bool(self.cache) and self.cache.has_search(domain, limit)
+    
+    def is_cached_verification(self, email: str) -> bool:
+        return bool(self.cache) and self.cache.has_verification(email)
         
     def search_domain(self, domain: str, limit: int = 10) -> Dict:
         endpoint = f"{self.BASE_URL}/domain-search"
@@ -35,14 +67,21 @@ class HunterClient:
             'limit': limit
         }
         
+        if self.cache:
+            cached = self.cache.get_search(domain, limit)
+            if cached is not None:
+                return cached
+        
         try:
-            time.sleep(self.rate_limit_delay)
+            self.search_limiter.acquire()
             response = self.session.get(endpoint, params=params, timeout=30)
             response.raise_for_status()
             result = response.json()
             
             if 'data' in result:
-                self.credits_used += 1
+                self._count_credit()
+                if self.cache:
+                    self.cache.set_search(domain, limit, result['data'])
                 return result['data']
             return {}
             
@@ -57,14 +96,21 @@ class HunterClient:
             'api_key': self.api_key
         }
         
+        if self.cache:
+            cached = self.cache.get_verification(email)
+            if cached is not None:
+                return cached
+        
         try:
-            time.sleep(self.rate_limit_delay)
+            self.verify_limiter.acquire()
             response = self.session.get(endpoint, params=params, timeout=30)
             response.raise_for_status()
             result = response.json()
             
             if 'data' in result:
-                self.credits_used += 1
+                self._count_credit()
+                if self.cache:
+                    self.cache.set_verification(email, result['data'])
                 return result['data']
             return {}
             
@@ -87,11 +133,17 @@ class HunterClient:
 
 
 class EmailEnricher:
-    def __init__(self, hunter_client: HunterClient):
+    def __init__(self, hunter_client: HunterClient, resolver: Optional[URLResolver] = None,
+                 prescreen: Optional[EmailPrescreen] = None,
+                 scheduler: Optional[BudgetScheduler] = None):
         self.hunter = hunter_client
+        self.resolver = resolver
+        self.prescreen = prescreen
+        self.scheduler = scheduler
         self.max_verifications = int(os.getenv('HUNTER_MAX_VERIFICATIONS', '1000'))
         self.max_searches = int(os.getenv('HUNTER_MAX_SEARCHES', '500'))
         self.confidence_threshold = int(os.getenv('HUNTER_CONFIDENCE_THRESHOLD', '70'))
+        self.concurrency = max(1, int(os.getenv('HUNTER_CONCURRENCY', '5')))
         self.save_every_n = int(os.getenv('HUNTER_SAVE_EVERY_N', '50'))
         
         self.stats = {
@@ -100,12 +152,31 @@ class EmailEnricher:
             'invalid_emails': 0,
             'searches_performed': 0,
             'verifications_performed': 0,
+            'searches_coalesced': 0,
+            'verifications_coalesced': 0,
+            'prescreen_rejected': 0,
+            'redirects_filtered': 0,
             'credits_used': 0
         }
     
     def extract_domain(self, website: str) -> Optional[str]:
         if not website:
             return None
+        
+        # Query the domain the site actually ends up on, not a stale alias.
+        # process_batch resolves every website up front, so this is a cache hit there.
+        if self.resolver:
+            resolution = self.resolver.resolve(website)
+            if resolution.get('status') == 'redirected':
+                # A site that now forwards to a directory or listing page has no
+                # domain of its own worth a search
+                decision = check_url(resolution['final_url'])
+                if decision.excluded:
+                    logger.info(f"{website} redirects to {resolution['final_url']} ({decision.reason}), skipping")
+                    self.stats['redirects_filtered'] += 1
+                    return None
+            if resolution.get('status') in ('ok', 'redirected') and resolution.get('domain'):
+                return resolution['domain']
             
         if not website.startswith(('http://', 'https://')):
             website = f'http://{website}'
@@ -131,14 +202,20 @@ class EmailEnricher:
         if not domain:
             return None
             
-        if self.stats['searches_performed'] >= self.max_searches:
+        # Cached answers cost nothing, so they don't count against the limit
+        cached = self.hunter.is_cached_search(domain, limit=5)
+        if not cached and self.stats['searches_performed'] >= self.max_searches:
             logger.warning("Reached maximum search limit")
             return None
             
         logger.info(f"Searching for emails at domain: {domain}")
         search_result = self.hunter.search_domain(domain, limit=5)
-        self.stats['searches_performed'] += 1
+        if not cached:
+            self.stats['searches_performed'] += 1
         
+        return self.interpret_search(search_result)
+    
+    def interpret_search(self, search_result: Dict) -> Optional[str]:
         if not search_result or 'emails' not in search_result:
             return None
             
@@ -185,15 +262,33 @@ class EmailEnricher:
     def verify_email_address(self, email: str) -> Tuple[bool, str]:
         if not email or '@' not in email:
             return False, 'invalid'
+        
+        if self.prescreen and self.reject_locally(email):
+            return False, 'invalid'
             
-        if self.stats['verifications_performed'] >= self.max_verifications:
+        cached = self.hunter.is_cached_verification(email)
+        if not cached and self.stats['verifications_performed'] >= self.max_verifications:
             logger.warning("Reached maximum verification limit")
             return True, 'unverified'
             
         logger.info(f"Verifying email: {email}")
         result = self.hunter.verify_email(email)
-        self.stats['verifications_performed'] += 1
+        if not cached:
+            self.stats['verifications_performed'] += 1
         
+        return self.interpret_verification(result)
+    
+    def reject_locally(self, email: str) -> bool:
+        """Settle clearly undeliverable addresses without a paid verification."""
+        passed, reason = self.prescreen.check(email)
+        if passed:
+            return False
+        logger.info(f"Pre-screen rejected {email}: {reason}")
+        self.stats['prescreen_rejected'] += 1
+        self.stats['invalid_emails'] += 1
+        return True
+    
+    def interpret_verification(self, result: Dict) -> Tuple[bool, str]:
         if not result:
             return True, 'unverified'
             
@@ -210,11 +305,26 @@ class EmailEnricher:
             return True, 'risky'
     
     def enrich_venue(self, venue: Dict) -> Dict:
+        current_email = self.current_email(venue)
+        
+        verification = self.verify_email_address(current_email) if current_email else None
+        if verification and verification[0]:
+            return self.apply_results(venue, verification, None)
+        
+        return self.apply_results(venue, verification, self.find_email_for_venue(venue))
+    
+    @staticmethod
+    def current_email(venue: Dict) -> str:
+        """The venue's existing email: its own column, else the one the scraper found."""
+        return (venue.get('email') or venue.get('email_found') or '').strip()
+    
+    def apply_results(self, venue: Dict, verification: Optional[Tuple[bool, str]],
+                      found_email: Optional[str]) -> Dict:
         enriched = venue.copy()
-        current_email = venue.get('email', '').strip()
+        current_email = self.current_email(venue)
         
-        if current_email:
-            is_valid, status = self.verify_email_address(current_email)
+        if current_email and verification:
+            is_valid, status = verification
             enriched['email_status'] = status
             
             if not is_valid:
@@ -222,33 +332,170 @@ class EmailEnricher:
                 enriched['email'] = ''
                 enriched['old_email'] = current_email
                 current_email = ''
+            elif not venue.get('email'):
+                # Promote the scraped address to the verified email column
+                enriched['email'] = current_email
+                enriched['email_source'] = 'scraper'
         
-        if not current_email:
-            found_email = self.find_email_for_venue(venue)
-            if found_email:
-                enriched['email'] = found_email
-                enriched['email_source'] = 'hunter'
-                enriched['email_status'] = 'new'
+        if not current_email and found_email:
+            enriched['email'] = found_email
+            enriched['email_source'] = 'hunter'
+            enriched['email_status'] = 'new'
         
         return enriched
     
-    def process_batch(self, venues: List[Dict], output_file: str = None) -> List[Dict]:
-        enriched_venues = []
+    def _run_concurrently(self, fn, items: List[str], progress=None, label: str = '',
+                          checkpoint=None) -> Dict[str, Dict]:
+        """
+        Run `fn` over `items` on the worker pool; returns {item: result}.
+        `checkpoint(results)` is called after every `save_every_n` results.
+        """
+        if not items:
+            return {}
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [executor.submit(fn, item) for item in items]
+            try:
+                for item, future in zip(items, futures):
+                    results[item] = future.result()
+                    if progress:
+                        progress(len(results), len(items), f"{label} {len(results)}/{len(items)}")
+                    if checkpoint and self.save_every_n > 0 and len(results) % self.save_every_n == 0 \
+                            and len(results) < len(items):
+                        checkpoint(results)
+            except BaseException:
+                # Cancelled: don't spend credits on lookups that haven't started
+                for future in futures:
+                    future.cancel()
+                raise
+        return results
+    
+    def process_batch(self, venues: List[Dict], output_file: str = None, progress=None) -> List[Dict]:
+        """
+        Enrich all venues with one Hunter call per unique email and domain.
         
+        Lookups are deduplicated up front, issued concurrently through the
+        client's shared rate limiters, and the results fanned back out to
+        every venue that shares them. `progress(done, total, message)` is
+        called as lookups complete.
+        """
         account_info = self.hunter.get_account_info()
         if account_info:
             available_credits = account_info.get('requests', {}).get('available', 0)
             logger.info(f"Hunter API credits available: {available_credits}")
         
-        for i, venue in enumerate(venues, 1):
-            logger.info(f"Processing venue {i}/{len(venues)}: {venue.get('name', 'Unknown')}")
-            
-            enriched = self.enrich_venue(venue)
-            enriched_venues.append(enriched)
-            
-            if output_file and i % self.save_every_n == 0:
-                self.save_progress(enriched_venues, output_file)
-                logger.info(f"Progress saved after {i} venues")
+        # Verify each distinct existing email once
+        emails = {}
+        for venue in venues:
+            email = self.current_email(venue)
+            if email:
+                emails.setdefault(email.lower(), email)
+        
+        candidates = [e for e in emails.values() if '@' in e]
+        
+        # Pre-screen locally (DNS lookups run concurrently) so only plausible
+        # addresses reach the paid verifier
+        rejected = set()
+        if self.prescreen:
+            screened = self._run_concurrently(self.prescreen.check, candidates, progress, "Pre-screening emails")
+            for email, (passed, reason) in screened.items():
+                if not passed:
+                    logger.info(f"Pre-screen rejected {email}: {reason}")
+                    rejected.add(email)
+            self.stats['prescreen_rejected'] += len(rejected)
+            self.stats['invalid_emails'] += len(rejected)
+            candidates = [e for e in candidates if e not in rejected]
+        
+        # Cached answers are free; only uncached lookups count against the limit
+        cached = [e for e in candidates if self.hunter.is_cached_verification(e)]
+        uncached = [e for e in candidates if e not in set(cached)]
+        budget = max(0, self.max_verifications - self.stats['verifications_performed'])
+        if len(uncached) > budget:
+            logger.warning("Reached maximum verification limit")
+            uncached = uncached[:budget]
+        to_verify = cached + uncached
+        
+        logger.info(f"Verifying {len(to_verify)} unique emails across {len(venues)} venues "
+                    f"({len(cached)} cached)")
+        verify_results = self._run_concurrently(self.hunter.verify_email, to_verify, progress, "Verifying emails")
+        self.stats['verifications_performed'] += len(uncached)
+        
+        verifications = {}
+        for key, email in emails.items():
+            if '@' not in email or email in rejected:
+                verifications[key] = (False, 'invalid')
+            elif email in verify_results:
+                verifications[key] = self.interpret_verification(verify_results[email])
+            else:
+                verifications[key] = (True, 'unverified')
+        
+        # Search each distinct domain once for venues still without a usable email
+        needs_search = {}
+        for i, venue in enumerate(venues):
+            email = self.current_email(venue)
+            if email and verifications[email.lower()][0]:
+                continue
+            website = venue.get('website', '').strip()
+            if website:
+                needs_search[i] = website
+        if self.resolver:
+            # Follow redirects for every website concurrently rather than one
+            # blocking HEAD per venue
+            self.resolver.resolve_many(needs_search.values(), max_workers=self.concurrency)
+        venue_domains = {}
+        for i, website in needs_search.items():
+            domain = self.extract_domain(website)
+            if domain:
+                venue_domains[i] = domain
+        
+        candidates = list(dict.fromkeys(venue_domains.values()))
+        cached = [d for d in candidates if self.hunter.is_cached_search(d, limit=5)]
+        uncached = [d for d in candidates if d not in set(cached)]
+        budget = max(0, self.max_searches - self.stats['searches_performed'])
+        if self.scheduler:
+            # Spend the search budget on the domains with the best expected
+            # yield; a domain's value is the sum over the venues sharing it
+            domain_values = {}
+            for i, domain in venue_domains.items():
+                value = type_value(venues[i].get('business_type', ''), self.scheduler.type_values)
+                domain_values[domain] = domain_values.get(domain, 0) + value
+            planned = self.scheduler.plan(
+                [(d, domain_pattern(d), domain_values[d]) for d in uncached], budget
+            )
+            if len(planned) < len(uncached):
+                logger.warning(f"Search limit reached: skipping {len(uncached) - len(planned)} lower-yield domains")
+            uncached = planned
+        elif len(uncached) > budget:
+            logger.warning("Reached maximum search limit")
+            uncached = uncached[:budget]
+        domains = cached + uncached
+        
+        logger.info(f"Searching {len(domains)} unique domains for {len(venue_domains)} venues "
+                    f"({len(cached)} cached)")
+        
+        def save_searched(results):
+            # Keep what the searches so far have paid for if the run dies
+            self.save_progress(self.fan_out(venues, verifications, venue_domains, results), output_file)
+        
+        search_results = self._run_concurrently(lambda d: self.hunter.search_domain(d, limit=5), domains,
+                                                progress, "Searching domains",
+                                                checkpoint=save_searched if output_file else None)
+        self.stats['searches_performed'] += len(uncached)
+        
+        if self.scheduler:
+            for domain in uncached:
+                emails_found = (search_results.get(domain) or {}).get('emails') or []
+                self.scheduler.record(domain, bool(self.select_best_email(emails_found)))
+        
+        self.stats['verifications_coalesced'] += sum(
+            1 for v in venues
+            if emails.get(self.current_email(v).lower()) in verify_results
+        ) - len(verify_results)
+        self.stats['searches_coalesced'] += sum(
+            1 for d in venue_domains.values() if d in search_results
+        ) - len(search_results)
+        
+        enriched_venues = self.fan_out(venues, verifications, venue_domains, search_results, count=True)
         
         self.stats['credits_used'] = self.hunter.credits_used
         
@@ -257,11 +504,34 @@ class EmailEnricher:
             
         return enriched_venues
     
+    def fan_out(self, venues: List[Dict], verifications: Dict[str, Tuple[bool, str]],
+                venue_domains: Dict[int, str], search_results: Dict[str, Dict],
+                count: bool = False) -> List[Dict]:
+        """
+        Apply verification and search results to every venue, in input order.
+        Venues whose domain hasn't been searched yet keep no Hunter email.
+        Only the final pass (`count`) adds found emails to the stats.
+        """
+        enriched_venues = []
+        for i, venue in enumerate(venues):
+            email = self.current_email(venue)
+            verification = verifications.get(email.lower()) if email else None
+            domain = venue_domains.get(i)
+            found_email = None
+            if domain in search_results:
+                if count:
+                    found_email = self.interpret_search(search_results[domain])
+                else:
+                    found_email = self.select_best_email((search_results[domain] or {}).get('emails') or [])
+            enriched_venues.append(self.apply_results(venue, verification, found_email))
+        return enriched_venues
+    
     def save_progress(self, venues: List[Dict], output_file: str):
         if not venues:
             return
             
-        fieldnames = list(venues[0].keys())
+        # Venues gain different result columns, so take the union in first-seen order
+        fieldnames = list(dict.fromkeys(key for venue in venues for key in venue))
         
         with open(output_file, 'w', newline='', encoding='utf-8') as f:
             writer = csv.DictWriter(f, fieldnames=fieldnames)
@@ -271,6 +541,10 @@ class EmailEnricher:
         logger.info(f"Saved {len(venues)} venues to {output_file}")
     
     def generate_report(self) -> Dict:
+        cache = self.hunter.cache
+        search_hits = cache.stats['search_hits'] if cache else 0
+        verify_hits = cache.stats['verify_hits'] if cache else 0
+        
         report = {
             'summary': self.stats,
             'cost_estimate': {
@@ -278,6 +552,14 @@ class EmailEnricher:
                 'verifications': self.stats['verifications_performed'] * 0.005,
                 'total': (self.stats['searches_performed'] * 0.01) + 
                         (self.stats['verifications_performed'] * 0.005)
+            },
+            'prescreen': self.prescreen.get_stats() if self.prescreen else None,
+            'yield': self.scheduler.get_report() if self.scheduler else None,
+            'cache': {
+                'search_hits': search_hits,
+                'verify_hits': verify_hits,
+                'credits_saved': search_hits + verify_hits,
+                'cost_saved': (search_hits * 0.01) + (verify_hits * 0.005)
             }
         }
         
@@ -286,19 +568,31 @@ class EmailEnricher:
         logger.info(f"  Emails verified: {self.stats['emails_verified']}")
         logger.info(f"  Invalid emails: {self.stats['invalid_emails']}")
         logger.info(f"  API credits used: {self.stats['credits_used']}")
+        logger.info(f"  Lookups shared across venues: "
+                    f"{self.stats['searches_coalesced']} searches, "
+                    f"{self.stats['verifications_coalesced']} verifications")
         logger.info(f"  Estimated cost: ${report['cost_estimate']['total']:.2f}")
+        logger.info(f"  Rejected by local pre-screen: {self.stats['prescreen_rejected']}")
+        logger.info(f"  Redirected to filtered sites: {self.stats['redirects_filtered']}")
+        if self.scheduler:
+            yield_report = report['yield']
+            logger.info(f"  Search yield: {yield_report['actual_hits']} hits "
+                        f"(expected {yield_report['expected_hits']}) from {yield_report['spent']} searches")
+        logger.info(f"  Credits saved by cache: {report['cache']['credits_saved']} "
+                    f"(${report['cache']['cost_saved']:.2f})")
         
         return report
 
 
-def main():
+def main(dry_run: Optional[bool] = None, progress=None) -> Optional[Dict]:
+    """Run Hunter enrichment over the enriched venues CSV; returns the report."""
     api_key = os.getenv('HUNTER_API_KEY')
     if not api_key:
         logger.error("HUNTER_API_KEY not found in environment variables")
         return
     
-    input_file = 'essex_venues_enriched.csv'
-    output_file = 'essex_venues_hunter_enriched.csv'
+    input_file = STAGE_FILES['verify'].input_file
+    output_file = STAGE_FILES['verify'].output_file
     
     if not os.path.exists(input_file):
         logger.error(f"Input file not found: {input_file}")
@@ -311,25 +605,46 @@ def main():
     
     logger.info(f"Loaded {len(venues)} venues from {input_file}")
     
-    hunter_client = HunterClient(api_key)
-    enricher = EmailEnricher(hunter_client)
+    if dry_run is None:
+        dry_run = os.getenv('HUNTER_DRY_RUN', 'false').lower() == 'true'
+    
+    hunter_cache = HunterCache()
+    hunter_client = HunterClient(api_key, hunter_cache)
+    # Resolving redirects means a request per website, so not in a dry run
+    resolver = None if dry_run else URLResolver()
+    
+    # Local syntax/disposable/DNS checks before any paid verification.
+    # HUNTER_PRESCREEN_NAMESERVER ("host[:port]") points lookups at a specific DNS server.
+    mail_resolver = None
+    prescreen = None
+    if os.getenv('HUNTER_PRESCREEN', 'true').lower() == 'true':
+        mail_resolver = MailDomainResolver(nameserver=os.getenv('HUNTER_PRESCREEN_NAMESERVER'))
+        prescreen = EmailPrescreen(mail_resolver)
+    scheduler = BudgetScheduler('hunter')
+    enricher = EmailEnricher(hunter_client, resolver, prescreen, scheduler)
     
-    dry_run = os.getenv('HUNTER_DRY_RUN', 'false').lower() == 'true'
     if dry_run:
         logger.info("DRY RUN MODE - No API calls will be made")
         sample_size = min(10, len(venues))
         logger.info(f"Processing sample of {sample_size} venues")
         venues = venues[:sample_size]
     
-    enriched_venues = enricher.process_batch(venues, output_file)
+    enriched_venues = enricher.process_batch(venues, output_file, progress=progress)
     
     report = enricher.generate_report()
+    if resolver:
+        resolver.finalize()
+    hunter_cache.finalize()
+    scheduler.save()
+    if mail_resolver:
+        mail_resolver.finalize()
     
     with open('hunter_enrichment_report.json', 'w') as f:
         json.dump(report, f, indent=2)
     
     logger.info(f"Enrichment complete. Output saved to {output_file}")
     logger.info(f"Report saved to hunter_enrichment_report.json")
+    return report
 
 
 if __name__ == "__main__":
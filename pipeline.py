@@ -0,0 +1,184 @@
+"""
+Run the enrichment pipeline end to end: seed, Google, scrape and Hunter
+verification, following the dataflow declared in utils.pipeline.
+
+Google results stream straight into the scraper, so contact scraping
+starts on the first venues with websites while Google is still searching.
+
+Usage:
+    python pipeline.py [--from STAGE] [--to STAGE] [--refresh-all] [--dry-run]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import threading
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+from utils.pipeline import STAGES, STAGE_FILES, RowStream, StreamClosed
+
+load_dotenv()
+
+STAGE_NAMES = [stage.name for stage in STAGES]
+
+
+def _stage_progress(progress, name: str, suffix=None):
+    """Prefix a stage's progress messages with its name (plus live upstream status)."""
+    if not progress:
+        return None
+
+    def report(done=0, total=0, message=''):
+        extra = suffix() if suffix else ''
+        progress(done, total, f"[{name}] {message}{extra}" if message else '')
+    return report
+
+
+def run_seed(progress, results: Dict, skip_google: bool):
+    import build_essex
+    rows = build_essex.main(progress=_stage_progress(progress, 'seed'), skip_google=skip_google)
+    results['seed'] = {'status': 'completed', 'rows': rows}
+
+
+def google_configured() -> bool:
+    return bool(os.getenv('GOOGLE_API_KEY') and os.getenv('GOOGLE_CX'))
+
+
+def run_google(progress, results: Dict, refresh_all: bool, stream: Optional[RowStream] = None):
+    import google_website_enricher
+    websites = google_website_enricher.main(progress=progress, refresh_all=refresh_all, stream=stream)
+    results['google'] = {'status': 'completed', 'websites': websites}
+
+
+def pass_through_google(results: Dict):
+    """Without Google credentials the seed rows go on unchanged, so the file chain still lines up."""
+    stage = STAGE_FILES['google']
+    print(f"Google credentials not set; copying {stage.input_file} to {stage.output_file}")
+    shutil.copyfile(stage.input_file, stage.output_file)
+    results['google'] = {'status': 'skipped', 'reason': 'GOOGLE_API_KEY/GOOGLE_CX not set'}
+
+
+def run_google_and_scrape(progress, results: Dict, refresh_all: bool):
+    """
+    Run Google on a worker thread feeding a RowStream and scrape from the
+    stream on this thread. If either side stops, the other follows: a
+    Google failure surfaces in the scraper, and a scraper failure or
+    cancellation closes the stream so Google stops at its next row.
+    """
+    from venue_contact_enricher_unified import enrich_venues
+
+    stream = RowStream()
+    upstream = {'done': 0, 'total': 0}
+
+    def google_progress(done=0, total=0, message=''):
+        if stream.cancelled:
+            raise StreamClosed("Downstream stage stopped")
+        upstream.update(done=done, total=total)
+
+    def produce():
+        try:
+            run_google(google_progress, results, refresh_all, stream)
+        except StreamClosed:
+            results['google'] = {'status': 'stopped'}
+            stream.close()
+        except BaseException as e:
+            results['google'] = {'status': 'failed', 'error': str(e)}
+            stream.close(e)
+        else:
+            stream.close()
+
+    producer = threading.Thread(target=produce, name='pipeline-google', daemon=True)
+    producer.start()
+    try:
+        enrich_venues(
+            progress=_stage_progress(progress, 'scrape',
+                                     lambda: f" (google {upstream['done']}/{upstream['total']})"
+                                     if upstream['total'] else ''),
+            stream=stream,
+        )
+    finally:
+        stream.cancel()
+        producer.join()
+    results['scrape'] = {'status': 'completed'}
+
+
+def run_scrape(progress, results: Dict):
+    from venue_contact_enricher_unified import enrich_venues
+    enrich_venues(progress=_stage_progress(progress, 'scrape'))
+    results['scrape'] = {'status': 'completed'}
+
+
+def run_verify(progress, results: Dict, dry_run: Optional[bool]):
+    import hunter_email_enricher
+    report = hunter_email_enricher.main(dry_run=dry_run, progress=_stage_progress(progress, 'verify'))
+    if report is None:
+        # Hunter is optional: without a key the pipeline ends at the scraper
+        results['verify'] = {'status': 'skipped', 'reason': 'HUNTER_API_KEY not set or no input'}
+    else:
+        results['verify'] = {'status': 'completed', 'report': report}
+
+
+def run_pipeline(progress=None, start: str = 'seed', stop: str = 'verify',
+                 refresh_all: bool = False, dry_run: Optional[bool] = None) -> Dict:
+    """
+    Run the stages from `start` to `stop` inclusive; returns per-stage results.
+
+    `progress(done, total, message)` is passed down to each stage with the
+    stage name prefixed, and is also the cancellation point.
+    """
+    if start not in STAGE_NAMES or stop not in STAGE_NAMES:
+        raise ValueError(f"Unknown stage; choose from {', '.join(STAGE_NAMES)}")
+    selected = STAGE_NAMES[STAGE_NAMES.index(start):STAGE_NAMES.index(stop) + 1]
+    if not selected:
+        raise ValueError(f"Stage {start} comes after {stop}")
+    first = STAGE_FILES[selected[0]]
+    if first.input_file and not os.path.exists(first.input_file):
+        raise FileNotFoundError(f"{first.name} reads {first.input_file}, which does not exist yet")
+
+    print(f"Running pipeline: {' -> '.join(selected)}")
+    results: Dict[str, Dict] = {}
+
+    if 'seed' in selected:
+        # Google runs as its own stage, so don't search twice
+        run_seed(progress, results, skip_google='google' in selected)
+
+    if 'google' in selected and not google_configured():
+        pass_through_google(results)
+        if 'scrape' in selected:
+            run_scrape(progress, results)
+    elif 'google' in selected and 'scrape' in selected and STAGE_FILES['google'].streams_to_next:
+        run_google_and_scrape(progress, results, refresh_all)
+    else:
+        if 'google' in selected:
+            run_google(_stage_progress(progress, 'google'), results, refresh_all)
+        if 'scrape' in selected:
+            run_scrape(progress, results)
+
+    if 'verify' in selected:
+        run_verify(progress, results, dry_run)
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the venue enrichment pipeline")
+    parser.add_argument('--from', dest='start', default='seed', choices=STAGE_NAMES, help="First stage to run")
+    parser.add_argument('--to', dest='stop', default='verify', choices=STAGE_NAMES, help="Last stage to run")
+    parser.add_argument('--refresh-all', action='store_true', help="Google: search rows that already have a website")
+    parser.add_argument('--dry-run', action='store_true', default=None, help="Hunter: process a small sample")
+    args = parser.parse_args(argv)
+
+    results = run_pipeline(start=args.start, stop=args.stop, refresh_all=args.refresh_all, dry_run=args.dry_run)
+    print("\nPIPELINE SUMMARY")
+    print("=" * 60)
+    for name in STAGE_NAMES:
+        if name in results:
+            stage = STAGE_FILES[name]
+            print(f"{name:<8} {results[name]['status']:<10} -> {stage.output_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Re-apply the current filters to a scraper (or Hunter) output without
+fetching anything: rows decided by an older filter version are checked
+again from their name and website alone.
+
+Rows the new filters exclude are marked skipped and their contacts
+(scraped, and Hunter's email columns) cleared, as a fresh run would leave
+them. Rows that an older version skipped but the new one lets through are
+only flagged as not scraped yet: the scraper starts from the Google output,
+so fetching them means running the scraper (and Hunter) again.
+
+Usage:
+    python refilter.py [FILE] [--dry-run]
+"""
+
+import argparse
+import csv
+import os
+import sys
+from collections import Counter
+from typing import Dict, List
+
+from config.filter_engine import DOMAIN_CATEGORIES, NAME_CATEGORIES, FilterEngine
+from config.filters import get_engine
+from utils.pipeline import STAGE_FILES
+
+DEFAULT_FILE = STAGE_FILES['scrape'].output_file
+
+# extraction_notes written when a filter (rather than the fetch) skipped a row
+FILTER_REASONS = {reason for _, _, reason, _ in NAME_CATEGORIES + DOMAIN_CATEGORIES} | {"Missing name"}
+
+# Scraped and Hunter results that no longer apply once a row is excluded
+CONTACT_FIELDS = ('email_found', 'phone_found', 'additional_emails', 'additional_phones',
+                  'email', 'email_status', 'email_source')
+
+
+def refilter_row(row: Dict[str, str], engine: FilterEngine) -> str:
+    """
+    Bring one row up to `engine`'s filter version. Returns what happened:
+    'current', 'unchanged', 'excluded' or 'readmitted'.
+    """
+    if row.get('filter_version') == engine.version:
+        return 'current'
+    website = row.get('website', '')
+    was_filtered = row.get('extraction_status') == 'skipped' and row.get('extraction_notes') in FILTER_REASONS
+
+    decision = engine.check_name(row.get('name', ''))
+    if not decision.excluded and website:
+        decision = engine.check_url(website)
+
+    row['filter_version'] = engine.version
+    if decision.excluded:
+        if was_filtered and row.get('extraction_notes') == decision.reason:
+            return 'unchanged'
+        row['extraction_status'] = 'skipped'
+        row['extraction_notes'] = decision.reason
+        for field in CONTACT_FIELDS:
+            if field in row:
+                row[field] = ''
+        return 'excluded'
+    if was_filtered:
+        row['extraction_status'] = ''
+        row['extraction_notes'] = 'Filters changed; not scraped yet'
+        return 'readmitted'
+    return 'unchanged'
+
+
+def refilter_rows(rows: List[Dict[str, str]], engine: FilterEngine = None) -> Counter:
+    """Re-filter rows in place; returns a count per outcome."""
+    engine = engine or get_engine()
+    return Counter(refilter_row(row, engine) for row in rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-apply the current filters to an enrichment output")
+    parser.add_argument('file', nargs='?', default=DEFAULT_FILE, help=f"CSV to re-filter (default: {DEFAULT_FILE})")
+    parser.add_argument('--dry-run', action='store_true', help="Report what would change without writing")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.file):
+        print(f"{args.file} not found")
+        return 1
+
+    with open(args.file, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        fieldnames = list(reader.fieldnames or [])
+        rows = list(reader)
+    if 'filter_version' not in fieldnames:
+        fieldnames.append('filter_version')
+
+    engine = get_engine()
+    outcomes = refilter_rows(rows, engine)
+
+    print("RE-FILTER SUMMARY")
+    print("=" * 60)
+    print(f"File:                          {args.file}")
+    print(f"Filter version:                {engine.version}")
+    print(f"Rows:                          {len(rows)}")
+    print(f"Already current:               {outcomes['current']}")
+    print(f"Re-checked, unchanged:         {outcomes['unchanged']}")
+    print(f"Newly excluded:                {outcomes['excluded']}")
+    print(f"Readmitted (need scraping):    {outcomes['readmitted']}")
+    if outcomes['readmitted']:
+        print("Re-run the scraper to fetch readmitted rows")
+
+    if args.dry_run:
+        print("\nDry run: nothing written")
+        return 0
+
+    tmp = args.file + '.tmp'
+    with open(tmp, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp, args.file)
+    print(f"\nSaved {args.file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -56,11 +56,36 @@ async function runVerifyEmails() {
     monitorTask('verify', data.task_id);
 }
 
+async function runPipeline() {
+    const btn = document.getElementById('btn-pipeline');
+    btn.disabled = true;
+    
+    const mode = document.querySelector('input[name="enrichMode"]:checked').value;
+    const dryRun = document.getElementById('dryRun').checked;
+    
+    const response = await fetch('/api/pipeline', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ mode: mode, dry_run: dryRun })
+    });
+    const data = await response.json();
+    
+    activeTaskIds['pipeline'] = data.task_id;
+    monitorTask('pipeline', data.task_id);
+}
+
 function showHunterConfig() {
     alert('Please add HUNTER_API_KEY to your .env file.\n\nSign up at hunter.io to get your API key.\n\nConfiguration options:\n- HUNTER_MAX_VERIFICATIONS (default: 1000)\n- HUNTER_MAX_SEARCHES (default: 500)\n- HUNTER_CONFIDENCE_THRESHOLD (default: 70)');
 }
 
-async function monitorTask(taskType, taskId) {
+function formatEta(seconds) {
+    if (seconds === null || seconds === undefined) return '';
+    const mins = Math.floor(seconds / 60);
+    const secs = Math.round(seconds % 60);
+    return mins > 0 ? `${mins}m ${secs}s` : `${secs}s`;
+}
+
+function monitorTask(taskType, taskId) {
     const statusEl = document.getElementById(`${taskType}-status`);
     const messageEl = document.getElementById(`${taskType}-message`);
     const progressBar = document.getElementById(`${taskType}-progress-bar`);
@@ -71,14 +96,22 @@ async function monitorTask(taskType, taskId) {
         progressBar.style.display = 'block';
     }
     
-    const interval = setInterval(async () => {
-        const response = await fetch(`/api/status/${taskId}`);
-        const data = await response.json();
-        
-        if (data.status === 'running') {
+    // The server pushes an event whenever the job changes, so there's no polling
+    const source = new EventSource(`/api/events/${taskId}`);
+    
+    const render = (data) => {
+        if (data.status === 'running' || data.status === 'queued') {
             statusEl.className = 'badge bg-info';
-            statusEl.textContent = 'Running';
-            messageEl.textContent = data.message || 'Processing...';
+            statusEl.textContent = data.status === 'queued' ? 'Queued' : 'Running';
+            let message = data.message || 'Processing...';
+            if (data.total) {
+                message += ` (${data.done}/${data.total}`;
+                if (data.rate) {
+                    message += `, ${data.rate}/s, ETA ${formatEta(data.eta_seconds)}`;
+                }
+                message += ')';
+            }
+            messageEl.textContent = message;
             if (progressBarInner) {
                 progressBarInner.style.width = `${data.progress || 0}%`;
             }
@@ -100,7 +133,6 @@ async function monitorTask(taskType, taskId) {
                 document.getElementById('invalid-emails').textContent = report.summary.invalid_emails || 0;
                 document.getElementById('credits-used').textContent = report.summary.credits_used || 0;
             }
-            clearInterval(interval);
             btn.disabled = false;
             setTimeout(() => {
                 if (progressBar) {
@@ -109,17 +141,31 @@ async function monitorTask(taskType, taskId) {
                 }
             }, 2000);
             loadFiles();
-        } else if (data.status === 'failed') {
-            statusEl.className = 'badge bg-danger';
-            statusEl.textContent = 'Failed';
+            loadStats();
+        } else if (data.status === 'failed' || data.status === 'cancelled' || data.status === 'not_found') {
+            statusEl.className = data.status === 'cancelled' ? 'badge bg-secondary' : 'badge bg-danger';
+            statusEl.textContent = data.status === 'cancelled' ? 'Cancelled' : 'Failed';
             messageEl.textContent = data.message || 'Task failed';
-            clearInterval(interval);
             btn.disabled = false;
             if (progressBar) {
                 progressBar.style.display = 'none';
             }
         }
-    }, 1000);
+    };
+    
+    source.addEventListener('progress', (event) => render(JSON.parse(event.data)));
+    source.addEventListener('done', (event) => {
+        source.close();
+        render(JSON.parse(event.data));
+    });
+    source.onerror = async () => {
+        // EventSource reconnects by itself after network blips; if the stream
+        // was refused outright (e.g. unknown task), settle the final state once
+        if (source.readyState === EventSource.CLOSED) {
+            const response = await fetch(`/api/status/${taskId}`);
+            render(await response.json());
+        }
+    };
 }
 
 async function loadFiles() {
@@ -152,7 +198,32 @@ async function loadFiles() {
     }).join('');
 }
 
+async function loadStats() {
+    const container = document.getElementById('run-stats');
+    const response = await fetch('/api/stats');
+    if (!response.ok) {
+        container.innerHTML = '<p class="text-muted">No data files found</p>';
+        return;
+    }
+    const data = await response.json();
+    const stats = data.stats;
+    const statuses = Object.entries((stats.histograms || {}).extraction_status || {})
+        .map(([status, count]) => `${status}: ${count}`).join(', ');
+    const anomalies = Object.entries(stats.anomalies)
+        .map(([name, entry]) => `<li>${name.replace(/_/g, ' ')}: ${entry.count}</li>`).join('');
+    container.innerHTML = `
+        <strong>${data.file}</strong>
+        <small class="text-muted d-block">
+            ${stats.total} venues - ${stats.with_email_pct}% with email - ${stats.with_phone_pct}% with phone
+        </small>
+        ${statuses ? `<small class="d-block">Status: ${statuses}</small>` : ''}
+        ${anomalies ? `<ul class="small mb-0 mt-2">${anomalies}</ul>` : ''}
+    `;
+}
+
 document.addEventListener('DOMContentLoaded', () => {
     loadFiles();
+    loadStats();
     setInterval(loadFiles, 30000);
+    setInterval(loadStats, 30000);
 });
\ No newline at end of file
@@ -0,0 +1,118 @@
+import threading
+import time
+
+import pytest
+
+from utils.coalescing import FetchCoalescer
+
+THREADS = 8
+
+
+class CountingFetch:
+    """fetch_fn that blocks until released, counting calls and raising `error` if set."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, url):
+        with self._lock:
+            self.calls += 1
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return f'<html>{url}</html>', 'direct_http'
+
+
+def fetch_concurrently(coalescer, fetch_fn, urls):
+    """Fetch every URL on its own thread, releasing fetch_fn once all have started waiting."""
+    results = [None] * len(urls)
+    started = threading.Barrier(len(urls) + 1)
+
+    def worker(i):
+        started.wait()
+        try:
+            results[i] = coalescer.fetch(urls[i], fetch_fn)
+        except Exception as exc:
+            results[i] = exc
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(urls))]
+    for thread in threads:
+        thread.start()
+    started.wait()
+    # Give the followers time to block on the leader's fetch
+    time.sleep(0.2)
+    fetch_fn.release.set()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_concurrent_callers_for_one_website_share_one_fetch():
+    coalescer = FetchCoalescer()
+    urls = ['http://www.thecrown.co.uk/', 'https://thecrown.co.uk', 'thecrown.co.uk#menu', 'THECROWN.co.uk'] * 2
+    for url in urls:
+        coalescer.register(url)
+    fetch_fn = CountingFetch()
+
+    results = fetch_concurrently(coalescer, fetch_fn, urls)
+
+    assert fetch_fn.calls == 1
+    assert len(set(results)) == 1 and results[0][1] == 'direct_http'
+    assert coalescer.unique_fetches == 1
+    assert coalescer.coalesced_hits == THREADS - 1
+    # Every registered venue consumed the result, so nothing is held for them
+    assert not coalescer._results and not coalescer._remaining
+
+
+def test_fetch_error_reaches_every_waiter():
+    coalescer = FetchCoalescer()
+    urls = ['https://thecrown.co.uk'] * THREADS
+    for url in urls:
+        coalescer.register(url)
+    error = ConnectionError('proxy down')
+    fetch_fn = CountingFetch(error)
+
+    results = fetch_concurrently(coalescer, fetch_fn, urls)
+
+    assert fetch_fn.calls == 1
+    assert all(result is error for result in results)
+    assert not coalescer._results and not coalescer._remaining and not coalescer._inflight
+
+    # A failure isn't shared: the next venue fetches again
+    fetch_fn.error = None
+    assert coalescer.fetch('https://thecrown.co.uk', fetch_fn)[1] == 'direct_http'
+    assert fetch_fn.calls == 2
+
+
+def test_completed_results_are_evicted_least_recently_used_first():
+    coalescer = FetchCoalescer(max_completed=2)
+    fetch_fn = CountingFetch()
+    fetch_fn.release.set()
+
+    for url in ('a.co.uk', 'b.co.uk', 'a.co.uk', 'c.co.uk'):
+        coalescer.fetch(url, fetch_fn)
+    # a was reused after b, so b is the one evicted when c arrives
+    assert fetch_fn.calls == 3
+    assert list(coalescer._completed) == ['https://a.co.uk', 'https://c.co.uk']
+
+    coalescer.fetch('b.co.uk', fetch_fn)
+    assert fetch_fn.calls == 4
+    coalescer.fetch('c.co.uk', fetch_fn)
+    assert fetch_fn.calls == 4
+
+
+@pytest.mark.parametrize('result', [(None, 'all_failed'), (None, 'deferred')])
+def test_failed_fetches_are_not_kept(result):
+    coalescer = FetchCoalescer()
+    calls = []
+
+    def fetch_fn(url):
+        calls.append(url)
+        return result
+
+    assert coalescer.fetch('a.co.uk', fetch_fn) == result
+    assert coalescer.fetch('a.co.uk', fetch_fn) == result
+    assert len(calls) == 2
@@ -0,0 +1,20 @@
+from venue_contact_enricher_unified import rank_contact_links
+
+
+HOMEPAGE = '''
+<a href="/contact-us">Contact</a>
+<a href="https://www.venue.co.uk/about">About</a>
+<a href="https://elsewhere.com/contact">Partner</a>
+<a href="/menu.pdf">Menu</a>
+'''
+
+
+def test_ranks_same_site_links_from_bare_domain():
+    # Canonical resolution failed, so the crawl only has the website value
+    links = rank_contact_links(HOMEPAGE, 'venue.co.uk', limit=3)
+    assert links == ['http://venue.co.uk/contact-us', 'https://www.venue.co.uk/about']
+
+
+def test_ranks_same_site_links_from_full_url():
+    links = rank_contact_links(HOMEPAGE, 'https://www.venue.co.uk/', limit=1)
+    assert links == ['https://www.venue.co.uk/contact-us']
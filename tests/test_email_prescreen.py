@@ -0,0 +1,36 @@
+import dns.exception
+import dns.resolver
+
+from utils.email_prescreen import EmailPrescreen, MailDomainResolver
+
+
+class StubResolver:
+    """Answers lookups from a {(domain, rdtype): exception} table."""
+
+    def __init__(self, errors):
+        self.errors = errors
+
+    def resolve(self, domain, rdtype):
+        raise self.errors[(domain, rdtype)]
+
+
+def make_resolver(tmp_path, errors):
+    resolver = MailDomainResolver(cache_dir=str(tmp_path))
+    resolver._resolver = StubResolver(errors)
+    return resolver
+
+
+def test_domain_without_mx_or_address_is_rejected(tmp_path):
+    errors = {('gone.co.uk', rdtype): dns.resolver.NXDOMAIN() for rdtype in ('MX', 'A', 'AAAA')}
+    prescreen = EmailPrescreen(make_resolver(tmp_path, errors), disposable_domains=set())
+
+    assert prescreen.check('info@gone.co.uk') == (False, 'no_mail_server')
+
+
+def test_timeout_is_unknown_not_a_rejection(tmp_path):
+    errors = {('slow.co.uk', rdtype): dns.exception.Timeout() for rdtype in ('MX', 'A', 'AAAA')}
+    resolver = make_resolver(tmp_path, errors)
+
+    assert resolver.check('slow.co.uk') == 'unknown'
+    prescreen = EmailPrescreen(resolver, disposable_domains=set())
+    assert prescreen.check('info@slow.co.uk') == (True, None)
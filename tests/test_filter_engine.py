@@ -0,0 +1,117 @@
+import csv
+
+import pytest
+
+from config.filter_engine import DOMAIN_CATEGORIES, NAME_CATEGORIES, FilterEngine, hostname
+from config.filters import REGISTRY, get_engine
+
+SEED_FILE = 'essex_licensed_venues.csv'
+EDGE_CASES_FILE = 'config/domain_filter_edge_cases.csv'
+
+LISTS = REGISTRY.config.lists
+
+
+def list_name_decision(name, lists=LISTS):
+    """The per-list name filter: each list in priority order, substring tests on the name."""
+    name_lower = (name or '').lower().strip()
+    if not name_lower:
+        return True, "Missing name", 'business_name'
+    for _, key, reason, filter_type in NAME_CATEGORIES:
+        if any(pattern.lower() in name_lower for pattern in lists.get(key, []) if pattern):
+            return True, reason, filter_type
+    return False, '', ''
+
+
+def list_url_decision(url, lists=LISTS):
+    """The per-list domain filter: each list in priority order, hostname equal to or under a listed domain."""
+    if not (url or '').strip():
+        return True, "No website", 'no_website'
+    host = hostname(url)
+    for _, key, reason, filter_type in DOMAIN_CATEGORIES:
+        for domain in lists.get(key, []):
+            domain = domain.lower().strip('.')
+            if domain and (host == domain or host.endswith('.' + domain)):
+                return True, reason, filter_type
+    return False, '', ''
+
+
+def seed_names():
+    with open(SEED_FILE, newline='', encoding='utf-8') as f:
+        names = [row['name'] for row in csv.DictReader(f)]
+    # Listed patterns inside otherwise ordinary names, in mixed case
+    for _, key, _, _ in NAME_CATEGORIES:
+        for pattern in LISTS[key]:
+            names += [pattern, f'The {pattern.title()} Arms', f'  {pattern.upper()}  ']
+    return names + ['', '   ']
+
+
+def edge_case_urls():
+    with open(EDGE_CASES_FILE, newline='', encoding='utf-8') as f:
+        urls = [row['url'] for row in csv.DictReader(f)]
+    # Every listed domain as a host, a subdomain, a lookalike and a path segment
+    for _, key, _, _ in DOMAIN_CATEGORIES:
+        for domain in LISTS[key]:
+            domain = domain.strip('.')
+            urls += [f'https://www.{domain}/biz/1', f'http://{domain.upper()}', f'notreally{domain}',
+                     f'https://{domain}.example.co.uk/', f'https://thecrown.co.uk/{domain}']
+    return urls + ['', '  ']
+
+
+@pytest.fixture
+def uncached():
+    return FilterEngine(LISTS, cache_size=0)
+
+
+def test_name_decisions_match_the_per_list_filter(uncached):
+    for name in seed_names():
+        assert tuple(uncached.check_name(name)[:3]) == list_name_decision(name), name
+
+
+def test_url_decisions_match_the_per_list_filter(uncached):
+    for url in edge_case_urls():
+        assert tuple(uncached.check_url(url)[:3]) == list_url_decision(url), url
+
+
+def test_overlapping_lists_keep_the_per_list_priority():
+    # Patterns that sit inside one another across categories, so the winner depends on list order
+    lists = {
+        'business_names': ['costa', 'tea rooms'],
+        'keywords': ['coffee', 'costa coffee', 'tea'],
+        'excluded_domains': ['gov.uk', '.ac.uk'],
+        'property_listing_domains': ['essex.gov.uk', 'zoopla.co.uk', 'org.uk'],
+        'business_directories': ['co.uk', 'ac.uk', 'zoopla.co.uk', 'pubs.org.uk'],
+    }
+    engine = FilterEngine(lists, cache_size=0)
+    names = ['Costa Coffee', 'Coffee & Costa', 'The Tea Rooms', 'Steamboat', 'Crown']
+    urls = ['https://www.essex.gov.uk/', 'https://uni.ac.uk', 'zoopla.co.uk/to-rent', 'thecrown.co.uk',
+            'https://www.pubs.org.uk/crown', 'https://example.com/essex.gov.uk']
+    for name in names:
+        assert tuple(engine.check_name(name)[:3]) == list_name_decision(name, lists), name
+    for url in urls:
+        assert tuple(engine.check_url(url)[:3]) == list_url_decision(url, lists), url
+
+
+def test_edge_cases_get_their_expected_decisions(uncached):
+    with open(EDGE_CASES_FILE, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            decision = uncached.check_url(row['url'])
+            assert (decision.excluded, decision.reason) == (row['excluded'] == 'true', row['reason']), row['url']
+
+
+def test_memoized_engine_matches_the_uncached_path(uncached):
+    engine = get_engine()
+    engine.clear_cache()
+    names, urls = seed_names(), edge_case_urls()
+    expected_names = [uncached.check_name(name) for name in names]
+    expected_urls = [uncached.check_url(url) for url in urls]
+
+    # Twice over, so the second pass is answered from the cache
+    for _ in range(2):
+        assert [engine.check_name(name)[:3] for name in names] == [d[:3] for d in expected_names]
+        assert [engine.check_url(url)[:3] for url in urls] == [d[:3] for d in expected_urls]
+    assert [d[:3] for d in engine.check_names(names)] == [d[:3] for d in expected_names]
+    assert [d[:3] for d in engine.check_urls(urls)] == [d[:3] for d in expected_urls]
+
+    stats = engine.get_stats()
+    assert stats['names']['hits'] > 0 and stats['urls']['hits'] > 0
+    assert uncached.get_stats()['urls']['size'] == 0
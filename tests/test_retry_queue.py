@@ -0,0 +1,123 @@
+import csv
+
+import pytest
+
+import utils.retry_queue
+from utils.retry_queue import DeferredRetryQueue
+
+
+class FakeClock:
+    """Stands in for the time module: sleep() advances time() instead of blocking."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(utils.retry_queue, 'time', clock)
+    return clock
+
+
+def make_queue(tmp_path, **kwargs):
+    return DeferredRetryQueue(path=str(tmp_path / 'retry_queue.json'),
+                              dead_letter_path=str(tmp_path / 'dead_letter.csv'), **kwargs)
+
+
+def venue(name):
+    return {'name': name, 'website': f'{name.lower()}.co.uk'}
+
+
+def read_dead_letter(tmp_path):
+    with open(tmp_path / 'dead_letter.csv', newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def test_backoff_doubles_per_attempt_up_to_max_delay(clock, tmp_path):
+    queue = make_queue(tmp_path, base_delay=1, max_delay=4)
+    for attempt in (4, 1, 3, 2):
+        queue.push(venue(f'Pub{attempt}'), attempt, key=f'pub{attempt}')
+
+    delays = {key: record['ready_at'] - clock.now for key, record in queue.carried_over().items()}
+    assert delays == {'pub1': 1, 'pub2': 2, 'pub3': 4, 'pub4': 4}
+
+    assert queue.pop_ready() is None
+    popped = []
+    while len(queue):
+        _, attempt = queue.pop_ready(wait=True)
+        popped.append(attempt)
+    # Ties at max_delay come out in push order
+    assert popped == [1, 2, 4, 3]
+
+
+def test_pop_ready_only_waits_within_max_wait(clock, tmp_path):
+    queue = make_queue(tmp_path, base_delay=10)
+    queue.push(venue('Crown'), 1, key='crown')
+
+    assert queue.pop_ready(wait=True, max_wait=5) is None
+    start = clock.now
+    assert queue.pop_ready(wait=True, max_wait=10) == (venue('Crown'), 1)
+    assert clock.now - start == 10
+    # Popping keeps the persisted record until the retry's outcome is recorded
+    assert 'crown' in queue.carried_over()
+
+
+def test_pending_retries_round_trip_through_the_json_file(clock, tmp_path):
+    queue = make_queue(tmp_path, base_delay=1)
+    queue.push(venue('Crown'), 1, key='crown', reason='timeout', name='Crown', website='crown.co.uk')
+    queue.push(venue('Bell'), 2, key='bell', reason='proxy error', name='Bell', website='bell.co.uk',
+               ready_at=clock.now + 3600)
+    queue.save()
+
+    reloaded = make_queue(tmp_path, base_delay=1)
+    assert reloaded.carried_over() == queue.carried_over()
+    assert reloaded.carried_over()['bell'] == {
+        'name': 'Bell', 'website': 'bell.co.uk', 'attempt': 2,
+        'ready_at': clock.now + 3600, 'reason': 'proxy error',
+    }
+    # Records come back without heap entries; the caller pushes them again
+    assert len(reloaded) == 0
+
+
+def test_discard_and_prune_drop_records_from_the_saved_file(clock, tmp_path):
+    queue = make_queue(tmp_path)
+    for name in ('Crown', 'Bell', 'Swan'):
+        queue.push(venue(name), 1, key=name.lower())
+
+    queue.discard('crown')
+    queue.discard('missing')
+    assert queue.prune(['bell', 'crown', 'plough']) == 1
+    queue.save()
+
+    assert list(make_queue(tmp_path).carried_over()) == ['bell']
+
+
+def test_venue_hitting_max_attempts_is_dead_lettered_once(clock, tmp_path):
+    queue = make_queue(tmp_path, base_delay=0, max_attempts=3)
+    crown = venue('Crown')
+
+    attempt = 0
+    while queue.push(crown, attempt + 1, key='crown', reason='timeout', name='Crown', website='crown.co.uk'):
+        crown, attempt = queue.pop_ready()
+    queue.save()
+
+    assert attempt == 2
+    assert queue.dead_lettered == 1
+    rows = read_dead_letter(tmp_path)
+    assert [(row['key'], row['attempts'], row['reason']) for row in rows] == [
+        ('crown', '3', 'Retry attempts exhausted (timeout)'),
+    ]
+
+    # The next run skips it instead of retrying or dead-lettering it again
+    rerun = make_queue(tmp_path, base_delay=0, max_attempts=3)
+    assert rerun.carried_over() == {}
+    assert rerun.dead_letter_reason('crown') == 'Retry attempts exhausted (timeout)'
+    assert rerun.dead_letter_reason('bell') is None
+    assert len(read_dead_letter(tmp_path)) == 1
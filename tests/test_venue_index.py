@@ -0,0 +1,62 @@
+import csv
+from pathlib import Path
+
+import pytest
+
+from utils.venue_index import VenueIndex
+
+SEED_FILE = Path(__file__).resolve().parent.parent / "essex_licensed_venues.csv"
+
+
+def page_through(index, **query):
+    """Every venue returned by following next_cursor from the first page."""
+    venues, cursor = [], None
+    while True:
+        page = index.query(cursor=cursor, limit=37, **query)
+        venues.extend(page['venues'])
+        cursor = page['next_cursor']
+        if not cursor:
+            return venues, page['total']
+
+
+def expected_names(predicate):
+    with open(SEED_FILE, 'r', encoding='utf-8', newline='') as f:
+        return sorted(row['name'] for row in csv.DictReader(f) if predicate(row))
+
+
+def is_blank_lat(row):
+    try:
+        float(row['lat'])
+        return False
+    except ValueError:
+        return True
+
+
+@pytest.mark.parametrize('sort, descending', [('lat', True), ('lat', False), ('name', False), ('name', True)])
+@pytest.mark.parametrize('filters, predicate', [
+    ({}, lambda row: True),
+    ({'business_types': ['Pub'], 'postcode_prefixes': ['CM']},
+     lambda row: row['business_type'] == 'Pub' and row['postcode'].upper().startswith('CM')),
+])
+def test_cursor_pages_have_no_duplicates_or_gaps(sort, descending, filters, predicate):
+    index = VenueIndex(str(SEED_FILE))
+    venues, total = page_through(index, sort=sort, descending=descending, **filters)
+
+    # Rows are the index's own dicts, so identity catches duplicates
+    assert len({id(venue) for venue in venues}) == len(venues) == total
+    assert sorted(venue['name'] for venue in venues) == expected_names(predicate)
+
+    values = [venue[sort] for venue in venues]
+    blank = [is_blank_lat(venue) if sort == 'lat' else not venue['name'].strip() for venue in venues]
+    # Missing values come last in both directions
+    assert blank == sorted(blank)
+    present = [float(v) if sort == 'lat' else v.strip().lower() for v, b in zip(values, blank) if not b]
+    assert present == sorted(present, reverse=descending)
+
+
+def test_descending_latitude_starts_with_real_values():
+    index = VenueIndex(str(SEED_FILE))
+    venues, _ = page_through(index, sort='lat', descending=True)
+
+    assert any(is_blank_lat(venue) for venue in venues)
+    assert not is_blank_lat(venues[0])
@@ -0,0 +1,183 @@
+"""
+Spend capped API budgets (Hunter searches, Google queries) on the venues
+most likely to pay off instead of in CSV order.
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from utils.url_resolver import registrable_domain
+
+
+# Relative value of a contact by business type, matched as a substring of
+# business_type. Pubs and bars are the target market; restaurants less so.
+TYPE_VALUES = [
+    ('pub', 1.0),
+    ('inn', 1.0),
+    ('bar', 0.9),
+    ('tavern', 0.9),
+    ('club', 0.7),
+    ('hotel', 0.6),
+    ('restaurant', 0.4),
+]
+DEFAULT_TYPE_VALUE = 0.5
+
+# Site builders and profile pages whose domains behave differently from
+# a venue's own domain
+PLATFORM_DOMAINS = [
+    'wixsite.com', 'squarespace.com', 'wordpress.com', 'business.site',
+    'godaddysites.com', 'webs.com', 'weebly.com', 'facebook.com',
+    'instagram.com', 'greeneking.co.uk', 'stonegatepubs.co.uk',
+]
+
+# Pseudo-trials giving the prior rate as much weight as this many real ones
+PRIOR_WEIGHT = 5
+
+
+def type_value(business_type: str, values: Optional[List[Tuple[str, float]]] = None) -> float:
+    """Relative value of a venue of `business_type`."""
+    business_type = (business_type or '').lower()
+    for keyword, value in values or TYPE_VALUES:
+        if keyword in business_type:
+            return value
+    return DEFAULT_TYPE_VALUE
+
+
+def domain_pattern(domain: str) -> str:
+    """Bucket a domain for hit-rate history: hosting platform or public suffix."""
+    domain = (domain or '').lower()
+    for platform in PLATFORM_DOMAINS:
+        if domain == platform or domain.endswith('.' + platform):
+            return f'platform:{platform}'
+    registrable = registrable_domain(domain)
+    suffix = registrable.split('.', 1)[1] if '.' in registrable else registrable
+    return f'suffix:{suffix}'
+
+
+class BudgetScheduler:
+    """
+    Rank candidates by expected yield (hit probability x value) and keep a
+    per-pattern hit-rate history on disk so later runs rank better.
+
+    Hit probability for a pattern is its historical rate smoothed toward the
+    scheduler's overall rate, so unseen patterns start at the average.
+    """
+
+    def __init__(self, name: str, history_dir: str = "cache/yield",
+                 type_values: Optional[List[Tuple[str, float]]] = None):
+        self.name = name
+        self.history_dir = Path(history_dir)
+        self.history_dir.mkdir(parents=True, exist_ok=True)
+        self.history_file = self.history_dir / f"{name}_history.json"
+        self.type_values = type_values or self._type_values_from_env()
+        self.planned: Dict[Hashable, Dict] = {}
+        self.skipped = 0
+        self._load_history()
+
+    @staticmethod
+    def _type_values_from_env() -> List[Tuple[str, float]]:
+        # e.g. BUDGET_TYPE_VALUES='{"pub": 1.0, "restaurant": 0.2}'
+        overrides = os.getenv('BUDGET_TYPE_VALUES')
+        if not overrides:
+            return TYPE_VALUES
+        try:
+            return list(json.loads(overrides).items())
+        except (ValueError, AttributeError) as e:
+            print(f"Ignoring invalid BUDGET_TYPE_VALUES: {e}")
+            return TYPE_VALUES
+
+    def _load_history(self):
+        """Load hit-rate history from disk"""
+        self.history: Dict[str, Dict[str, int]] = {}
+        if self.history_file.exists():
+            try:
+                with open(self.history_file, 'r') as f:
+                    self.history = json.load(f).get("patterns", {})
+            except Exception as e:
+                print(f"Error loading yield history: {e}")
+                self.history = {}
+
+    def save(self):
+        """Save hit-rate history to disk"""
+        try:
+            with open(self.history_file, 'w') as f:
+                json.dump({
+                    "patterns": self.history,
+                    "updated": datetime.now().isoformat(),
+                }, f, indent=2)
+        except Exception as e:
+            print(f"Error saving yield history: {e}")
+
+    def _overall_rate(self) -> float:
+        trials = sum(p.get('trials', 0) for p in self.history.values())
+        hits = sum(p.get('hits', 0) for p in self.history.values())
+        return (hits + PRIOR_WEIGHT * 0.5) / (trials + PRIOR_WEIGHT)
+
+    def hit_probability(self, pattern: str, overall: Optional[float] = None) -> float:
+        """Smoothed historical hit rate for `pattern`."""
+        if overall is None:
+            overall = self._overall_rate()
+        entry = self.history.get(pattern, {})
+        return (entry.get('hits', 0) + PRIOR_WEIGHT * overall) / (entry.get('trials', 0) + PRIOR_WEIGHT)
+
+    def plan(self, candidates: Iterable[Tuple[Hashable, str, float]], budget: int) -> List[Hashable]:
+        """
+        Choose up to `budget` candidates with the highest expected yield.
+
+        Each candidate is (key, pattern, value). Returns the chosen keys,
+        best first; ties keep input order.
+        """
+        overall = self._overall_rate()
+        scored = []
+        for key, pattern, value in candidates:
+            probability = self.hit_probability(pattern, overall)
+            scored.append((probability * value, key, pattern, value, probability))
+        scored.sort(key=lambda c: c[0], reverse=True)
+
+        chosen = scored[:max(0, budget)]
+        self.skipped += len(scored) - len(chosen)
+        for expected, key, pattern, value, probability in chosen:
+            self.planned[key] = {
+                'pattern': pattern, 'value': value,
+                'probability': probability, 'hit': None,
+            }
+        return [key for _, key, _, _, _ in chosen]
+
+    def record(self, key: Hashable, hit: bool):
+        """Record the outcome of a planned candidate and update its pattern's history."""
+        entry = self.planned.get(key)
+        if entry is None or entry['hit'] is not None:
+            return
+        entry['hit'] = bool(hit)
+        stats = self.history.setdefault(entry['pattern'], {'trials': 0, 'hits': 0})
+        stats['trials'] += 1
+        stats['hits'] += int(bool(hit))
+
+    def get_report(self) -> Dict:
+        """Expected versus actual yield for the candidates spent on so far."""
+        done = [e for e in self.planned.values() if e['hit'] is not None]
+        return {
+            'spent': len(done),
+            'skipped_for_budget': self.skipped,
+            'expected_hits': round(sum(e['probability'] for e in done), 2),
+            'actual_hits': sum(1 for e in done if e['hit']),
+            'expected_value': round(sum(e['probability'] * e['value'] for e in done), 2),
+            'actual_value': round(sum(e['value'] for e in done if e['hit']), 2),
+        }
+
+    def get_summary(self) -> str:
+        """Get a formatted summary of expected versus actual yield."""
+        report = self.get_report()
+        return "\n".join([
+            f"{self.name.upper()} BUDGET SCHEDULER",
+            "=" * 60,
+            f"Lookups spent:                 {report['spent']}",
+            f"Skipped (lower yield):         {report['skipped_for_budget']}",
+            f"Expected hits:                 {report['expected_hits']}",
+            f"Actual hits:                   {report['actual_hits']}",
+            f"Expected value:                {report['expected_value']}",
+            f"Actual value:                  {report['actual_value']}",
+        ])
@@ -0,0 +1,172 @@
+"""
+Single-flight fetch coalescing for venues that share a website.
+"""
+
+import threading
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse, urlunparse
+
+
+FetchResult = Tuple[Optional[str], str]
+
+
+def normalize_url(url: str) -> str:
+    """
+    Reduce a website value to a canonical key so trivially different
+    spellings of the same page (scheme, case, www, trailing slash,
+    fragment) are fetched once.
+    """
+    if not url:
+        return ''
+
+    url = url.strip()
+    if not url.lower().startswith(('http://', 'https://')):
+        url = f'http://{url}'
+
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    path = parsed.path.rstrip('/')
+
+    return urlunparse(('https', host, path, '', parsed.query, ''))
+
+
+class _Flight:
+    """A fetch in progress: waiters block on `done`, then re-raise `error` if the fetch raised."""
+
+    __slots__ = ('done', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class FetchCoalescer:
+    """
+    Fetch each canonical URL once per run and fan the result out to every
+    venue that references it.
+
+    Callers `register` each URL up front so results are only held in memory
+    until the last referencing venue has consumed them. Concurrent callers
+    for the same URL wait on the in-flight fetch instead of starting their own,
+    and if that fetch raises, every waiter raises the same exception.
+
+    Venues streamed in from an upstream stage are registered one at a time,
+    so a repeat URL may arrive after its fetch has finished. The last
+    `max_completed` successful fetches are kept for the rest of the run to
+    serve those too; failures aren't kept, so a later venue tries again.
+    """
+
+    def __init__(self, max_completed: int = 128):
+        self._lock = threading.Lock()
+        self._results: Dict[str, FetchResult] = {}
+        self._completed: 'OrderedDict[str, FetchResult]' = OrderedDict()
+        self.max_completed = max_completed
+        self._inflight: Dict[str, _Flight] = {}
+        self._remaining = Counter()
+
+        self.unique_fetches = 0
+        self.coalesced_hits = 0
+        self.brightdata_calls_saved = 0
+
+    def register(self, url: str):
+        """Record that a venue will fetch `url` later in the run."""
+        key = normalize_url(url)
+        if key:
+            with self._lock:
+                self._remaining[key] += 1
+
+    def shared_count(self) -> int:
+        """Number of canonical URLs referenced by more than one venue."""
+        with self._lock:
+            return sum(1 for count in self._remaining.values() if count > 1)
+
+    def _consume(self, key: str) -> Optional[FetchResult]:
+        """Take a stored result for `key` and drop it once nobody else needs it."""
+        result = self._results.get(key)
+        if result is not None:
+            self._remaining[key] -= 1
+            if self._remaining[key] <= 0:
+                del self._results[key]
+                del self._remaining[key]
+        else:
+            result = self._completed.get(key)
+            if result is None:
+                return None
+            self._completed.move_to_end(key)
+            # A late venue registered for a fetch that was already done
+            if self._remaining[key] > 0:
+                self._remaining[key] -= 1
+            if self._remaining[key] <= 0:
+                self._remaining.pop(key, None)
+
+        self.coalesced_hits += 1
+        if result[1] == 'brightdata':
+            self.brightdata_calls_saved += 1
+        return result
+
+    def fetch(self, url: str, fetch_fn: Callable[[str], FetchResult]) -> FetchResult:
+        """Return `fetch_fn(url)`, sharing the result across callers with the same canonical URL."""
+        key = normalize_url(url)
+        if not key:
+            return fetch_fn(url)
+
+        with self._lock:
+            result = self._consume(key)
+            if result is not None:
+                return result
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+
+        if not leader:
+            flight.done.wait()
+            with self._lock:
+                if flight.error is not None:
+                    self._remaining[key] -= 1
+                    if self._remaining[key] <= 0:
+                        self._remaining.pop(key, None)
+                    raise flight.error
+                result = self._consume(key)
+            # Result already handed to every registered venue; fetch it ourselves
+            return result if result is not None else fetch_fn(url)
+
+        result = (None, 'all_failed')
+        try:
+            result = fetch_fn(url)
+            return result
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self.unique_fetches += 1
+                self._remaining[key] -= 1
+                # A failed fetch isn't shared, so venues arriving later try again
+                if self._remaining[key] > 0 and flight.error is None:
+                    self._results[key] = result
+                elif self._remaining[key] <= 0:
+                    self._remaining.pop(key, None)
+                if result[0] and self.max_completed > 0:
+                    self._completed[key] = result
+                    self._completed.move_to_end(key)
+                    while len(self._completed) > self.max_completed:
+                        self._completed.popitem(last=False)
+                del self._inflight[key]
+            flight.done.set()
+
+    def get_summary(self) -> str:
+        """Get a formatted summary of coalescing statistics."""
+        summary = [
+            "FETCH STATISTICS",
+            "=" * 60,
+            f"Unique websites fetched:      {self.unique_fetches}",
+            f"Venues served by shared fetch: {self.coalesced_hits}",
+            f"BrightData calls saved:       {self.brightdata_calls_saved}",
+        ]
+        return "\n".join(summary)
@@ -0,0 +1,149 @@
+"""
+Derived representations of the pipeline CSVs for downloads: gzip, JSON
+Lines and Parquet, each generated once per file version and cached on disk.
+"""
+
+import csv
+import gzip
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+FORMATS = {
+    'csv': {'suffix': '.csv', 'mimetype': 'text/csv', 'compressible': True},
+    'jsonl': {'suffix': '.jsonl', 'mimetype': 'application/x-ndjson', 'compressible': True},
+    'parquet': {'suffix': '.parquet', 'mimetype': 'application/vnd.apache.parquet', 'compressible': False},
+}
+
+
+def file_version(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of `path`, or None if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def version_tag(version: Tuple[int, int]) -> str:
+    """Short token identifying one version of a file; used in ETags and cache names."""
+    return f"{version[0]:x}-{version[1]:x}"
+
+
+class DownloadCache:
+    """
+    Build and cache derived download files under `cache_dir`.
+
+    Each derived file is named after its source and the source's version,
+    written to a temporary name and renamed into place, so concurrent
+    requests never see a partial file. Older versions of the same source
+    are removed when a new one is built.
+    """
+
+    def __init__(self, cache_dir: str = "cache/downloads", compress_level: int = 6):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.compress_level = compress_level
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self.stats = {"built": 0, "reused": 0}
+
+    @staticmethod
+    def supports(fmt: str) -> bool:
+        return fmt in FORMATS and (fmt != 'parquet' or PYARROW_AVAILABLE)
+
+    def _lock_for(self, name: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def _build(self, target: Path, stem: str, writer):
+        """Create `target` with `writer(tmp_path)` unless it already exists."""
+        if target.exists():
+            self.stats["reused"] += 1
+            return target
+        with self._lock_for(target.name):
+            if target.exists():
+                self.stats["reused"] += 1
+                return target
+            tmp = target.with_name(target.name + '.tmp')
+            writer(tmp)
+            os.replace(tmp, target)
+            self.stats["built"] += 1
+        self._remove_stale(stem, target)
+        return target
+
+    def _remove_stale(self, stem: str, keep: Path):
+        current = keep.name.split('.')[1]
+        for path in self.cache_dir.glob(f"{stem}.*"):
+            parts = path.name.split('.')
+            if len(parts) > 2 and parts[1] != current and not path.name.endswith('.tmp'):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def get(self, source: str, fmt: str = 'csv', gzipped: bool = False) -> Tuple[Path, Tuple[int, int]]:
+        """
+        (path, version) of `source` as `fmt` (optionally gzip-compressed)
+        for its current version, building it if needed. CSV without gzip is
+        the source itself. `version` is the one the file was built from, so
+        callers tag the response with it rather than statting again.
+        """
+        if not self.supports(fmt):
+            raise ValueError(f"Unsupported format: {fmt}")
+        version = file_version(source)
+        if version is None:
+            raise FileNotFoundError(source)
+        stem = Path(source).stem
+        base = f"{stem}.{version_tag(version)}"
+
+        if fmt == 'csv':
+            path = Path(source)
+        elif fmt == 'jsonl':
+            path = self._build(self.cache_dir / f"{base}.jsonl", stem,
+                               lambda tmp: self._write_jsonl(source, tmp))
+        else:
+            path = self._build(self.cache_dir / f"{base}.parquet", stem,
+                               lambda tmp: self._write_parquet(source, tmp))
+
+        if gzipped and FORMATS[fmt]['compressible']:
+            path = self._build(self.cache_dir / f"{base}{FORMATS[fmt]['suffix']}.gz", stem,
+                               lambda tmp, src=path: self._write_gzip(src, tmp))
+        return path, version
+
+    def _write_gzip(self, source: Path, target: Path):
+        with open(source, 'rb') as src, gzip.open(target, 'wb', compresslevel=self.compress_level) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+
+    @staticmethod
+    def _write_jsonl(source: str, target: Path):
+        with open(source, 'r', encoding='utf-8', newline='') as src, open(target, 'w', encoding='utf-8') as dst:
+            for row in csv.DictReader(src):
+                dst.write(json.dumps(row, ensure_ascii=False))
+                dst.write('\n')
+
+    @staticmethod
+    def _write_parquet(source: str, target: Path):
+        # Every column stays a string, as in the CSV (postcodes, phone numbers)
+        with open(source, 'r', encoding='utf-8', newline='') as src:
+            reader = csv.DictReader(src)
+            columns = {name: [] for name in reader.fieldnames or []}
+            for row in reader:
+                for name, values in columns.items():
+                    values.append(row.get(name) or '')
+        table = pa.table({name: pa.array(values, type=pa.string()) for name, values in columns.items()})
+        pq.write_table(table, target, compression='snappy')
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats)
@@ -0,0 +1,259 @@
+"""
+Local email pre-screen that settles obviously bad addresses before any
+paid verification call: strict syntax, disposable/placeholder domains and
+MX/A lookups through a cached resolver.
+"""
+
+import json
+import re
+import socket
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    import dns.exception
+    import dns.resolver
+    DNSPYTHON_AVAILABLE = True
+except ImportError:
+    DNSPYTHON_AVAILABLE = False
+
+
+DISPOSABLE_DOMAINS_FILE = Path(__file__).resolve().parent.parent / "config" / "disposable_email_domains.txt"
+
+# Domains people type into forms and templates rather than real mailboxes
+PLACEHOLDER_DOMAINS = {
+    'example.com', 'example.org', 'example.net', 'example.co.uk',
+    'test.com', 'domain.com', 'email.com', 'yourdomain.com', 'yoursite.com',
+    'mysite.com', 'website.com', 'company.com', 'sentry.io', 'localhost',
+}
+
+# RFC 5321/5322 dot-atom local part and LDH domain labels; quoted local
+# parts and IP literals are legal but never real venue contacts
+LOCAL_PART_PATTERN = re.compile(r"^[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*$")
+DOMAIN_LABEL_PATTERN = re.compile(r"^[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?$")
+TLD_PATTERN = re.compile(r"^[A-Za-z]{2,63}$|^xn--[A-Za-z0-9-]{1,59}$")
+
+
+def load_domain_list(path: Path) -> set:
+    """Read a one-domain-per-line list, ignoring blanks and # comments."""
+    if not path.exists():
+        return set()
+    with open(path, 'r', encoding='utf-8') as f:
+        return {line.strip().lower() for line in f if line.strip() and not line.startswith('#')}
+
+
+def check_syntax(email: str) -> Optional[str]:
+    """Return a rejection reason if `email` isn't a plausible address, else None."""
+    if not email or len(email) > 254 or email.count('@') != 1:
+        return 'syntax'
+    local, domain = email.rsplit('@', 1)
+    if not local or len(local) > 64 or not LOCAL_PART_PATTERN.match(local):
+        return 'syntax'
+    labels = domain.split('.')
+    if len(labels) < 2 or not all(DOMAIN_LABEL_PATTERN.match(label) for label in labels):
+        return 'syntax'
+    if not TLD_PATTERN.match(labels[-1]):
+        return 'syntax'
+    return None
+
+
+def _matches(domain: str, domains: set) -> bool:
+    """True if `domain` or any parent domain is in `domains`."""
+    labels = domain.split('.')
+    return any('.'.join(labels[i:]) in domains for i in range(len(labels) - 1))
+
+
+class MailDomainResolver:
+    """
+    Cached MX/A lookups for mail domains.
+
+    Uses dnspython when installed, optionally against a specific nameserver
+    ("host" or "host:port", e.g. a local stub DNS for testing). Without it,
+    falls back to an address lookup via the system resolver, which can
+    confirm a domain but never rule one out.
+    """
+
+    def __init__(self, cache_dir: str = "cache/dns", cache_ttl_days: int = 7,
+                 failure_ttl_days: int = 1, nameserver: Optional[str] = None,
+                 timeout: float = 5.0):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_file = self.cache_dir / "mail_domains.json"
+        self.cache_ttl = timedelta(days=cache_ttl_days)
+        self.failure_ttl = timedelta(days=failure_ttl_days)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "additions": 0}
+        self._resolver = self._build_resolver(nameserver) if DNSPYTHON_AVAILABLE else None
+        self._load_cache()
+
+    def _build_resolver(self, nameserver: Optional[str]):
+        if not nameserver:
+            resolver = dns.resolver.Resolver()
+        else:
+            host, _, port = nameserver.partition(':')
+            resolver = dns.resolver.Resolver(configure=False)
+            resolver.nameservers = [host]
+            if port:
+                resolver.port = int(port)
+        resolver.lifetime = self.timeout
+        return resolver
+
+    def _load_cache(self):
+        """Load existing cache from disk"""
+        self.cache = {}
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, 'r') as f:
+                    self.cache = json.load(f).get("domains", {})
+            except Exception as e:
+                print(f"Error loading DNS cache: {e}")
+                self.cache = {}
+
+    def _save_cache(self):
+        """Save cache to disk"""
+        try:
+            with self._lock:
+                data = {
+                    "domains": dict(self.cache),
+                    "updated": datetime.now().isoformat(),
+                    "version": "1.0"
+                }
+            with open(self.cache_file, 'w') as f:
+                json.dump(data, f, indent=2)
+        except Exception as e:
+            print(f"Error saving DNS cache: {e}")
+
+    def _is_fresh(self, entry: Dict) -> bool:
+        ttl = self.cache_ttl if entry.get("status") == "mail" else self.failure_ttl
+        try:
+            return datetime.now() - datetime.fromisoformat(entry["timestamp"]) < ttl
+        except (KeyError, ValueError):
+            return False
+
+    def _query(self, domain: str, rdtype: str) -> Optional[bool]:
+        """True if records exist, False if the name definitively has none, None if unsure."""
+        try:
+            answer = self._resolver.resolve(domain, rdtype)
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            return False
+        except dns.exception.DNSException:
+            # Timeouts and SERVFAIL say nothing about the domain itself
+            return None
+        if rdtype == 'MX':
+            # RFC 7505 null MX ("0 .") means the domain accepts no mail
+            return any(str(record.exchange) not in ('.', '') for record in answer)
+        return True
+
+    def _lookup(self, domain: str) -> Dict:
+        """Classify `domain` as mail, no_mail or unknown."""
+        if self._resolver:
+            mx = self._query(domain, 'MX')
+            if mx:
+                return {"status": "mail", "via": "mx"}
+            # RFC 5321 delivers to the address record when there is no MX
+            addresses = [self._query(domain, 'A')]
+            if not addresses[0]:
+                addresses.append(self._query(domain, 'AAAA'))
+            if any(addresses):
+                return {"status": "mail", "via": "a"}
+            if mx is False and all(found is False for found in addresses):
+                return {"status": "no_mail", "via": "dns"}
+            return {"status": "unknown", "via": "dns"}
+
+        # The system resolver can't see MX records, so a missing address
+        # proves nothing; only a positive answer is trusted
+        try:
+            socket.getaddrinfo(domain, None)
+            return {"status": "mail", "via": "a"}
+        except (socket.gaierror, UnicodeError):
+            return {"status": "unknown", "via": "a"}
+
+    def check(self, domain: str) -> str:
+        """Return 'mail', 'no_mail' or 'unknown' for `domain`, using the cache."""
+        key = domain.lower().strip('.')
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry and self._is_fresh(entry):
+                self.stats["hits"] += 1
+                return entry["status"]
+            self.stats["misses"] += 1
+
+        entry = self._lookup(key)
+        entry["timestamp"] = datetime.now().isoformat()
+
+        with self._lock:
+            self.cache[key] = entry
+            self.stats["additions"] += 1
+            save_now = self.stats["additions"] % 50 == 0
+        if save_now:
+            self._save_cache()
+        return entry["status"]
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        total = self.stats["hits"] + self.stats["misses"]
+        hit_rate = (self.stats["hits"] / total * 100) if total > 0 else 0
+        return {
+            "total_cached": len(self.cache),
+            "hits": self.stats["hits"],
+            "misses": self.stats["misses"],
+            "hit_rate": f"{hit_rate:.1f}%",
+        }
+
+    def finalize(self):
+        """Save cache when done"""
+        self._save_cache()
+        print(f"\nMail Domain DNS Cache:")
+        for key, value in self.get_stats().items():
+            print(f"  {key}: {value}")
+
+
+class EmailPrescreen:
+    """
+    Settle clearly undeliverable addresses locally. `check` returns
+    (False, reason) for rejects and (True, None) for addresses that still
+    need a real verification.
+    """
+
+    def __init__(self, resolver: Optional[MailDomainResolver] = None,
+                 disposable_domains: Optional[set] = None):
+        self.resolver = resolver
+        self.disposable_domains = (disposable_domains if disposable_domains is not None
+                                   else load_domain_list(DISPOSABLE_DOMAINS_FILE))
+        self._lock = threading.Lock()
+        self.rejections: Dict[str, int] = {}
+        self.passed = 0
+
+    def _reason(self, email: str) -> Optional[str]:
+        email = (email or '').strip()
+        reason = check_syntax(email)
+        if reason:
+            return reason
+
+        domain = email.rsplit('@', 1)[1].lower()
+        if _matches(domain, PLACEHOLDER_DOMAINS):
+            return 'placeholder_domain'
+        if _matches(domain, self.disposable_domains):
+            return 'disposable_domain'
+        if self.resolver and self.resolver.check(domain) == 'no_mail':
+            return 'no_mail_server'
+        return None
+
+    def check(self, email: str) -> Tuple[bool, Optional[str]]:
+        reason = self._reason(email)
+        with self._lock:
+            if reason:
+                self.rejections[reason] = self.rejections.get(reason, 0) + 1
+            else:
+                self.passed += 1
+        return reason is None, reason
+
+    def get_stats(self) -> Dict:
+        return {
+            "passed": self.passed,
+            "rejected": sum(self.rejections.values()),
+            "rejections": dict(self.rejections),
+        }
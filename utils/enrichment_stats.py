@@ -0,0 +1,310 @@
+"""
+Single-pass statistics for any pipeline CSV (coverage, status histograms,
+anomaly samples) and a keyed diff between two runs, cached per file version.
+"""
+
+import csv
+import json
+import os
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from utils.downloads import file_version, version_tag
+from utils.email_prescreen import check_syntax
+
+
+# Bumped when the shape of the statistics changes, invalidating cached results
+STATS_FORMAT = 1
+
+# Columns holding a contact email or phone, depending on which stage wrote the file
+EMAIL_FIELDS = ('email', 'email_found')
+PHONE_FIELDS = ('phone', 'phone_found')
+
+# Categorical columns worth a histogram when present
+HISTOGRAM_FIELDS = ('extraction_status', 'extraction_method', 'business_type', 'email_status', 'email_source')
+
+# Fields compared between runs in a diff
+TRACKED_FIELDS = ('website', 'website_actual', 'email', 'email_found', 'phone_found', 'extraction_status')
+
+# Website hosts that are listings rather than a venue's own site
+LISTING_HOSTS = ('facebook.com', 'tripadvisor', 'instagram.com', 'yell.com', 'google.com')
+
+FILE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.css', '.js')
+
+SAMPLE_SIZE = 5
+
+
+def venue_key(row: Dict[str, str]) -> Tuple[str, str]:
+    """Identity of a venue across runs: (name, postcode) as build_essex dedupes it."""
+    return ((row.get('name') or '').strip().lower(),
+            (row.get('postcode') or '').upper().replace(' ', ''))
+
+
+def first_value(row: Dict[str, str], fields) -> str:
+    for field in fields:
+        value = (row.get(field) or '').strip()
+        if value:
+            return value
+    return ''
+
+
+def iter_rows(path: str) -> Iterator[Dict[str, str]]:
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        yield from csv.DictReader(f)
+
+
+def _is_number(value: str) -> bool:
+    try:
+        float(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+class StatsAccumulator:
+    """Fold rows into statistics one at a time; nothing but venue keys is kept per row."""
+
+    def __init__(self, sample_size: int = SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self.fieldnames: List[str] = []
+        self.total = 0
+        self.non_empty: Counter = Counter()
+        self.with_email = 0
+        self.with_phone = 0
+        self.histograms: Dict[str, Counter] = {field: Counter() for field in HISTOGRAM_FIELDS}
+        self.postcode_areas: Counter = Counter()
+        self.listing_hosts: Counter = Counter()
+        self.anomalies: Dict[str, Dict] = {}
+        self._seen_keys = set()
+
+    def _flag(self, anomaly: str, row: Dict[str, str], detail: str = ''):
+        entry = self.anomalies.setdefault(anomaly, {'count': 0, 'samples': []})
+        entry['count'] += 1
+        if len(entry['samples']) < self.sample_size:
+            entry['samples'].append({'name': row.get('name', ''), 'postcode': row.get('postcode', ''),
+                                     'detail': detail})
+
+    def add(self, row: Dict[str, str]):
+        self.total += 1
+        for field, value in row.items():
+            if field is not None and value and value.strip():
+                self.non_empty[field] += 1
+
+        for field in HISTOGRAM_FIELDS:
+            if field in row:
+                self.histograms[field][(row.get(field) or '').strip() or '(blank)'] += 1
+        postcode = (row.get('postcode') or '').upper().replace(' ', '')
+        area = ''.join(c for c in postcode[:2] if c.isalpha())
+        self.postcode_areas[area or '(blank)'] += 1
+
+        email = first_value(row, EMAIL_FIELDS)
+        if email:
+            self.with_email += 1
+            if email.lower().endswith(FILE_EXTENSIONS) or any(ext + '@' in email.lower() for ext in FILE_EXTENSIONS):
+                self._flag('email_looks_like_file', row, email)
+            elif check_syntax(email):
+                self._flag('email_invalid_syntax', row, email)
+        if first_value(row, PHONE_FIELDS):
+            self.with_phone += 1
+
+        website = (row.get('website') or '').lower()
+        for host in LISTING_HOSTS:
+            if host in website:
+                self.listing_hosts[host] += 1
+                self._flag('website_is_listing', row, row.get('website', ''))
+                break
+
+        if (row.get('extraction_status') or '') == 'failed':
+            self._flag('extraction_failed', row, row.get('extraction_notes', ''))
+        if not postcode:
+            self._flag('missing_postcode', row)
+        if 'lat' in row and not (_is_number(row.get('lat')) and _is_number(row.get('lon'))):
+            self._flag('missing_coordinates', row, f"{row.get('lat', '')},{row.get('lon', '')}")
+
+        key = venue_key(row)
+        if key in self._seen_keys:
+            self._flag('duplicate_venue', row)
+        else:
+            self._seen_keys.add(key)
+
+    def result(self) -> Dict:
+        def pct(count: int) -> float:
+            return round(count * 100 / self.total, 1) if self.total else 0.0
+
+        return {
+            'total': self.total,
+            'with_email': self.with_email,
+            'with_email_pct': pct(self.with_email),
+            'with_phone': self.with_phone,
+            'with_phone_pct': pct(self.with_phone),
+            'coverage': {field: {'count': self.non_empty[field], 'pct': pct(self.non_empty[field])}
+                         for field in self.fieldnames},
+            'histograms': {field: dict(counts.most_common()) for field, counts in self.histograms.items() if counts},
+            'postcode_areas': dict(self.postcode_areas.most_common()),
+            'listing_hosts': dict(self.listing_hosts.most_common()),
+            'anomalies': self.anomalies,
+        }
+
+
+def analyze_file(path: str, sample_size: int = SAMPLE_SIZE) -> Dict:
+    """Statistics for one pipeline CSV in a single streaming pass."""
+    accumulator = StatsAccumulator(sample_size)
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        accumulator.fieldnames = list(reader.fieldnames or [])
+        for row in reader:
+            accumulator.add(row)
+    return accumulator.result()
+
+
+def diff_files(old_path: str, new_path: str, sample_size: int = SAMPLE_SIZE) -> Dict:
+    """
+    Compare two runs keyed by venue. Only the old run's tracked fields are
+    held in memory; the new run is streamed against them.
+    """
+    old: Dict[Tuple[str, str], Dict[str, str]] = {}
+    for row in iter_rows(old_path):
+        old.setdefault(venue_key(row), {
+            'name': row.get('name', ''),
+            'postcode': row.get('postcode', ''),
+            'any_email': first_value(row, EMAIL_FIELDS),
+            **{field: (row.get(field) or '').strip() for field in TRACKED_FIELDS},
+        })
+
+    added = 0
+    unchanged = 0
+    changed: Counter = Counter()
+    transitions: Counter = Counter()
+    gained_email, lost_email = 0, 0
+    samples: Dict[str, List[Dict]] = {}
+    seen = set()
+
+    def sample(kind: str, row: Dict[str, str], detail: str = ''):
+        bucket = samples.setdefault(kind, [])
+        if len(bucket) < sample_size:
+            bucket.append({'name': row.get('name', ''), 'postcode': row.get('postcode', ''), 'detail': detail})
+
+    for row in iter_rows(new_path):
+        key = venue_key(row)
+        if key in seen:
+            continue
+        seen.add(key)
+        before = old.get(key)
+        if before is None:
+            added += 1
+            sample('added', row)
+            continue
+
+        email = first_value(row, EMAIL_FIELDS)
+        if email and not before['any_email']:
+            gained_email += 1
+            sample('gained_email', row, email)
+        elif before['any_email'] and not email:
+            lost_email += 1
+            sample('lost_email', row, before['any_email'])
+
+        differences = [field for field in TRACKED_FIELDS
+                       if field in row and (row.get(field) or '').strip() != before[field]]
+        for field in differences:
+            changed[field] += 1
+        if 'extraction_status' in differences:
+            transitions[f"{before['extraction_status'] or '(blank)'} -> {row['extraction_status'] or '(blank)'}"] += 1
+        if not differences:
+            unchanged += 1
+
+    removed_keys = [key for key in old if key not in seen]
+    for key in removed_keys[:sample_size]:
+        sample('removed', old[key])
+
+    return {
+        'old_file': os.path.basename(old_path),
+        'new_file': os.path.basename(new_path),
+        'old_total': len(old),
+        'new_total': len(seen),
+        'added': added,
+        'removed': len(removed_keys),
+        'unchanged': unchanged,
+        'changed_fields': dict(changed.most_common()),
+        'status_transitions': dict(transitions.most_common()),
+        'gained_email': gained_email,
+        'lost_email': lost_email,
+        'samples': samples,
+    }
+
+
+class StatsCache:
+    """
+    Cache stats and diffs on disk keyed by file version (mtime and size),
+    so a file is only re-read after it changes.
+    """
+
+    def __init__(self, cache_dir: str = "cache/stats"):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_file = self.cache_dir / "enrichment_stats.json"
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+        self._load_cache()
+
+    def _load_cache(self):
+        """Load existing cache from disk"""
+        self.cache = {}
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, 'r') as f:
+                    self.cache = json.load(f).get("entries", {})
+            except Exception as e:
+                print(f"Error loading stats cache: {e}")
+                self.cache = {}
+
+    def _save_cache(self):
+        """Save cache to disk"""
+        try:
+            with self._lock:
+                data = {
+                    "entries": dict(self.cache),
+                    "updated": datetime.now().isoformat(),
+                    "version": "1.0"
+                }
+            with open(self.cache_file, 'w') as f:
+                json.dump(data, f, indent=2)
+        except Exception as e:
+            print(f"Error saving stats cache: {e}")
+
+    def _cached(self, kind: str, paths: List[str], compute) -> Dict:
+        """One entry per kind and file set, valid while every file's version matches."""
+        versions = [file_version(path) for path in paths]
+        if None in versions:
+            raise FileNotFoundError(paths[versions.index(None)])
+        key = f"{kind}:{'|'.join(os.path.abspath(path) for path in paths)}"
+        version = '|'.join([str(STATS_FORMAT)] + [version_tag(v) for v in versions])
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry and entry.get("version") == version:
+                self.stats["hits"] += 1
+                return entry["result"]
+            self.stats["misses"] += 1
+
+        result = compute()
+        result['computed'] = datetime.now().isoformat()
+        with self._lock:
+            self.cache[key] = {"version": version, "result": result}
+        self._save_cache()
+        return result
+
+    def analyze(self, path: str) -> Dict:
+        return self._cached('stats', [path], lambda: analyze_file(path))
+
+    def diff(self, old_path: str, new_path: str) -> Dict:
+        return self._cached('diff', [old_path, new_path], lambda: diff_files(old_path, new_path))
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        return {
+            "total_cached": len(self.cache),
+            "hits": self.stats["hits"],
+            "misses": self.stats["misses"],
+        }
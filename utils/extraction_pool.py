@@ -0,0 +1,70 @@
+"""
+Process pool for CPU-bound parsing, fed by fetch threads with backpressure.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable
+
+
+class ExtractionPool:
+    """
+    Run a picklable function over fetched pages in worker processes.
+
+    At most `max_pending` pages are queued or in progress at once. Fetch
+    threads that submit beyond that block until a slot frees up, so memory
+    stays bounded. `submit` returns a future for the caller to collect
+    later, so a fetch thread moves on to its next page while this one is
+    extracted; `run` waits for the result, for callers whose next step
+    depends on it.
+
+    Workers are spawned rather than forked: the pool is started from a
+    threaded process (the web app), and a forked child can inherit locks
+    held by other threads.
+    """
+
+    def __init__(self, fn: Callable[[str], Any], workers: int, max_pending: int = 0):
+        self.fn = fn
+        self.workers = workers
+        self.max_pending = max_pending or workers * 2
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = ProcessPoolExecutor(max_workers=workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        self.submitted = 0
+        self.blocked_submits = 0
+        self._lock = threading.Lock()
+
+    def submit(self, html: str) -> Future:
+        """Queue `html` for extraction, blocking while the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.blocked_submits += 1
+            self._slots.acquire()
+        try:
+            future = self._executor.submit(self.fn, html)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        with self._lock:
+            self.submitted += 1
+        return future
+
+    def run(self, html: str) -> Any:
+        """Extract `html` in a worker process, blocking the caller until it's done."""
+        return self.submit(html).result()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def get_summary(self) -> str:
+        """Get a formatted summary of extraction pool usage."""
+        return "\n".join([
+            "EXTRACTION POOL",
+            "=" * 60,
+            f"Worker processes:              {self.workers}",
+            f"Max pages queued:              {self.max_pending}",
+            f"Pages extracted:               {self.submitted}",
+            f"Fetches held by backpressure:  {self.blocked_submits}",
+        ])
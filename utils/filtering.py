@@ -2,74 +2,175 @@
 Filtering utilities for the venue enrichment pipeline.
 """
 
-from typing import Dict, List, Tuple
-from config.filters import (
-    should_exclude_business_name,
-    should_exclude_domain,
-    get_filter_reason
-)
+import csv
+import io
+import shutil
+import sys
+import tempfile
+import threading
+from collections import Counter
+from typing import Dict, Optional, Tuple
+from config.filters import get_engine
+
+
+FILTER_TYPES = ('business_name', 'domain', 'property_listing', 'no_website')
+
+LOG_FIELDS = ['venue_name', 'reason', 'filter_type', 'filter_version']
 
 
 class FilterStatistics:
-    """Track filtering statistics throughout the pipeline."""
-    
-    def __init__(self):
-        self.total_processed = 0
-        self.filtered_by_business_name = 0
-        self.filtered_by_domain = 0
-        self.filtered_by_property_listing = 0
-        self.filtered_no_website = 0
-        self.passed_all_filters = 0
-        self.filter_log = []
-    
-    def log_filter(self, venue_name: str, reason: str, filter_type: str):
-        """Log a filtered venue."""
-        self.filter_log.append({
-            'venue_name': venue_name,
-            'reason': reason,
-            'filter_type': filter_type
-        })
-        
-        if filter_type == 'business_name':
-            self.filtered_by_business_name += 1
-        elif filter_type == 'domain':
-            self.filtered_by_domain += 1
-        elif filter_type == 'property_listing':
-            self.filtered_by_property_listing += 1
-        elif filter_type == 'no_website':
-            self.filtered_no_website += 1
-    
+    """
+    Track filtering statistics throughout the pipeline.
+
+    Filtered venues are written to the log as they happen, in batches of
+    `buffer_size`, rather than held in memory: to `log_path` if given (the
+    file is created on the first batch), otherwise to a temporary spool
+    that `save_log` copies out. Counters are kept per filter type and per
+    reason under a lock, so enrichers may log from worker threads. For
+    work split across processes, each process keeps its own instance and
+    the parent folds in their `snapshot()`s with `merge`.
+    """
+
+    def __init__(self, log_path: Optional[str] = None, buffer_size: int = 500):
+        self.log_path = log_path
+        self.buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._total_processed = 0
+        self._passed_all_filters = 0
+        self._by_type: Counter = Counter()
+        # Reasons repeat endlessly ("No website", a handful of filter reasons),
+        # so each distinct reason is interned once and counted
+        self._by_reason: Counter = Counter()
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._buffered = 0
+        self._log_file = None
+        self._log_started = False
+        self.logged = 0
+
+    @property
+    def total_processed(self) -> int:
+        return self._total_processed
+
+    @property
+    def passed_all_filters(self) -> int:
+        return self._passed_all_filters
+
+    @property
+    def filtered_by_business_name(self) -> int:
+        return self._by_type['business_name']
+
+    @property
+    def filtered_by_domain(self) -> int:
+        return self._by_type['domain']
+
+    @property
+    def filtered_by_property_listing(self) -> int:
+        return self._by_type['property_listing']
+
+    @property
+    def filtered_no_website(self) -> int:
+        return self._by_type['no_website']
+
+    def log_filter(self, venue_name: str, reason: str, filter_type: str, filter_version: str = ''):
+        """Log a filtered venue, with the filter version that decided it if known."""
+        reason = sys.intern(reason)
+        with self._lock:
+            self._by_reason[reason] += 1
+            if filter_type in FILTER_TYPES:
+                self._by_type[filter_type] += 1
+            self._writer.writerow((venue_name, reason, filter_type, filter_version))
+            self._buffered += 1
+            self.logged += 1
+            if self._buffered >= self.buffer_size:
+                self._flush()
+
+    def _flush(self):
+        """Write buffered log rows out in one write. Caller holds the lock."""
+        if not self._buffered:
+            return
+        if self._log_file is None:
+            if not self.log_path:
+                self._log_file = tempfile.TemporaryFile('w+', newline='', encoding='utf-8')
+            elif self._log_started:
+                # Logging again after save_log: carry on from where it ended
+                self._log_file = open(self.log_path, 'a+', newline='', encoding='utf-8')
+            else:
+                self._log_file = open(self.log_path, 'w+', newline='', encoding='utf-8')
+            if not self._log_started:
+                csv.writer(self._log_file).writerow(LOG_FIELDS)
+            self._log_started = True
+        self._log_file.write(self._buffer.getvalue())
+        self._log_file.flush()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._buffered = 0
+
+    def flush(self):
+        """Write any buffered log rows to disk."""
+        with self._lock:
+            self._flush()
+
     def process_venue(self, venue: Dict[str, str]) -> Tuple[bool, str]:
         """
         Process a venue and determine if it should be filtered.
+        Records the deciding filter version in venue['filter_version'].
         Returns: (should_continue, filter_reason)
         """
-        self.total_processed += 1
-        
+        with self._lock:
+            self._total_processed += 1
+
         name = venue.get('name', '')
         website = venue.get('website', '')
-        
+        # One engine for both checks, even if the filters reload meanwhile
+        engine = get_engine()
+        venue['filter_version'] = engine.version
+
         # Check business name
-        if should_exclude_business_name(name):
-            reason = get_filter_reason(name=name)
-            self.log_filter(name, reason, 'business_name')
-            return False, reason
-        
+        decision = engine.check_name(name)
+        if decision.excluded:
+            self.log_filter(name, decision.reason, decision.filter_type, engine.version)
+            return False, decision.reason
+
         # Check if has website
         if not website:
-            self.log_filter(name, 'No website', 'no_website')
+            self.log_filter(name, 'No website', 'no_website', engine.version)
             return False, 'No website'
-        
+
         # Check domain
-        if should_exclude_domain(website):
-            reason = get_filter_reason(url=website)
-            filter_type = 'property_listing' if 'property' in reason.lower() else 'domain'
-            self.log_filter(name, reason, filter_type)
-            return False, reason
-        
-        self.passed_all_filters += 1
+        decision = engine.check_url(website)
+        if decision.excluded:
+            self.log_filter(name, decision.reason, decision.filter_type, engine.version)
+            return False, decision.reason
+
+        with self._lock:
+            self._passed_all_filters += 1
         return True, ''
-    
+
+    def reason_counts(self) -> Dict[str, int]:
+        """Filtered venues per reason, most common first."""
+        with self._lock:
+            return dict(self._by_reason.most_common())
+
+    def snapshot(self) -> Dict:
+        """Counters as plain data, picklable for sending back from a worker process."""
+        with self._lock:
+            return {
+                'total_processed': self._total_processed,
+                'passed_all_filters': self._passed_all_filters,
+                'by_type': dict(self._by_type),
+                'by_reason': dict(self._by_reason),
+            }
+
+    def merge(self, snapshot: Dict):
+        """Add another instance's counters (from `snapshot`) into this one."""
+        with self._lock:
+            self._total_processed += snapshot.get('total_processed', 0)
+            self._passed_all_filters += snapshot.get('passed_all_filters', 0)
+            self._by_type.update(snapshot.get('by_type', {}))
+            for reason, count in snapshot.get('by_reason', {}).items():
+                self._by_reason[sys.intern(reason)] += count
+
     def get_summary(self) -> str:
         """Get a formatted summary of filter statistics."""
         summary = [
@@ -85,13 +186,34 @@ class FilterStatistics:
             f"Total filtered:                {self.total_processed - self.passed_all_filters}",
             f"Pass rate:                     {self.passed_all_filters / self.total_processed * 100:.1f}%" if self.total_processed > 0 else "N/A"
         ]
+        reasons = self.reason_counts()
+        if reasons:
+            summary.append("-" * 60)
+            summary.append("By reason:")
+            summary.extend(f"  {reason:<36} {count}" for reason, count in reasons.items())
         return "\n".join(summary)
-    
+
     def save_log(self, filepath: str):
-        """Save detailed filter log to file."""
-        import csv
-        with open(filepath, 'w', newline='', encoding='utf-8') as f:
-            if self.filter_log:
-                writer = csv.DictWriter(f, fieldnames=['venue_name', 'reason', 'filter_type'])
-                writer.writeheader()
-                writer.writerows(self.filter_log)
\ No newline at end of file
+        """
+        Finish the filter log and make sure it is at `filepath`: flushes
+        and closes the log file if that is where it was being written,
+        otherwise copies the spool there.
+        """
+        with self._lock:
+            self._flush()
+            if self._log_file is None:
+                if not (self.log_path and self.log_path == filepath and self._log_started):
+                    # Nothing logged; leave an empty file as before
+                    open(filepath, 'w').close()
+                return
+            if self.log_path and self.log_path == filepath:
+                self._log_file.close()
+            else:
+                self._log_file.seek(0)
+                with open(filepath, 'w', newline='', encoding='utf-8') as f:
+                    shutil.copyfileobj(self._log_file, f)
+                self._log_file.close()
+            self._log_file = None
+            if not self.log_path:
+                # The spool is gone; a later save starts a fresh one
+                self._log_started = False
@@ -0,0 +1,129 @@
+"""
+Per-host latency and outcome tracking for adaptive fetch timeouts.
+"""
+
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+import requests
+
+
+# Failures that mean the site is gone rather than slow or flaky
+DEAD_HOST_THRESHOLDS = {
+    'dns': 1,
+    'connection': 2,
+}
+
+
+def classify_error(error: Exception) -> str:
+    """Map a fetch exception to an outcome: 'dns', 'connection', 'timeout' or 'error'."""
+    message = str(error)
+    if isinstance(error, requests.exceptions.Timeout) or 'timeout' in message.lower():
+        return 'timeout'
+    if 'NameResolutionError' in message or 'Name or service not known' in message \
+            or 'getaddrinfo failed' in message or 'nodename nor servname' in message:
+        return 'dns'
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return 'connection'
+    return 'error'
+
+
+class HostRecord:
+    """Latency samples and failure streaks for one host."""
+
+    def __init__(self, window: int):
+        self.latencies = {}
+        self.window = window
+        self.successes = 0
+        self.failures = {}
+        self.consecutive_failures = {}
+        self.last_failure = None
+
+    def samples(self, tier: str) -> deque:
+        if tier not in self.latencies:
+            self.latencies[tier] = deque(maxlen=self.window)
+        return self.latencies[tier]
+
+
+class HostHealth:
+    """
+    Track per-host fetch latency and outcomes.
+
+    Timeouts are set from the observed latency percentile for the host and
+    tier, and hosts with DNS or repeated connection failures are reported as
+    dead so callers can stop spending worker time on them.
+    """
+
+    def __init__(self, percentile: float = 0.95, headroom: float = 1.5,
+                 min_timeout: float = 5.0, min_samples: int = 3, window: int = 20):
+        self.percentile = percentile
+        self.headroom = headroom
+        self.min_timeout = min_timeout
+        self.min_samples = min_samples
+        self.window = window
+        self._hosts: Dict[str, HostRecord] = {}
+        self._lock = threading.Lock()
+        self.stats = {'dead_host_skips': 0}
+
+    def _record(self, host: str) -> HostRecord:
+        host = host.lower()
+        if host not in self._hosts:
+            self._hosts[host] = HostRecord(self.window)
+        return self._hosts[host]
+
+    def record_success(self, host: str, tier: str, latency: float):
+        """Record a successful fetch and its latency."""
+        with self._lock:
+            record = self._record(host)
+            record.samples(tier).append(latency)
+            record.successes += 1
+            record.consecutive_failures.clear()
+
+    def record_failure(self, host: str, tier: str, outcome: str, latency: Optional[float] = None):
+        """Record a failed fetch; timeouts also count as a latency sample."""
+        with self._lock:
+            record = self._record(host)
+            record.failures[outcome] = record.failures.get(outcome, 0) + 1
+            record.consecutive_failures[outcome] = record.consecutive_failures.get(outcome, 0) + 1
+            record.last_failure = outcome
+            if outcome == 'timeout' and latency is not None:
+                record.samples(tier).append(latency)
+
+    def last_failure(self, host: str) -> Optional[str]:
+        """Outcome of the most recent failed fetch for `host`, if any."""
+        with self._lock:
+            record = self._hosts.get(host.lower())
+            return record.last_failure if record else None
+
+    @staticmethod
+    def _is_dead(record: Optional[HostRecord]) -> bool:
+        if not record:
+            return False
+        return any(record.consecutive_failures.get(outcome, 0) >= threshold
+                   for outcome, threshold in DEAD_HOST_THRESHOLDS.items())
+
+    def is_dead(self, host: str) -> bool:
+        """True once a host has hit a DNS or connection failure threshold with no success since."""
+        with self._lock:
+            return self._is_dead(self._hosts.get(host.lower()))
+    
+    def record_skip(self, host: str):
+        """Count a fetch not made because `host` is dead."""
+        with self._lock:
+            self.stats['dead_host_skips'] += 1
+
+    def timeout_for(self, host: str, tier: str, default: float) -> float:
+        """Timeout for the next fetch: observed percentile plus headroom, capped at `default`."""
+        with self._lock:
+            record = self._hosts.get(host.lower())
+            samples = sorted(record.latencies.get(tier, ())) if record else []
+        if len(samples) < self.min_samples:
+            return default
+        index = min(len(samples) - 1, int(len(samples) * self.percentile))
+        return max(self.min_timeout, min(default, samples[index] * self.headroom))
+
+    def dead_hosts(self) -> int:
+        """Number of hosts currently considered dead."""
+        with self._lock:
+            return sum(1 for record in self._hosts.values() if self._is_dead(record))
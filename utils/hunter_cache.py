@@ -0,0 +1,176 @@
+"""
+Persistent cache of Hunter API responses so reruns don't re-spend credits.
+"""
+
+import json
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+
+# Days to keep each kind of answer. Definitive answers change slowly;
+# inconclusive ones are worth asking again soon.
+SEARCH_TTL_DAYS = {
+    'found': 30,
+    'empty': 7,
+}
+
+VERIFY_TTL_DAYS = {
+    'deliverable': 60,
+    'valid': 60,
+    'undeliverable': 60,
+    'invalid': 60,
+    'risky': 14,
+    'accept_all': 14,
+    'webmail': 60,
+    'disposable': 60,
+    'unknown': 1,
+    'unverifiable': 1,
+}
+
+DEFAULT_TTL_DAYS = 7
+
+
+class HunterCache:
+    """
+    TTL cache of full Hunter payloads: domain searches keyed by domain and
+    verifications keyed by email, each expiring according to its result status.
+    """
+
+    def __init__(self, cache_dir: str = "cache/hunter",
+                 search_ttl_days: Optional[Dict[str, float]] = None,
+                 verify_ttl_days: Optional[Dict[str, float]] = None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_file = self.cache_dir / "hunter_responses.json"
+        self.search_ttl_days = {**SEARCH_TTL_DAYS, **(search_ttl_days or {})}
+        self.verify_ttl_days = {**VERIFY_TTL_DAYS, **(verify_ttl_days or {})}
+        self._lock = threading.Lock()
+        self.stats = {"search_hits": 0, "verify_hits": 0, "misses": 0, "additions": 0}
+        self._load_cache()
+
+    def _load_cache(self):
+        """Load existing cache from disk"""
+        self.searches = {}
+        self.verifications = {}
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, 'r') as f:
+                    data = json.load(f)
+                self.searches = data.get("searches", {})
+                self.verifications = data.get("verifications", {})
+            except Exception as e:
+                print(f"Error loading Hunter cache: {e}")
+
+    def _save_cache(self):
+        """Save cache to disk"""
+        try:
+            with self._lock:
+                data = {
+                    "searches": dict(self.searches),
+                    "verifications": dict(self.verifications),
+                    "updated": datetime.now().isoformat(),
+                    "version": "1.0"
+                }
+            with open(self.cache_file, 'w') as f:
+                json.dump(data, f, indent=2)
+        except Exception as e:
+            print(f"Error saving Hunter cache: {e}")
+
+    @staticmethod
+    def search_status(data: Dict) -> str:
+        return 'found' if data.get('emails') else 'empty'
+
+    @staticmethod
+    def verify_status(data: Dict) -> str:
+        return data.get('status') or data.get('result') or 'unknown'
+
+    def _is_fresh(self, entry: Dict, ttl_days: Dict[str, float]) -> bool:
+        ttl = timedelta(days=ttl_days.get(entry.get("status"), DEFAULT_TTL_DAYS))
+        try:
+            return datetime.now() - datetime.fromisoformat(entry["timestamp"]) < ttl
+        except (KeyError, ValueError):
+            return False
+
+    def _fresh_search(self, domain: str, limit: int) -> Optional[Dict]:
+        entry = self.searches.get(domain.lower())
+        if entry and entry.get("limit", 0) >= limit and self._is_fresh(entry, self.search_ttl_days):
+            return entry
+        return None
+
+    def has_search(self, domain: str, limit: int = 10) -> bool:
+        """Whether a fresh search for `domain` is cached (doesn't count as a hit)."""
+        with self._lock:
+            return self._fresh_search(domain, limit) is not None
+
+    def get_search(self, domain: str, limit: int = 10) -> Optional[Dict]:
+        """Cached domain-search payload for `domain`, or None."""
+        with self._lock:
+            entry = self._fresh_search(domain, limit)
+            if entry:
+                self.stats["search_hits"] += 1
+                return entry["data"]
+            self.stats["misses"] += 1
+        return None
+
+    def set_search(self, domain: str, limit: int, data: Dict):
+        self._store(self.searches, domain, {
+            "data": data, "limit": limit, "status": self.search_status(data),
+        })
+
+    def has_verification(self, email: str) -> bool:
+        """Whether a fresh verification for `email` is cached (doesn't count as a hit)."""
+        with self._lock:
+            entry = self.verifications.get(email.lower())
+            return bool(entry) and self._is_fresh(entry, self.verify_ttl_days)
+
+    def get_verification(self, email: str) -> Optional[Dict]:
+        """Cached verifier payload for `email`, or None."""
+        with self._lock:
+            entry = self.verifications.get(email.lower())
+            if entry and self._is_fresh(entry, self.verify_ttl_days):
+                self.stats["verify_hits"] += 1
+                return entry["data"]
+            self.stats["misses"] += 1
+        return None
+
+    def set_verification(self, email: str, data: Dict):
+        self._store(self.verifications, email, {
+            "data": data, "status": self.verify_status(data),
+        })
+
+    def _store(self, table: Dict, key: str, entry: Dict):
+        entry["timestamp"] = datetime.now().isoformat()
+        with self._lock:
+            table[key.lower()] = entry
+            self.stats["additions"] += 1
+            save_now = self.stats["additions"] % 50 == 0
+        if save_now:
+            self._save_cache()
+
+    @property
+    def credits_saved(self) -> int:
+        """Each cache hit is one request that would otherwise have cost a credit."""
+        return self.stats["search_hits"] + self.stats["verify_hits"]
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        total = self.credits_saved + self.stats["misses"]
+        hit_rate = (self.credits_saved / total * 100) if total > 0 else 0
+        return {
+            "cached_searches": len(self.searches),
+            "cached_verifications": len(self.verifications),
+            "search_hits": self.stats["search_hits"],
+            "verify_hits": self.stats["verify_hits"],
+            "misses": self.stats["misses"],
+            "hit_rate": f"{hit_rate:.1f}%",
+            "credits_saved": self.credits_saved,
+        }
+
+    def finalize(self):
+        """Save cache when done"""
+        self._save_cache()
+        print(f"\nHunter Response Cache:")
+        for key, value in self.get_stats().items():
+            print(f"  {key}: {value}")
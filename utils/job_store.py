@@ -0,0 +1,184 @@
+"""
+Persistent, bounded store for web UI job history and logs (SQLite).
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created TEXT NOT NULL,
+    finished TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_created_id ON jobs (created, id);
+CREATE INDEX IF NOT EXISTS jobs_stage_created ON jobs (stage, created);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created);
+CREATE TABLE IF NOT EXISTS job_logs (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    ts TEXT NOT NULL,
+    line TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+class JobStore:
+    """
+    Job snapshots and log lines in an embedded SQLite database.
+
+    Retention is bounded: each job keeps its last `max_log_lines` log
+    lines, long lines and results are truncated, and every `prune_every`
+    finished jobs (and at startup) everything but the newest `max_jobs`
+    jobs younger than `max_age_days` is dropped.
+    """
+
+    def __init__(self, path: str = "cache/jobs.sqlite3", max_jobs: int = 500,
+                 max_age_days: int = 30, max_log_lines: int = 2000,
+                 max_line_chars: int = 2000, max_result_chars: int = 200_000,
+                 prune_every: int = 50):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_jobs = max_jobs
+        self.max_age = timedelta(days=max_age_days)
+        self.max_log_lines = max_log_lines
+        self.max_line_chars = max_line_chars
+        self.max_result_chars = max_result_chars
+        self.prune_every = max(1, prune_every)
+        self._finished_since_prune = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        self._mark_interrupted()
+        self.prune()
+
+    def _mark_interrupted(self):
+        """Jobs still active in the store were running when the server last stopped."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, data FROM jobs WHERE status IN (?, ?)", ACTIVE_STATUSES
+            ).fetchall()
+        for row in rows:
+            job = json.loads(row['data'])
+            job.update(status='failed', message='Interrupted by server restart',
+                       finished=job.get('finished') or datetime.now().isoformat())
+            self.save(job)
+
+    def _encode(self, job: Dict[str, Any]) -> str:
+        data = json.dumps(job, default=str)
+        if len(data) > self.max_result_chars:
+            # Keep the metadata and drop the oversized result fields
+            core = {k: job.get(k) for k in ('task_id', 'stage', 'status', 'progress', 'message',
+                                            'created', 'started', 'finished')}
+            core['result_truncated'] = True
+            data = json.dumps(core, default=str)
+        return data
+
+    def save(self, job: Dict[str, Any]):
+        """Insert or update a job snapshot (as produced by Job.to_dict)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, stage, status, created, finished, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job['task_id'], job['stage'], job['status'], job['created'],
+                 job.get('finished'), self._encode(job)),
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row['data']) if row else None
+
+    def list(self, stage: Optional[str] = None, status: Optional[str] = None,
+             limit: int = 50, before: Optional[str] = None,
+             before_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Newest jobs first, optionally filtered. Pass the last job's `created`
+        as `before` and its `task_id` as `before_id` for the next page; jobs
+        created in the same instant are ordered by id, so none are skipped.
+        """
+        clauses, params = [], []
+        if stage:
+            clauses.append("stage = ?")
+            params.append(stage)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if before and before_id:
+            clauses.append("(created < ? OR (created = ? AND id < ?))")
+            params.extend((before, before, before_id))
+        elif before:
+            clauses.append("created < ?")
+            params.append(before)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(max(1, min(limit, 500)))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT data FROM jobs {where} ORDER BY created DESC, id DESC LIMIT ?", params
+            ).fetchall()
+        return [json.loads(row['data']) for row in rows]
+
+    def append_log(self, job_id: str, line: str):
+        """Add a log line, truncating it and rotating out the job's oldest lines."""
+        line = line if len(line) <= self.max_line_chars else line[:self.max_line_chars] + '… [truncated]'
+        with self._lock, self._conn:
+            seq = self._conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) + 1 FROM job_logs WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+            self._conn.execute(
+                "INSERT INTO job_logs (job_id, seq, ts, line) VALUES (?, ?, ?, ?)",
+                (job_id, seq, datetime.now().isoformat(), line),
+            )
+            if seq > self.max_log_lines:
+                self._conn.execute(
+                    "DELETE FROM job_logs WHERE job_id = ? AND seq <= ?",
+                    (job_id, seq - self.max_log_lines),
+                )
+
+    def logs(self, job_id: str, limit: int = 200) -> List[Dict[str, Any]]:
+        """The job's most recent log lines, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, ts, line FROM job_logs WHERE job_id = ? ORDER BY seq DESC LIMIT ?",
+                (job_id, max(1, limit)),
+            ).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    def job_finished(self):
+        """Note a finished job; prunes once every `prune_every` of them."""
+        with self._lock:
+            self._finished_since_prune += 1
+            due = self._finished_since_prune >= self.prune_every
+            if due:
+                self._finished_since_prune = 0
+        if due:
+            self.prune()
+
+    def prune(self):
+        """Drop finished jobs (and their logs) beyond the count and age limits."""
+        cutoff = (datetime.now() - self.max_age).isoformat()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status NOT IN (?, ?) AND (created < ? OR id NOT IN "
+                "(SELECT id FROM jobs ORDER BY created DESC, id DESC LIMIT ?))",
+                (*ACTIVE_STATUSES, cutoff, self.max_jobs),
+            )
+            self._conn.execute("DELETE FROM job_logs WHERE job_id NOT IN (SELECT id FROM jobs)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
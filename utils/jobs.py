@@ -0,0 +1,307 @@
+"""
+In-process job engine for the web UI: a bounded worker pool that runs
+pipeline stages directly, at most one job per stage at a time, with
+progress reporting and cooperative cancellation.
+"""
+
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.job_store import JobStore
+
+
+# Progress is written to the store at most this often; status changes always are
+PERSIST_INTERVAL_SECONDS = 2.0
+
+
+class JobCancelled(Exception):
+    """Raised inside a stage when its job has been cancelled."""
+
+
+class StageBusy(RuntimeError):
+    """A job for this stage is already queued or running."""
+
+    def __init__(self, stage: str, job_id: str):
+        super().__init__(f"A {stage} job is already active ({job_id})")
+        self.stage = stage
+        self.job_id = job_id
+
+
+class Job:
+    """One run of a pipeline stage."""
+
+    def __init__(self, stage: str, listener: Optional[Callable[['Job', bool], None]] = None):
+        self.id = str(uuid.uuid4())
+        self.stage = stage
+        self.status = 'queued'
+        self.progress = 0
+        self.message = 'Queued'
+        self.result: Dict[str, Any] = {}
+        self.done = 0
+        self.total = 0
+        self.rate: Optional[float] = None
+        self.eta_seconds: Optional[float] = None
+        self.created = datetime.now().isoformat()
+        self.started: Optional[str] = None
+        self.finished: Optional[str] = None
+        self._started_at: Optional[float] = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        # Bumped on every change; subscribers wait on the condition for it to move
+        self.version = 0
+        self._changed = threading.Condition(self._lock)
+        # Called after each change with (job, is_status_change)
+        self._listener = listener
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def report(self, done: int = 0, total: int = 0, message: str = ''):
+        """
+        Progress callback handed to stage functions as `progress`.
+
+        Stages call it as they go; it is also the cancellation point, so
+        a cancelled job stops at the stage's next progress report.
+        """
+        if self._cancel.is_set():
+            raise JobCancelled(f"Job {self.id} cancelled")
+        with self._lock:
+            if total:
+                if total != self.total or done < self.done:
+                    # A new phase with its own count restarts the rate clock
+                    self._started_at = time.monotonic()
+                self.done, self.total = done, total
+                self.progress = min(99, int(done * 100 / total))
+                elapsed = time.monotonic() - self._started_at
+                if done and elapsed > 0:
+                    self.rate = round(done / elapsed, 2)
+                    self.eta_seconds = round((total - done) / self.rate, 1)
+            if message:
+                self.message = message
+            self._touch()
+        if self._listener:
+            self._listener(self, False)
+
+    def _touch(self):
+        """Record a change and wake subscribers; caller holds the lock."""
+        self.version += 1
+        self._changed.notify_all()
+
+    def update(self, **fields):
+        """Set job fields (status, message, ...) and notify subscribers."""
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self._touch()
+        if self._listener:
+            self._listener(self, True)
+
+    def wait_for_change(self, version: int, timeout: float) -> Tuple[int, Dict[str, Any]]:
+        """
+        Block until the job has moved past `version` (or `timeout` elapses)
+        and return (current_version, snapshot). Many subscribers can wait on
+        one job at no cost until something actually changes.
+        """
+        with self._lock:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version, self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {
+            'task_id': self.id,
+            'stage': self.stage,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'done': self.done,
+            'total': self.total,
+            'rate': self.rate,
+            'eta_seconds': self.eta_seconds,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            **self.result,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._snapshot()
+
+
+class JobEngine:
+    """
+    Run stage functions on a bounded thread pool, one active job per stage.
+
+    Only queued and running jobs are held in memory. With a JobStore,
+    snapshots and a log of each job's progress are persisted and finished
+    jobs are looked up from the store; without one, the most recent
+    `max_finished` finished jobs are kept in memory.
+    """
+
+    def __init__(self, max_workers: int = 2, store: Optional[JobStore] = None,
+                 max_finished: int = 100, conflicts: Optional[Dict[str, Tuple[str, ...]]] = None):
+        self.max_workers = max_workers
+        self.store = store
+        self.max_finished = max_finished
+        # Stages that can't run alongside a stage (e.g. a whole-pipeline run
+        # and any single stage writing the same files); applied both ways
+        self.conflicts: Dict[str, set] = {}
+        for stage, others in (conflicts or {}).items():
+            for other in others:
+                self.conflicts.setdefault(stage, set()).add(other)
+                self.conflicts.setdefault(other, set()).add(stage)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs: Dict[str, Job] = {}
+        self._finished: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._futures: Dict[str, Future] = {}
+        self._active: Dict[str, str] = {}
+        self._persisted_at: Dict[str, float] = {}
+        self._logged_message: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _on_change(self, job: Job, status_change: bool):
+        """Persist job snapshots and log lines, throttling plain progress updates."""
+        if not self.store:
+            return
+        now = time.monotonic()
+        if not status_change and now - self._persisted_at.get(job.id, 0) < PERSIST_INTERVAL_SECONDS:
+            return
+        self._persisted_at[job.id] = now
+        snapshot = job.to_dict()
+        self.store.save(snapshot)
+        line = f"[{snapshot['status']}] {snapshot['message']}"
+        if snapshot['total']:
+            line += f" ({snapshot['done']}/{snapshot['total']})"
+        if self._logged_message.get(job.id) != line:
+            self._logged_message[job.id] = line
+            self.store.append_log(job.id, line)
+
+    def log(self, job_id: str, line: str):
+        """Append a line to a job's persisted log."""
+        if self.store:
+            self.store.append_log(job_id, line)
+
+    def submit(self, stage: str, fn: Callable[..., Optional[Dict]], *args, **kwargs) -> Job:
+        """
+        Queue `fn(*args, progress=job.report, **kwargs)` as a job for `stage`.
+
+        `fn` may return a dict of extra fields to expose on the job (record
+        counts, reports). Raises StageBusy if `stage`, or a stage that
+        conflicts with it, already has a job.
+        """
+        with self._lock:
+            for busy in [stage, *sorted(self.conflicts.get(stage, ()))]:
+                active_id = self._active.get(busy)
+                if active_id:
+                    raise StageBusy(busy, active_id)
+            job = Job(stage, listener=self._on_change)
+            self._jobs[job.id] = job
+            self._active[stage] = job.id
+            self._futures[job.id] = self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn: Callable, args, kwargs):
+        final = {}
+        try:
+            if job.cancelled:
+                raise JobCancelled(f"Job {job.id} cancelled")
+            job._started_at = time.monotonic()
+            job.update(status='running', message='Starting...', started=datetime.now().isoformat())
+            result = dict(fn(*args, progress=job.report, **kwargs) or {})
+            final = {'status': 'completed', 'progress': 100, 'eta_seconds': 0,
+                     'message': result.pop('message', f'{job.stage} completed'), 'result': result}
+        except JobCancelled:
+            final = {'status': 'cancelled', 'message': 'Cancelled'}
+        except Exception as e:
+            traceback.print_exc()
+            self.log(job.id, traceback.format_exc())
+            final = {'status': 'failed', 'message': f'Error: {e}'}
+        finally:
+            # Free the stage before subscribers hear the job finished
+            with self._lock:
+                if self._active.get(job.stage) == job.id:
+                    del self._active[job.stage]
+                self._futures.pop(job.id, None)
+            job.update(finished=datetime.now().isoformat(), **final)
+            self._retire(job)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """The live Job if it is still queued or running."""
+        return self._jobs.get(job_id)
+
+    def lookup(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Snapshot of any known job, live or finished."""
+        job = self._jobs.get(job_id)
+        if job:
+            return job.to_dict()
+        if self.store:
+            return self.store.get(job_id)
+        return self._finished.get(job_id)
+
+    def list(self, stage: Optional[str] = None, status: Optional[str] = None,
+             limit: int = 50, before: Optional[str] = None,
+             before_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Newest jobs first, with live progress for jobs still running. Page
+        with the last job's `created` and `task_id` as `before`/`before_id`.
+        """
+        if self.store:
+            jobs = self.store.list(stage, status, limit, before, before_id)
+            live = {job_id: job.to_dict() for job_id, job in list(self._jobs.items())}
+            return [live.get(job['task_id'], job) for job in jobs]
+        jobs = [job.to_dict() for job in list(self._jobs.values())] + list(reversed(self._finished.values()))
+        jobs = [j for j in jobs
+                if (not stage or j['stage'] == stage) and (not status or j['status'] == status)
+                and (not before or (j['created'], j['task_id']) < (before, before_id or ''))]
+        jobs.sort(key=lambda j: (j['created'], j['task_id']), reverse=True)
+        return jobs[:limit]
+
+    def logs(self, job_id: str, limit: int = 200) -> List[Dict[str, Any]]:
+        return self.store.logs(job_id, limit) if self.store else []
+
+    def cancel(self, job_id: str) -> bool:
+        """Request cancellation; queued jobs never start, running ones stop at their next progress report."""
+        job = self._jobs.get(job_id)
+        if not job or job.status not in ('queued', 'running'):
+            return False
+        job._cancel.set()
+        with self._lock:
+            future = self._futures.get(job_id)
+            never_started = bool(future and future.cancel())
+            if never_started:
+                # Free the stage now rather than when a worker frees up
+                del self._futures[job_id]
+                if self._active.get(job.stage) == job_id:
+                    del self._active[job.stage]
+        if never_started:
+            job.update(status='cancelled', message='Cancelled', finished=datetime.now().isoformat())
+            self._retire(job)
+        return True
+
+    def _retire(self, job: Job):
+        """Move a finished job out of memory (into the store or a bounded history)."""
+        snapshot = job.to_dict()
+        with self._lock:
+            self._jobs.pop(job.id, None)
+            self._persisted_at.pop(job.id, None)
+            self._logged_message.pop(job.id, None)
+            if not self.store:
+                self._finished[job.id] = snapshot
+                while len(self._finished) > self.max_finished:
+                    self._finished.popitem(last=False)
+        if self.store:
+            self.store.job_finished()
+
+    def shutdown(self):
+        for job_id in list(self._jobs):
+            self.cancel(job_id)
+        self._executor.shutdown(wait=True)
+        if self.store:
+            self.store.close()
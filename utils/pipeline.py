@@ -0,0 +1,99 @@
+"""
+Declared dataflow of the enrichment pipeline and the row stream that lets
+one stage hand finished rows to the next while it is still running.
+"""
+
+import queue
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class Stage:
+    """One pipeline stage: the file it reads and the file it writes."""
+
+    def __init__(self, name: str, input_file: Optional[str], output_file: str, streams_to_next: bool = False):
+        self.name = name
+        self.input_file = input_file
+        self.output_file = output_file
+        # Rows can flow to the next stage one at a time rather than via the file
+        self.streams_to_next = streams_to_next
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, {self.input_file!r} -> {self.output_file!r})"
+
+
+STAGES = [
+    Stage('seed', None, 'essex_licensed_venues.csv'),
+    Stage('google', 'essex_licensed_venues.csv', 'essex_venues_google.csv', streams_to_next=True),
+    Stage('scrape', 'essex_venues_google.csv', 'essex_venues_enriched.csv'),
+    Stage('verify', 'essex_venues_enriched.csv', 'essex_venues_hunter_enriched.csv'),
+]
+
+# Each stage reads exactly what the one before it writes
+for _previous, _stage in zip(STAGES, STAGES[1:]):
+    assert _stage.input_file == _previous.output_file, f"{_stage} does not read {_previous.output_file}"
+
+STAGE_FILES: Dict[str, Stage] = {stage.name: stage for stage in STAGES}
+
+# Pipeline outputs, most enriched last
+PIPELINE_FILES = [stage.output_file for stage in STAGES]
+
+
+class StreamClosed(Exception):
+    """The consumer stopped reading; the producing stage should stop too."""
+
+
+class RowStream:
+    """
+    Hand rows from a producing stage to a consuming one as each row becomes
+    final, tagged with its index in the producer's input so the consumer
+    can write them back in file order.
+
+    The producer calls `start` with the columns and expected row count,
+    `put` for each row and `close` when done (passing the exception if it
+    failed). The consumer iterates with `get`. If the consumer gives up it
+    calls `cancel`, and the producer's next `put` raises StreamClosed.
+    """
+
+    _END = object()
+
+    def __init__(self, maxsize: int = 0):
+        self._queue: 'queue.Queue' = queue.Queue(maxsize)
+        self._cancelled = threading.Event()
+        self.fieldnames: List[str] = []
+        self.expected = 0
+        self.error: Optional[BaseException] = None
+
+    def start(self, fieldnames: List[str], expected: int):
+        self.fieldnames = list(fieldnames)
+        self.expected = expected
+
+    def put(self, index: int, row: Dict[str, str]):
+        if self._cancelled.is_set():
+            raise StreamClosed("Downstream stage stopped")
+        self._queue.put((index, row))
+
+    def close(self, error: Optional[BaseException] = None):
+        self.error = error
+        self._queue.put(self._END)
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def get(self, timeout: float) -> Optional[Tuple[int, Dict[str, str]]]:
+        """
+        The next (index, row); None once the producer has finished. Raises
+        queue.Empty on timeout, and RuntimeError if the producer failed.
+        """
+        item = self._queue.get(timeout=timeout)
+        if item is self._END:
+            # Leave the marker for any later call
+            self._queue.put(self._END)
+            if self.error is not None:
+                raise RuntimeError(f"Upstream stage failed: {self.error}") from self.error
+            return None
+        return item
@@ -0,0 +1,44 @@
+"""
+Thread-safe rate limiting shared by concurrent API workers.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Iterable, Tuple
+
+
+class RateLimiter:
+    """
+    Sliding-window limiter over one or more (max_calls, period_seconds)
+    windows, e.g. [(15, 1), (500, 60)] for "15 per second and 500 per minute".
+    `acquire` blocks the calling thread until a call is allowed.
+    """
+
+    def __init__(self, limits: Iterable[Tuple[int, float]]):
+        self.limits = [(int(calls), float(period)) for calls, period in limits if calls > 0]
+        longest = max((calls for calls, _ in self.limits), default=0)
+        self._calls = deque(maxlen=longest or None)
+        self._lock = threading.Lock()
+        self.waited_seconds = 0.0
+
+    def _wait_time(self, now: float) -> float:
+        wait = 0.0
+        for max_calls, period in self.limits:
+            if len(self._calls) >= max_calls:
+                # The call that has to age out before another fits in this window
+                oldest = self._calls[-max_calls]
+                wait = max(wait, oldest + period - now)
+        return wait
+
+    def acquire(self):
+        """Block until a call is allowed, then record it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._wait_time(now)
+                if wait <= 0:
+                    self._calls.append(now)
+                    return
+                self.waited_seconds += wait
+            time.sleep(wait)
@@ -0,0 +1,152 @@
+"""
+Deferred retry queue so transient fetch failures don't block other venues.
+
+Pending retries can be persisted between runs, and items that keep failing
+are moved to a dead-letter CSV with the reason so reruns can skip them.
+"""
+
+import csv
+import heapq
+import itertools
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+DEAD_LETTER_FIELDS = ['key', 'name', 'website', 'reason', 'attempts', 'timestamp']
+
+
+class DeferredRetryQueue:
+    """Min-heap of items keyed by the time they become eligible for another attempt."""
+
+    def __init__(self, base_delay: float = 2.0, max_delay: float = 300.0,
+                 path: Optional[str] = None, dead_letter_path: Optional[str] = None,
+                 max_attempts: int = 0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.path = Path(path) if path else None
+        self.dead_letter_path = Path(dead_letter_path) if dead_letter_path else None
+        self._heap: List[Tuple[float, int, int, Any]] = []
+        self._counter = itertools.count()
+        # Persisted state: key -> {name, website, attempt, ready_at, reason}
+        self._records: Dict[str, Dict] = {}
+        self._dead: Dict[str, Dict] = {}
+        self.dead_lettered = 0
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def _load(self):
+        """Load pending retries and dead-lettered keys from earlier runs."""
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, 'r') as f:
+                    self._records = json.load(f).get("pending", {})
+            except Exception as e:
+                print(f"Error loading retry queue: {e}")
+                self._records = {}
+
+        if self.dead_letter_path and self.dead_letter_path.exists():
+            with open(self.dead_letter_path, 'r', newline='', encoding='utf-8') as f:
+                self._dead = {row['key']: row for row in csv.DictReader(f)}
+
+    def save(self):
+        """Persist pending retries so a later run can pick them up."""
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(self.path, 'w') as f:
+                json.dump({"pending": self._records, "updated": datetime.now().isoformat()}, f, indent=2)
+        except Exception as e:
+            print(f"Error saving retry queue: {e}")
+
+    def carried_over(self) -> Dict[str, Dict]:
+        """Pending retries persisted by earlier runs, keyed by item key."""
+        return dict(self._records)
+
+    def dead_letter_reason(self, key: str) -> Optional[str]:
+        """Reason `key` was dead-lettered, or None if it wasn't."""
+        row = self._dead.get(key)
+        return row['reason'] if row else None
+
+    def discard(self, key: str):
+        """Forget the persisted record for `key`, e.g. once its retry succeeded."""
+        self._records.pop(key, None)
+
+    def prune(self, keys: Iterable[str]) -> int:
+        """Drop persisted records whose key isn't in `keys` (items gone from the input)."""
+        keep = set(keys)
+        stale = [key for key in self._records if key not in keep]
+        for key in stale:
+            del self._records[key]
+        return len(stale)
+
+    def dead_letter(self, key: str, reason: str, attempts: int, name: str = '', website: str = ''):
+        """Record a permanently failing item in the dead-letter file."""
+        self._records.pop(key, None)
+        self.dead_lettered += 1
+        row = {
+            'key': key, 'name': name, 'website': website, 'reason': reason,
+            'attempts': attempts, 'timestamp': datetime.now().isoformat(),
+        }
+        self._dead[key] = row
+        if not self.dead_letter_path:
+            return
+        new_file = not self.dead_letter_path.exists()
+        with open(self.dead_letter_path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=DEAD_LETTER_FIELDS)
+            if new_file:
+                writer.writeheader()
+            writer.writerow(row)
+
+    def push(self, item: Any, attempt: int, key: Optional[str] = None, reason: str = '',
+             name: str = '', website: str = '', ready_at: Optional[float] = None) -> bool:
+        """
+        Schedule `item` for `attempt` with exponential backoff from now.
+        Returns False (and dead-letters it) once `max_attempts` is reached.
+        """
+        if key and self.max_attempts and attempt >= self.max_attempts:
+            reason = f'Retry attempts exhausted ({reason})' if reason else 'Retry attempts exhausted'
+            self.dead_letter(key, reason, attempt, name, website)
+            return False
+
+        if ready_at is None:
+            delay = min(self.max_delay, self.base_delay * (2 ** max(0, attempt - 1)))
+            ready_at = time.time() + delay
+        heapq.heappush(self._heap, (ready_at, next(self._counter), attempt, (key, item)))
+        if key:
+            self._records[key] = {
+                'name': name, 'website': website, 'attempt': attempt,
+                'ready_at': ready_at, 'reason': reason,
+            }
+        return True
+
+    def next_ready_at(self) -> Optional[float]:
+        """When the earliest entry becomes due, or None if the queue is empty."""
+        return self._heap[0][0] if self._heap else None
+
+    def pop_ready(self, wait: bool = False, max_wait: Optional[float] = None) -> Optional[Tuple[Any, int]]:
+        """
+        Return (item, attempt) for the earliest due entry. If nothing is due yet,
+        return None, or sleep until it is when `wait` is True and the entry is
+        due within `max_wait` seconds.
+
+        The entry's persisted record is kept until the caller records the
+        retry's outcome (push again, dead_letter or discard), so a crash or
+        cancel during the retry doesn't lose the item.
+        """
+        if not self._heap:
+            return None
+        ready_at = self._heap[0][0]
+        now = time.time()
+        if ready_at > now:
+            if not wait or (max_wait is not None and ready_at - now > max_wait):
+                return None
+            time.sleep(ready_at - now)
+        _, _, attempt, (key, item) = heapq.heappop(self._heap)
+        return item, attempt
@@ -0,0 +1,191 @@
+"""
+Redirect and canonical URL resolution cache for venue websites.
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from utils.coalescing import normalize_url
+from utils.host_health import classify_error
+
+
+# Second-level labels under which UK (and a few common) registrations sit,
+# e.g. thepub.co.uk rather than co.uk
+MULTI_LABEL_SUFFIXES = {
+    'co.uk', 'org.uk', 'me.uk', 'ltd.uk', 'plc.uk', 'net.uk', 'sch.uk',
+    'ac.uk', 'gov.uk', 'nhs.uk', 'police.uk', 'mod.uk',
+    'com.au', 'co.nz', 'co.za', 'com.br', 'co.jp',
+}
+
+RESOLVER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+
+def registrable_domain(host: str) -> str:
+    """Return the registrable domain for a hostname (www.thepub.co.uk -> thepub.co.uk)."""
+    host = (host or '').lower().strip('.').split(':')[0]
+    labels = host.split('.')
+    if len(labels) <= 2:
+        return host
+    if '.'.join(labels[-2:]) in MULTI_LABEL_SUFFIXES:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+class URLResolver:
+    """
+    Resolve each unique website to its final URL once and cache the result
+    on disk, so fetches and Hunter lookups skip redirect chains and use the
+    right domain.
+    """
+
+    def __init__(self, cache_dir: str = "cache/urls", cache_ttl_days: int = 14,
+                 failure_ttl_days: int = 1, timeout: int = 10):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_file = self.cache_dir / "resolved_urls.json"
+        self.cache_ttl = timedelta(days=cache_ttl_days)
+        self.failure_ttl = timedelta(days=failure_ttl_days)
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(RESOLVER_HEADERS)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "additions": 0}
+        self._load_cache()
+
+    def _load_cache(self):
+        """Load existing cache from disk"""
+        self.cache = {}
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, 'r') as f:
+                    self.cache = json.load(f).get("urls", {})
+            except Exception as e:
+                print(f"Error loading URL cache: {e}")
+                self.cache = {}
+
+    def _save_cache(self):
+        """Save cache to disk"""
+        try:
+            with self._lock:
+                data = {
+                    "urls": dict(self.cache),
+                    "updated": datetime.now().isoformat(),
+                    "version": "1.0"
+                }
+            with open(self.cache_file, 'w') as f:
+                json.dump(data, f, indent=2)
+        except Exception as e:
+            print(f"Error saving URL cache: {e}")
+
+    def _is_fresh(self, entry: Dict) -> bool:
+        ttl = self.cache_ttl if entry.get("status") in ("ok", "redirected") else self.failure_ttl
+        try:
+            return datetime.now() - datetime.fromisoformat(entry["timestamp"]) < ttl
+        except (KeyError, ValueError):
+            return False
+
+    def _lookup(self, url: str) -> Dict:
+        """Follow redirects with a HEAD request, falling back to a streamed GET."""
+        if not url.lower().startswith(('http://', 'https://')):
+            url = f'http://{url}'
+
+        entry = {"final_url": url, "domain": registrable_domain(urlparse(url).netloc),
+                 "status": "unreachable", "http_status": None}
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+            if response.status_code >= 400:
+                # Plenty of small sites reject HEAD; only read headers of a GET
+                response = self.session.get(url, allow_redirects=True, timeout=self.timeout, stream=True)
+                response.close()
+        except requests.exceptions.RequestException as e:
+            entry["error"] = str(e)[:200]
+            entry["error_type"] = classify_error(e)
+            return entry
+
+        final_url = response.url or url
+        entry["final_url"] = final_url
+        entry["domain"] = registrable_domain(urlparse(final_url).netloc)
+        entry["http_status"] = response.status_code
+        if response.status_code >= 400:
+            entry["status"] = "http_error"
+        elif normalize_url(final_url) != normalize_url(url):
+            entry["status"] = "redirected"
+        else:
+            entry["status"] = "ok"
+        return entry
+
+    def resolve(self, url: str) -> Dict:
+        """
+        Return the cached resolution for `url`, resolving it if needed.
+        Keys: final_url, domain, status, http_status, timestamp.
+        """
+        key = normalize_url(url)
+        if not key:
+            return {"final_url": url, "domain": None, "status": "invalid", "http_status": None}
+
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry and self._is_fresh(entry):
+                self.stats["hits"] += 1
+                return entry
+            self.stats["misses"] += 1
+
+        entry = self._lookup(url.strip())
+        entry["timestamp"] = datetime.now().isoformat()
+
+        with self._lock:
+            self.cache[key] = entry
+            self.stats["additions"] += 1
+            save_now = self.stats["additions"] % 50 == 0
+        if save_now:
+            self._save_cache()
+        return entry
+
+    def resolve_many(self, urls: Iterable[str], max_workers: int = 8) -> Dict[str, Dict]:
+        """Resolve every unique URL concurrently; returns {url: resolution}."""
+        unique = {}
+        for url in urls:
+            if url and normalize_url(url) not in unique:
+                unique[normalize_url(url)] = url.strip()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = dict(zip(unique.values(), executor.map(self.resolve, unique.values())))
+        return results
+
+    def canonical_url(self, url: str) -> str:
+        """Final URL to fetch for `url` (the original when it could not be resolved)."""
+        entry = self.resolve(url)
+        if entry.get("status") in ("ok", "redirected"):
+            return entry["final_url"]
+        return url
+
+    def canonical_domain(self, url: str) -> Optional[str]:
+        """Registrable domain of the final URL for `url`."""
+        return self.resolve(url).get("domain")
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        total = self.stats["hits"] + self.stats["misses"]
+        hit_rate = (self.stats["hits"] / total * 100) if total > 0 else 0
+        return {
+            "total_cached": len(self.cache),
+            "hits": self.stats["hits"],
+            "misses": self.stats["misses"],
+            "hit_rate": f"{hit_rate:.1f}%",
+        }
+
+    def finalize(self):
+        """Save cache when done"""
+        self._save_cache()
+        print(f"\nURL Resolution Cache:")
+        for key, value in self.get_stats().items():
+            print(f"  {key}: {value}")
@@ -0,0 +1,315 @@
+"""
+In-memory query index over a venue CSV for the web UI: filtering, sorting
+and cursor pagination without re-reading the file on every request.
+"""
+
+import base64
+import bisect
+import csv
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+
+# Columns holding a contact email, depending on which stage wrote the file
+EMAIL_FIELDS = ('email', 'email_found')
+NUMERIC_FIELDS = ('lat', 'lon')
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def _normalise_postcode(postcode: str) -> str:
+    return (postcode or '').upper().replace(' ', '')
+
+
+def _postcode_area(postcode: str) -> str:
+    """Leading letters of a normalised postcode (CM, SS, ...)."""
+    area = ''
+    for char in postcode:
+        if not char.isalpha():
+            break
+        area += char
+    return area
+
+
+def _to_float(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def encode_cursor(sort: str, key: Tuple) -> str:
+    raw = json.dumps([sort, key], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Tuple]:
+    """Inverse of encode_cursor; raises ValueError for anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort, key = json.loads(raw)
+        (missing, value), name, postcode, position = key
+        return sort, ((int(missing), value), str(name), str(postcode), int(position))
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+class _Reversed:
+    """Wraps a value so it sorts in reverse; used for descending orders."""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other: '_Reversed') -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Reversed) and self.value == other.value
+
+
+def order_key(key: Tuple, descending: bool) -> Tuple:
+    """
+    Position of a sort_key in the ascending or descending order. Descending
+    reverses everything but the missing flag, so missing values stay last.
+    """
+    if not descending:
+        return key
+    (missing, value), *rest = key
+    return (missing, _Reversed((value, *rest)))
+
+
+class _Snapshot:
+    """One loaded version of the file with its lookup tables; never mutated after build."""
+
+    def __init__(self, rows: List[Dict[str, str]], fieldnames: Sequence[str], version: Tuple[int, int]):
+        self.rows = rows
+        self.fieldnames = list(fieldnames)
+        self.version = version
+        self.by_area: Dict[str, List[int]] = {}
+        self.by_type: Dict[str, Set[int]] = {}
+        self.by_status: Dict[str, Set[int]] = {}
+        self.with_email: Set[int] = set()
+        self.postcodes: List[str] = []
+        coords = []
+
+        for i, row in enumerate(rows):
+            postcode = _normalise_postcode(row.get('postcode'))
+            self.postcodes.append(postcode)
+            self.by_area.setdefault(_postcode_area(postcode), []).append(i)
+            self.by_type.setdefault((row.get('business_type') or '').lower(), set()).add(i)
+            self.by_status.setdefault((row.get('extraction_status') or '').lower(), set()).add(i)
+            if any((row.get(field) or '').strip() for field in EMAIL_FIELDS):
+                self.with_email.add(i)
+            lat, lon = _to_float(row.get('lat')), _to_float(row.get('lon'))
+            if lat is not None and lon is not None:
+                coords.append((lat, lon, i))
+
+        # Sorted by latitude so a bounding box only scans its latitude band
+        coords.sort()
+        self.coord_lats = [lat for lat, _, _ in coords]
+        self.coords = coords
+        # Per (sort field, descending): (order keys, row id at each position, rank of each row)
+        self._orders: Dict[Tuple[str, bool], Tuple[List[Tuple], List[int], List[int]]] = {}
+        self._orders_lock = threading.Lock()
+
+    def sort_key(self, field: str, i: int) -> Tuple:
+        """
+        Total order for `field`: missing values last, then name and postcode
+        as tie-breakers so cursors stay meaningful across reloads.
+        """
+        row = self.rows[i]
+        raw = row.get(field) or ''
+        if field in NUMERIC_FIELDS:
+            number = _to_float(raw)
+            value = (1, 0.0) if number is None else (0, number)
+        else:
+            raw = raw.strip().lower()
+            value = (0 if raw else 1, raw)
+        return (value, (row.get('name') or '').lower(), self.postcodes[i], i)
+
+    def order(self, field: str, descending: bool = False) -> Tuple[List[Tuple], List[int], List[int]]:
+        """
+        Order keys, the row id at each position and per-row ranks for
+        `field` in one direction, built once per snapshot.
+        """
+        with self._orders_lock:
+            cached = self._orders.get((field, descending))
+            if cached is None:
+                keyed = sorted((order_key(self.sort_key(field, i), descending), i)
+                               for i in range(len(self.rows)))
+                keys = [key for key, _ in keyed]
+                ids = [i for _, i in keyed]
+                ranks = [0] * len(self.rows)
+                for rank, i in enumerate(ids):
+                    ranks[i] = rank
+                cached = self._orders[(field, descending)] = (keys, ids, ranks)
+            return cached
+
+
+class VenueIndex:
+    """
+    Query a venue CSV from memory, reloading when the file's mtime or size
+    changes.
+
+    Equality filters (business_type, extraction_status, has_email) and the
+    postcode area are answered from lookup tables, bounding boxes from a
+    latitude-sorted list, and sort orders are built lazily once per file
+    version. Pages are addressed by an opaque keyset cursor, so paging stays
+    consistent while a stage rewrites the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = threading.Lock()
+        self.stats = {"loads": 0, "queries": 0}
+
+    def _file_version(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _current(self) -> Optional[_Snapshot]:
+        """The snapshot for the file as it is now, reloading if it changed."""
+        version = self._file_version()
+        if version is None:
+            return None
+        snapshot = self._snapshot
+        if snapshot and snapshot.version == version:
+            return snapshot
+        with self._lock:
+            # Another request may have reloaded while we waited
+            if self._snapshot and self._snapshot.version == version:
+                return self._snapshot
+            with open(self.path, 'r', encoding='utf-8', newline='') as f:
+                reader = csv.DictReader(f)
+                rows = list(reader)
+                fieldnames = reader.fieldnames or []
+            self._snapshot = _Snapshot(rows, fieldnames, version)
+            self.stats["loads"] += 1
+            return self._snapshot
+
+    @staticmethod
+    def _intersect(candidates: Optional[Set[int]], ids: Iterable[int]) -> Set[int]:
+        ids = set(ids)
+        return ids if candidates is None else candidates & ids
+
+    def _filter(self, snap: _Snapshot, postcode_prefixes: Sequence[str],
+                business_types: Sequence[str], statuses: Sequence[str],
+                has_email: Optional[bool],
+                bbox: Optional[Tuple[float, float, float, float]]) -> Optional[Set[int]]:
+        """Row ids matching every filter, or None when no filter is set."""
+        candidates: Optional[Set[int]] = None
+
+        if business_types:
+            ids = set()
+            for business_type in business_types:
+                ids |= snap.by_type.get(business_type.lower(), set())
+            candidates = self._intersect(candidates, ids)
+        if statuses:
+            ids = set()
+            for status in statuses:
+                ids |= snap.by_status.get(status.lower(), set())
+            candidates = self._intersect(candidates, ids)
+        if has_email is True:
+            candidates = self._intersect(candidates, snap.with_email)
+        elif has_email is False:
+            candidates = self._intersect(candidates, set(range(len(snap.rows))) - snap.with_email)
+
+        if postcode_prefixes:
+            prefixes = [_normalise_postcode(p) for p in postcode_prefixes]
+            ids = set()
+            for prefix in prefixes:
+                area = _postcode_area(prefix)
+                # A prefix that is all letters may be a partial area ("C"), so
+                # only a prefix with a district digit pins down one bucket
+                if len(area) < len(prefix):
+                    buckets = [snap.by_area.get(area, [])]
+                else:
+                    buckets = [rows for name, rows in snap.by_area.items() if name.startswith(area)]
+                for bucket in buckets:
+                    ids.update(i for i in bucket if snap.postcodes[i].startswith(prefix))
+            candidates = self._intersect(candidates, ids)
+
+        if bbox:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            start = bisect.bisect_left(snap.coord_lats, min_lat)
+            end = bisect.bisect_right(snap.coord_lats, max_lat)
+            ids = {i for _, lon, i in snap.coords[start:end] if min_lon <= lon <= max_lon}
+            candidates = self._intersect(candidates, ids)
+
+        return candidates
+
+    def query(self, postcode_prefixes: Sequence[str] = (), business_types: Sequence[str] = (),
+              statuses: Sequence[str] = (), has_email: Optional[bool] = None,
+              bbox: Optional[Tuple[float, float, float, float]] = None,
+              sort: str = 'name', descending: bool = False, limit: int = DEFAULT_LIMIT,
+              cursor: Optional[str] = None, fields: Sequence[str] = ()) -> Optional[Dict[str, Any]]:
+        """
+        One page of matching venues, or None if the file doesn't exist.
+
+        Raises ValueError for an unknown sort or field, or a cursor that
+        doesn't belong to this sort.
+        """
+        snap = self._current()
+        if snap is None:
+            return None
+        if sort not in snap.fieldnames:
+            raise ValueError(f"Unknown sort field: {sort}")
+        unknown = [field for field in fields if field not in snap.fieldnames]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        limit = max(1, min(limit, MAX_LIMIT))
+        sort_name = f"-{sort}" if descending else sort
+        self.stats["queries"] += 1
+
+        candidates = self._filter(snap, postcode_prefixes, business_types, statuses, has_email, bbox)
+        total = len(snap.rows) if candidates is None else len(candidates)
+        keys, ids, ranks = snap.order(sort, descending)
+
+        # Keyset pagination: resume strictly after the last key of the previous page
+        boundary = 0
+        if cursor:
+            cursor_sort, after = decode_cursor(cursor)
+            if cursor_sort != sort_name:
+                raise ValueError('Cursor belongs to a different sort order')
+            boundary = bisect.bisect_right(keys, order_key(after, descending))
+
+        if candidates is None:
+            # No filters: walk the precomputed order directly
+            page_ids = ids[boundary:boundary + limit + 1]
+        else:
+            remaining = [i for i in candidates if ranks[i] >= boundary]
+            remaining.sort(key=ranks.__getitem__)
+            page_ids = remaining[:limit + 1]
+
+        has_more = len(page_ids) > limit
+        page_ids = page_ids[:limit]
+        venues = [snap.rows[i] for i in page_ids]
+        if fields:
+            venues = [{field: row.get(field, '') for field in fields} for row in venues]
+
+        return {
+            'file': os.path.basename(self.path),
+            'modified': datetime.fromtimestamp(snap.version[0] / 1e9).isoformat(),
+            'total': total,
+            'count': len(venues),
+            'venues': venues,
+            'next_cursor': encode_cursor(sort_name, snap.sort_key(sort, page_ids[-1])) if has_more else None,
+        }
+
+    def get_stats(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            "rows": len(snapshot.rows) if snapshot else 0,
+            "loads": self.stats["loads"],
+            "queries": self.stats["queries"],
+        }
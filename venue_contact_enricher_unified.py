@@ -3,22 +3,52 @@ Enhanced Venue Contact Enricher with Unified BrightData Integration.
 Uses Browser API as primary method with Web Unlocker as fallback.
 """
 
+import codecs
 import csv
 import os
+import queue
 import re
+import threading
 import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
 import requests
 from dotenv import load_dotenv
 
 from brightdata_browser_client import BrightDataClient
-from config.filters import should_exclude_business_name, should_exclude_domain, get_filter_reason
+from config.filters import get_engine
+from utils.coalescing import FetchCoalescer
+from utils.extraction_pool import ExtractionPool
 from utils.filtering import FilterStatistics
+from utils.host_health import HostHealth, classify_error
+from utils.pipeline import STAGE_FILES, RowStream
+from utils.retry_queue import DeferredRetryQueue
+from utils.url_resolver import URLResolver
 
 load_dotenv()
 
+# Input and output as declared in the pipeline dataflow
+INPUT_FILE = STAGE_FILES['scrape'].input_file
+OUTPUT_FILE = STAGE_FILES['scrape'].output_file
+
+# Columns process_venue fills in, in output order
+RESULT_FIELDS = [
+    'email_found', 'phone_found', 'additional_emails', 'additional_phones', 'website_actual',
+    'extraction_status', 'extraction_notes', 'extraction_method', 'extraction_timestamp',
+    'filter_version',
+]
+
+# Statuses whose results a rerun keeps instead of fetching the venue again
+SETTLED_STATUSES = {'success', 'no_contact'}
+
+# How long to wait on an upstream stage's rows before checking on fetches again
+STREAM_POLL_SECONDS = 0.2
+END_OF_INPUT = object()
+
 
 class Config:
     """Load configuration from environment variables."""
@@ -42,6 +72,30 @@ class Config:
         self.timeout = parse_env_int('ENRICHER_TIMEOUT', '30')
         self.save_every_n = parse_env_int('ENRICHER_SAVE_EVERY_N', '50')
         self.use_brightdata = True
+        self.defer_retries = os.getenv('ENRICHER_DEFER_RETRIES', 'true').lower() == 'true'
+        
+        # Persistent retry queue: attempts across runs before dead-lettering,
+        # backoff base, and how long the end-of-run drain will wait
+        self.retry_max_attempts = parse_env_int('ENRICHER_RETRY_MAX_ATTEMPTS', '5')
+        self.retry_base_delay = parse_env_float('ENRICHER_RETRY_BASE_DELAY', '30')
+        self.retry_max_wait = parse_env_float('ENRICHER_RETRY_MAX_WAIT', '120')
+        self.retry_only = os.getenv('ENRICHER_RETRY_ONLY', 'false').lower() == 'true'
+        # Unreachable hosts are tried again in later runs, this long apart
+        self.dead_host_retry_delay = parse_env_float('ENRICHER_DEAD_HOST_RETRY_DELAY', '86400')
+        self.max_page_bytes = parse_env_int('ENRICHER_MAX_PAGE_BYTES', '2000000')
+        
+        # Concurrent fetch threads feeding an optional extraction process pool
+        self.fetch_workers = parse_env_int('ENRICHER_FETCH_WORKERS', '1')
+        self.extract_workers = parse_env_int('ENRICHER_EXTRACT_WORKERS', '0')
+        self.extract_queue_size = parse_env_int('ENRICHER_EXTRACT_QUEUE_SIZE', '0')
+        
+        # Optional crawl of contact/about pages when the homepage has no email
+        self.crawl_enabled = os.getenv('ENRICHER_CRAWL', 'false').lower() == 'true'
+        self.crawl_max_pages = parse_env_int('ENRICHER_CRAWL_MAX_PAGES', '3')
+        self.crawl_concurrency = parse_env_int('ENRICHER_CRAWL_CONCURRENCY', '2')
+        
+        # Finished pages kept for the run so repeat websites aren't refetched
+        self.fetch_cache_size = parse_env_int('ENRICHER_FETCH_CACHE_SIZE', '128')
 
 
 class EnhancedContactExtractor:
@@ -58,9 +112,108 @@ class EnhancedContactExtractor:
         r'^[a-f0-9]{40}@.*',                       # SHA1 hashes
     ]
     
+    # Untrusted HTML is scanned in bounded windows so one pathological page
+    # can't stall a run. Quantifiers below are bounded for the same reason.
+    MAX_DOCUMENT_CHARS = 2_000_000
+    WINDOW_CHARS = 50_000
+    # At least the longest EMAIL_PATTERN match (1 + 63 + 1 + 253 + 1 + 24 = 343
+    # chars), so a match cut at one window's edge is whole in the next
+    WINDOW_OVERLAP = 384
+    TIME_BUDGET_SECONDS = 1.0
+    MAX_CANDIDATES = 1000
+    
+    ASSET_ATTR_PATTERN = re.compile(
+        r'(src|href)=["\'][^"\']{0,2048}\.(png|jpg|jpeg|gif|css|js)[^"\']{0,2048}["\']', re.IGNORECASE)
+    ASSET_NAME_PATTERN = re.compile(
+        r'\b\w{1,64}[-@]\w{1,64}[-@]\w{1,64}\.(png|jpg|jpeg|gif|css|js)\b', re.IGNORECASE)
+    EMAIL_PATTERN = re.compile(
+        r'\b[A-Za-z][A-Za-z0-9._%+-]{0,63}@[A-Za-z0-9.-]{1,253}\.[A-Z|a-z]{2,24}\b')
+    
+    # Updated from fetch threads, so changed under the lock
+    budget_hits = 0
+    budget_log = deque(maxlen=100)
+    _budget_lock = threading.Lock()
+    
+    @classmethod
+    def reset_budget(cls):
+        """Start budget counting afresh, e.g. for a new enrichment run."""
+        with cls._budget_lock:
+            cls.budget_hits = 0
+            cls.budget_log = deque(maxlen=100)
+    
+    @classmethod
+    def add_budget_hits(cls, count: int):
+        """Add budget hits counted elsewhere (in a worker process)."""
+        with cls._budget_lock:
+            cls.budget_hits += count
+    
+    @classmethod
+    def _record_budget_hit(cls, kind: str, size: int, html: str):
+        """Remember a document that exceeded the size or time budget."""
+        sample = html[:80].replace('\n', ' ')
+        with cls._budget_lock:
+            cls.budget_hits += 1
+            cls.budget_log.append({'kind': kind, 'size': size, 'sample': sample})
+        print(f"    Extraction {kind} budget hit on {size:,}-char document")
+    
+    @classmethod
+    def start_scan(cls, html: str) -> Dict:
+        """
+        Truncate `html` at MAX_DOCUMENT_CHARS and start its time budget.
+        
+        Pass the result as `scan` to every extract_* call on the same
+        document, so the email passes (raw and unescaped text) and the phone
+        pass share one budget and an oversized or slow page is counted once.
+        """
+        if len(html) > cls.MAX_DOCUMENT_CHARS:
+            cls._record_budget_hit('size', len(html), html)
+            html = html[:cls.MAX_DOCUMENT_CHARS]
+        return {'html': html, 'deadline': time.perf_counter() + cls.TIME_BUDGET_SECONDS, 'timed_out': False}
+    
+    @classmethod
+    def _windows(cls, html: str, scan: Dict, partial: bool = False) -> Iterator[Tuple[str, int, int]]:
+        """
+        Yield (window, lo, hi) for `html`, a text of the document `scan`
+        was started for, stopping once the document's time budget is spent.
+        
+        Each window owns the matches starting in window[lo:hi] and carries
+        WINDOW_OVERLAP chars of context either side, so every owned match
+        is whole and each match is reported by one window only. With
+        `partial` (`html` is a prefix of the page) the last WINDOW_OVERLAP
+        chars are owned by no window, since a match there may continue.
+        """
+        limit = len(html) - cls.WINDOW_OVERLAP if partial else len(html)
+        
+        for offset in range(0, max(len(html), 1), cls.WINDOW_CHARS):
+            if time.perf_counter() > scan['deadline']:
+                if not scan['timed_out']:
+                    scan['timed_out'] = True
+                    cls._record_budget_hit('time', len(html), html)
+                return
+            window_start = max(0, offset - cls.WINDOW_OVERLAP)
+            lo = offset - window_start
+            hi = min(offset + cls.WINDOW_CHARS, limit) - window_start
+            if hi <= lo:
+                return
+            yield html[window_start:offset + cls.WINDOW_CHARS + cls.WINDOW_OVERLAP], lo, hi
+    
+    @staticmethod
+    def _owned_matches(pattern: 're.Pattern', window: str, lo: int, hi: int) -> List[str]:
+        """Matches of `pattern` in `window` that start in window[lo:hi]."""
+        return [m.group() for m in pattern.finditer(window) if lo <= m.start() < hi]
+    
+    @staticmethod
+    def _blank(match: 're.Match') -> str:
+        # Same-length replacement keeps match positions valid for _owned_matches
+        return ' ' * len(match.group())
+    
     @classmethod
     def is_valid_email(cls, email: str) -> bool:
         """Validate email address with strict checks."""
+        # Length check
+        if len(email) < 6 or len(email) > 100:
+            return False
+        
         email_lower = email.lower()
         
         # Check against invalid patterns
@@ -85,32 +238,41 @@ class EnhancedContactExtractor:
         if not email_regex.match(email):
             return False
         
-        # Length check
-        if len(email) < 6 or len(email) > 100:
-            return False
-        
         return True
     
     @classmethod
-    def extract_emails(cls, html: str) -> List[str]:
-        """Extract valid email addresses from HTML."""
-        # Pre-clean HTML
-        cleaned_html = re.sub(r'(src|href)=["\'][^"\']*\.(png|jpg|jpeg|gif|css|js)[^"\']*["\']', '', html, flags=re.IGNORECASE)
-        cleaned_html = re.sub(r'\b\w+[-@]\w+[-@]\w+\.(png|jpg|jpeg|gif|css|js)\b', '', cleaned_html, flags=re.IGNORECASE)
-        
+    def extract_emails(cls, html: str, partial: bool = False, scan: Optional[Dict] = None) -> List[str]:
+        """
+        Extract valid email addresses from HTML. With `partial`, `html` is
+        a prefix of the page and an address at its very end is skipped.
+        `scan` is the document's budget from start_scan (a new one if not given).
+        """
+        scan = scan or cls.start_scan(html)
+        html = scan['html']
+        candidates = {}
         # Also look for escaped emails in JSON/JavaScript
         # Handle various encoding formats
         escaped_html = html.replace('\\u0040', '@').replace('%40', '@').replace('\\\\u0040', '@')
         
-        # Email pattern
-        email_pattern = re.compile(r'\b[A-Za-z][A-Za-z0-9._%+-]*@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
-        
-        # Find emails in both cleaned and escaped versions
-        all_emails = email_pattern.findall(cleaned_html) + email_pattern.findall(escaped_html)
+        # Find emails in both the cleaned page and the escaped version
+        for window, lo, hi in cls._windows(html, scan, partial):
+            # Pre-clean HTML
+            cleaned_html = cls.ASSET_ATTR_PATTERN.sub(cls._blank, window)
+            cleaned_html = cls.ASSET_NAME_PATTERN.sub(cls._blank, cleaned_html)
+            candidates.update(dict.fromkeys(cls._owned_matches(cls.EMAIL_PATTERN, cleaned_html, lo, hi)))
+            if len(candidates) >= cls.MAX_CANDIDATES:
+                cls._record_budget_hit('candidate', len(html), html)
+                break
+        if len(candidates) < cls.MAX_CANDIDATES:
+            for window, lo, hi in cls._windows(escaped_html, scan, partial):
+                candidates.update(dict.fromkeys(cls._owned_matches(cls.EMAIL_PATTERN, window, lo, hi)))
+                if len(candidates) >= cls.MAX_CANDIDATES:
+                    cls._record_budget_hit('candidate', len(html), html)
+                    break
         
         # Filter and validate
         valid_emails = []
-        for email in all_emails:
+        for email in list(candidates)[:cls.MAX_CANDIDATES]:
             if cls.is_valid_email(email):
                 valid_emails.append(email.lower())
         
@@ -125,8 +287,10 @@ class EnhancedContactExtractor:
         return unique_emails
     
     @classmethod
-    def extract_phones(cls, html: str) -> List[str]:
-        """Extract UK phone numbers from HTML."""
+    def extract_phones(cls, html: str, partial: bool = False, scan: Optional[Dict] = None) -> List[str]:
+        """Extract UK phone numbers from HTML (`partial` and `scan` as for extract_emails)."""
+        scan = scan or cls.start_scan(html)
+        html = scan['html']
         patterns = [
             # UK landline
             re.compile(r'\b0[12]\d{1,2}[\s\-\.]?\d{3,4}[\s\-\.]?\d{3,4}\b'),
@@ -140,72 +304,377 @@ class EnhancedContactExtractor:
             re.compile(r'\(\d{4,5}\)[\s\-\.]?\d{6,7}'),
         ]
         
+        matches = []
+        for window, lo, hi in cls._windows(html, scan, partial):
+            for pattern in patterns:
+                matches += cls._owned_matches(pattern, window, lo, hi)
+        
         phones = []
-        for pattern in patterns:
-            matches = pattern.findall(html)
-            for match in matches:
-                cleaned = re.sub(r'[\s\-\.\(\)]', '', match)
-                if len(cleaned) >= 10 and len(cleaned) <= 13:
-                    phones.append(cleaned)
+        for match in matches:
+            cleaned = re.sub(r'[\s\-\.\(\)]', '', match)
+            if len(cleaned) >= 10 and len(cleaned) <= 13:
+                phones.append(cleaned)
         
         return list(set(phones))
 
 
 
 
+def extract_contacts(html: str) -> Tuple[List[str], List[str], int]:
+    """
+    Extract (emails, phones, budget_hits) from a page; module-level so
+    worker processes can run it and report budget hits back to the parent.
+    """
+    hits_before = EnhancedContactExtractor.budget_hits
+    scan = EnhancedContactExtractor.start_scan(html)
+    emails = EnhancedContactExtractor.extract_emails(html, scan=scan)
+    phones = EnhancedContactExtractor.extract_phones(html, scan=scan)
+    return emails, phones, EnhancedContactExtractor.budget_hits - hits_before
+
+
+def _extract(html: str, extraction_pool: Optional[ExtractionPool] = None) -> Tuple[List[str], List[str]]:
+    """Extract contacts in the process pool when one is running, otherwise inline."""
+    if extraction_pool:
+        emails, phones, budget_hits = extraction_pool.run(html)
+        # Budget hits counted in a worker process are added to this process's total
+        EnhancedContactExtractor.add_budget_hits(budget_hits)
+        return emails, phones
+    emails, phones, _ = extract_contacts(html)
+    return emails, phones
+
+
+# Shared HTTP session so homepage and crawled pages reuse connections
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+})
+
+# Link keywords ranked by how likely the page is to hold contact details
+CONTACT_LINK_KEYWORDS = [
+    ('contact', 10), ('get-in-touch', 9), ('enquir', 8), ('find-us', 7),
+    ('findus', 7), ('about', 6), ('location', 4), ('visit', 3), ('book', 2),
+]
+
+# Characters carried between streamed chunks; longer than any email or phone
+STREAM_OVERLAP_CHARS = EnhancedContactExtractor.WINDOW_OVERLAP
+
+# Characters that can't occur inside an email or phone match
+TOKEN_DELIMITERS = frozenset(' \t\r\n<>"\',;')
+
+SKIPPED_LINK_EXTENSIONS = (
+    '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.css', '.js',
+    '.pdf', '.zip', '.mp3', '.mp4', '.xml', '.ico'
+)
+
+
+def _with_scheme(url: str) -> str:
+    """`url` with an http:// scheme added if it is a bare domain."""
+    if not url.lower().startswith(('http://', 'https://')):
+        return f'http://{url}'
+    return url
+
+
+def fetch_direct(url: str, timeout: float = 30, max_bytes: int = 2_000_000,
+                 chunk_size: int = 16_384, early_stop: bool = True) -> Optional[str]:
+    """
+    Fetch URL over plain HTTP, returning HTML or None for blocked/empty pages.
+    
+    The body is streamed and decoded incrementally, capped at `max_bytes`,
+    and scanned for contacts as it arrives so the download can stop once
+    both an email and a phone number have been seen. Only matches clear of
+    the last STREAM_OVERLAP_CHARS count, since those may continue in the
+    next chunk, and an early stop drops the partial token the page was cut
+    in. The rest of the page, footer links included, is then never read;
+    the contact-page crawl only runs when the homepage has no email, so it
+    is not affected. Without `early_stop` no regexes run while streaming,
+    leaving the fetch thread free when a process pool does the extraction.
+    """
+    url = _with_scheme(url)
+    
+    with HTTP_SESSION.get(url, timeout=timeout, stream=True) as response:
+        if response.status_code != 200:
+            return None
+        
+        decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+        parts = []
+        received = 0
+        tail = ''
+        found_email = found_phone = False
+        
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            received += len(chunk)
+            text = decoder.decode(chunk)
+            parts.append(text)
+            
+            # Overlap with the previous chunk so matches split across chunks are seen
+            window = tail + text
+            window_lower = window.lower()
+            if 'captcha' in window_lower or 'blocked' in window_lower:
+                return None
+            
+            if early_stop:
+                scan = EnhancedContactExtractor.start_scan(window)
+                found_email = found_email or bool(EnhancedContactExtractor.extract_emails(window, True, scan))
+                found_phone = found_phone or bool(EnhancedContactExtractor.extract_phones(window, True, scan))
+                if found_email and found_phone:
+                    parts[-1] = _drop_partial_token(parts[-1])
+                    break
+            if received >= max_bytes:
+                print(f"    Page exceeds {max_bytes // 1024}KB, truncating")
+                break
+            tail = window[-STREAM_OVERLAP_CHARS:]
+        else:
+            parts.append(decoder.decode(b'', final=True))
+    
+    html = ''.join(parts)
+    return html if len(html) > 100 else None
+
+
+def _drop_partial_token(text: str) -> str:
+    """`text` without a trailing run of non-delimiters, which may be the front of a cut-off address."""
+    for i in range(len(text) - 1, max(-1, len(text) - 1 - STREAM_OVERLAP_CHARS), -1):
+        if text[i] in TOKEN_DELIMITERS:
+            return text[:i + 1]
+    return text
+
+
+def _host(url: str) -> str:
+    """Hostname for host-health tracking, tolerating bare domains."""
+    return urlparse(_with_scheme(url)).netloc.lower()
+
+
+def _fetch_tier(url: str, tier: str, config: Config, host_health: HostHealth,
+                brightdata_client: Optional[BrightDataClient] = None) -> Optional[str]:
+    """Fetch one page on one tier with an adaptive timeout, recording the outcome for the host."""
+    host = _host(url)
+    timeout = host_health.timeout_for(host, tier, config.timeout)
+    start = time.time()
+    try:
+        if tier == 'brightdata':
+            html = brightdata_client.scrape_url(url, timeout=timeout)
+            html = html if html and len(html) > 100 else None
+        else:
+            # With an extraction pool, regexes run there rather than on the fetch thread
+            html = fetch_direct(url, timeout=timeout, max_bytes=config.max_page_bytes,
+                                early_stop=config.extract_workers <= 0)
+    except Exception as e:
+        print(f"    {'BrightData' if tier == 'brightdata' else 'Direct HTTP'} failed: {e}")
+        host_health.record_failure(host, tier, classify_error(e), time.time() - start)
+        return None
+    
+    if html:
+        host_health.record_success(host, tier, time.time() - start)
+    else:
+        host_health.record_failure(host, tier, 'error')
+    return html
+
+
 def fetch_with_retry(url: str, config: Config, brightdata_client: Optional[BrightDataClient] = None, 
-                    attempt: int = 0) -> Tuple[Optional[str], str]:
+                    attempt: int = 0, host_health: Optional[HostHealth] = None) -> Tuple[Optional[str], str]:
     """
     Fetch URL with retry logic.
     Returns: (html_content, method_used)
+    
+    With `config.defer_retries` a failed attempt returns 'deferred' instead
+    of sleeping, so the caller can queue it without blocking other venues;
+    the retry queue decides when to give up. Hosts with DNS or repeated
+    connection failures return 'host_dead'. `host_health` is the run's
+    per-host tracker (a fresh one if not given).
     """
+    host_health = host_health or HostHealth()
     # Validate URL
     if not url or not isinstance(url, str) or not url.strip():
         print(f"    Invalid URL: {url}")
         return None, 'invalid_url'
     
     url = url.strip()
+    host = _host(url)
+    if host_health.is_dead(host):
+        host_health.record_skip(host)
+        print(f"    Skipping {host}: DNS/connection failures")
+        return None, 'host_dead'
     
     # Always use BrightData Browser API if available
     if brightdata_client and config.use_brightdata:
         print(f"    Attempt {attempt + 1}: Using BrightData Browser API...")
-        try:
-            html = brightdata_client.scrape_url(url, timeout=config.timeout)
-            if html and len(html) > 100:
-                return html, 'brightdata'
-        except Exception as e:
-            print(f"    BrightData failed: {e}")
+        html = _fetch_tier(url, 'brightdata', config, host_health, brightdata_client)
+        if html:
+            return html, 'brightdata'
     
     # Fallback to direct HTTP only if BrightData is not available or failed
     if not config.use_brightdata or attempt > 0:
-        try:
-            print(f"    Attempt {attempt + 1}: Trying direct HTTP as fallback...")
-            response = requests.get(
-                url, 
-                timeout=30,
-                headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
-            )
-            if response.status_code == 200 and len(response.text) > 100:
-                # Check if we got real content (not a captcha/block page)
-                if 'captcha' not in response.text.lower() and 'blocked' not in response.text.lower():
-                    return response.text, 'direct_http'
-        except Exception as e:
-            print(f"    Direct HTTP failed: {e}")
+        print(f"    Attempt {attempt + 1}: Trying direct HTTP as fallback...")
+        html = _fetch_tier(url, 'direct_http', config, host_health)
+        if html:
+            return html, 'direct_http'
+    
+    if host_health.is_dead(host):
+        return None, 'host_dead'
+    
+    if config.defer_retries:
+        return None, 'deferred'
     
     # Retry if we haven't exhausted attempts
     if attempt < config.retry_attempts - 1:
         time.sleep(2 ** attempt)  # Exponential backoff
-        return fetch_with_retry(url, config, brightdata_client, attempt + 1)
+        return fetch_with_retry(url, config, brightdata_client, attempt + 1, host_health)
     
     return None, 'all_failed'
 
 
+def fetch_with_method(url: str, method: str, config: Config,
+                      brightdata_client: Optional[BrightDataClient] = None,
+                      host_health: Optional[HostHealth] = None) -> Optional[str]:
+    """Fetch a single page using the tier that already worked for the venue (no retries)."""
+    host_health = host_health or HostHealth()
+    if host_health.is_dead(_host(url)):
+        host_health.record_skip(_host(url))
+        return None
+    if method == 'brightdata' and brightdata_client:
+        return _fetch_tier(url, 'brightdata', config, host_health, brightdata_client)
+    return _fetch_tier(url, 'direct_http', config, host_health)
+
+
+def rank_contact_links(html: str, base_url: str, limit: int) -> List[str]:
+    """
+    Rank same-site links by how likely they are to be a contact page.
+    Returns at most `limit` absolute URLs, best first. `base_url` may be
+    a bare domain when canonical resolution failed.
+    """
+    base_url = _with_scheme(base_url.strip())
+    base_host = urlparse(base_url).netloc.lower()
+    if base_host.startswith('www.'):
+        base_host = base_host[4:]
+    base_page = base_url.split('#')[0].rstrip('/')
+    
+    scored = {}
+    for href in re.findall(r'href=["\']([^"\'#]+)', html, flags=re.IGNORECASE):
+        href = href.strip()
+        if href.lower().startswith(('mailto:', 'tel:', 'javascript:')):
+            continue
+        
+        link = urljoin(base_url, href)
+        parsed = urlparse(link)
+        host = parsed.netloc.lower()
+        if host.startswith('www.'):
+            host = host[4:]
+        if parsed.scheme not in ('http', 'https') or host != base_host:
+            continue
+        
+        path = parsed.path.lower()
+        if path.endswith(SKIPPED_LINK_EXTENSIONS) or link.rstrip('/') == base_page:
+            continue
+        
+        score = max((weight for keyword, weight in CONTACT_LINK_KEYWORDS if keyword in path), default=0)
+        if score and score > scored.get(link, 0):
+            scored[link] = score
+    
+    # Prefer higher scores, then shorter (closer to the site root) paths
+    ranked = sorted(scored, key=lambda link: (-scored[link], len(link)))
+    return ranked[:limit]
+
+
+def crawl_contact_pages(html: str, base_url: str, method: str, config: Config,
+                        brightdata_client: Optional[BrightDataClient] = None,
+                        extraction_pool: Optional[ExtractionPool] = None,
+                        host_health: Optional[HostHealth] = None) -> Tuple[List[str], List[str], int]:
+    """
+    Fetch up to `config.crawl_max_pages` likely contact pages, at most
+    `config.crawl_concurrency` at a time, stopping as soon as a page yields
+    a valid email. Pages are only requested while a slot is free, so
+    stopping never leaves queued fetches; the ones already in flight are
+    waited for and counted, since they are paid for either way.
+    Returns: (emails, phones, pages_fetched)
+    """
+    links = rank_contact_links(html, base_url, config.crawl_max_pages)
+    if not links:
+        return [], [], 0
+    
+    print(f"    Crawling {len(links)} candidate contact page(s)...")
+    emails, phones = [], []
+    pages_fetched = 0
+    pending = iter(links)
+    in_flight = {}
+    
+    with ThreadPoolExecutor(max_workers=max(1, config.crawl_concurrency)) as executor:
+        def submit_next():
+            link = next(pending, None)
+            if link:
+                future = executor.submit(fetch_with_method, link, method, config, brightdata_client, host_health)
+                in_flight[future] = link
+        
+        for _ in range(max(1, config.crawl_concurrency)):
+            submit_next()
+        found = False
+        while in_flight and not found:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                link = in_flight.pop(future)
+                page_html = future.result()
+                pages_fetched += 1
+                if not page_html or found:
+                    continue
+                
+                page_emails, page_phones = _extract(page_html, extraction_pool)
+                emails.extend(e for e in page_emails if e not in emails)
+                phones.extend(p for p in page_phones if p not in phones)
+                
+                if page_emails:
+                    print(f"    Found email on {link}, stopping crawl")
+                    found = True
+            if not found:
+                for _ in done:
+                    submit_next()
+        
+        # Let fetches already started finish so their cost is counted
+        for future in in_flight:
+            future.result()
+            pages_fetched += 1
+    
+    return emails, phones, pages_fetched
+
+
+def venue_key(venue: Dict[str, str]) -> str:
+    """Stable identifier for a venue across runs (retry queue and dead-letter file)."""
+    if venue.get('id'):
+        return str(venue['id'])
+    return f"{venue.get('name', '').lower().strip()}|{venue.get('postcode', '').upper().strip()}"
+
+
+# A fetched homepage waiting for extraction: (html, fetch_url, start_time, fetch_time)
+FetchedPage = Tuple[str, str, float, float]
+
+
 def process_venue(venue: Dict[str, str], config: Config, 
                  brightdata_client: Optional[BrightDataClient] = None,
-                 filter_stats: Optional[FilterStatistics] = None) -> Dict[str, str]:
-    """Process a single venue and extract contact info."""
+                 filter_stats: Optional[FilterStatistics] = None,
+                 coalescer: Optional[FetchCoalescer] = None,
+                 resolver: Optional[URLResolver] = None,
+                 attempt: int = 0,
+                 extraction_pool: Optional[ExtractionPool] = None,
+                 host_health: Optional[HostHealth] = None) -> Dict[str, str]:
+    """Process a single venue and extract contact info; `host_health` is the run's host tracker."""
+    host_health = host_health or HostHealth()
+    page = fetch_venue(venue, config, brightdata_client, filter_stats, coalescer, resolver, attempt, host_health)
+    if page:
+        emails, phones = _extract(page[0], extraction_pool)
+        finish_venue(venue, page, emails, phones, config, brightdata_client, extraction_pool, host_health)
+    return venue
+
+
+def fetch_venue(venue: Dict[str, str], config: Config,
+                brightdata_client: Optional[BrightDataClient] = None,
+                filter_stats: Optional[FilterStatistics] = None,
+                coalescer: Optional[FetchCoalescer] = None,
+                resolver: Optional[URLResolver] = None,
+                attempt: int = 0,
+                host_health: Optional[HostHealth] = None) -> Optional[FetchedPage]:
+    """
+    First half of process_venue: reset the result fields, apply filters and
+    fetch the homepage. Returns the page to extract, or None once the venue
+    is settled (skipped, failed or deferred).
+    """
+    host_health = host_health or HostHealth()
     name = venue.get('name', '')
     website = venue.get('website', '')
     
@@ -219,53 +688,87 @@ def process_venue(venue: Dict[str, str], config: Config,
     venue['extraction_notes'] = ''
     venue['extraction_method'] = ''
     venue['extraction_timestamp'] = datetime.now().isoformat()
+    # Which filters decided this row, so it can be re-filtered without refetching
+    engine = get_engine()
+    venue['filter_version'] = engine.version
     
     # Skip if no website
     if not website:
         venue['extraction_status'] = 'skipped'
         venue['extraction_notes'] = 'No website'
         if filter_stats:
-            filter_stats.log_filter(name, 'No website', 'no_website')
-        return venue
+            filter_stats.log_filter(name, 'No website', 'no_website', engine.version)
+        return None
     
-    # Skip excluded business names
-    if should_exclude_business_name(name):
-        venue['extraction_status'] = 'skipped'
-        venue['extraction_notes'] = get_filter_reason(name=name)
-        if filter_stats:
-            filter_stats.log_filter(name, venue['extraction_notes'], 'business_name')
-        return venue
-    
-    # Skip excluded domains (government, property listings, etc.)
-    if should_exclude_domain(website):
-        venue['extraction_status'] = 'skipped'
-        venue['extraction_notes'] = get_filter_reason(url=website)
-        if filter_stats:
-            filter_type = 'property_listing' if 'property' in venue['extraction_notes'].lower() else 'domain'
-            filter_stats.log_filter(name, venue['extraction_notes'], filter_type)
-        return venue
+    # Skip excluded business names, then excluded domains (government,
+    # property listings, etc.)
+    for decision in (engine.check_name(name), engine.check_url(website)):
+        if decision.excluded:
+            venue['extraction_status'] = 'skipped'
+            venue['extraction_notes'] = decision.reason
+            if filter_stats:
+                filter_stats.log_filter(name, decision.reason, decision.filter_type, engine.version)
+            return None
     
     # Skip if already has email
     if venue.get('email') or venue.get('email_found'):
         venue['extraction_status'] = 'skipped'
         venue['extraction_notes'] = 'Already has email'
-        return venue
+        return None
     
-    # Fetch website content
+    # Fetch website content, skipping known redirect chains
     start_time = time.time()
-    html, method_used = fetch_with_retry(website, config, brightdata_client)
+    fetch_url = resolver.canonical_url(website) if resolver else website
+    if coalescer:
+        html, method_used = coalescer.fetch(
+            fetch_url, lambda url: fetch_with_retry(url, config, brightdata_client, attempt, host_health))
+    else:
+        html, method_used = fetch_with_retry(fetch_url, config, brightdata_client, attempt, host_health)
     fetch_time = time.time() - start_time
     
     venue['extraction_method'] = method_used
     
     if not html:
-        venue['extraction_status'] = 'failed'
-        venue['extraction_notes'] = f'Failed to fetch website after {config.retry_attempts} attempts'
-        return venue
+        if method_used == 'deferred':
+            outcome = host_health.last_failure(_host(fetch_url)) or 'error'
+            venue['extraction_status'] = 'retry_pending'
+            venue['extraction_notes'] = f'Attempt {attempt + 1} failed ({outcome}), retry deferred'
+        elif method_used == 'host_dead':
+            venue['extraction_status'] = 'failed'
+            venue['extraction_notes'] = 'Host unreachable (DNS/connection failure)'
+        else:
+            venue['extraction_status'] = 'failed'
+            venue['extraction_notes'] = f'Failed to fetch website after {config.retry_attempts} attempts'
+        return None
+    
+    return html, fetch_url, start_time, fetch_time
+
+
+def wants_crawl(emails: List[str], config: Config) -> bool:
+    """True if finish_venue will crawl contact pages, i.e. may block on fetches."""
+    return not emails and config.crawl_enabled and config.crawl_max_pages > 0
+
+
+def finish_venue(venue: Dict[str, str], page: FetchedPage, emails: List[str], phones: List[str],
+                 config: Config, brightdata_client: Optional[BrightDataClient] = None,
+                 extraction_pool: Optional[ExtractionPool] = None,
+                 host_health: Optional[HostHealth] = None) -> Dict[str, str]:
+    """
+    Second half of process_venue: crawl contact pages if the homepage had
+    no email, then fill in contacts and status from the extracted results.
+    """
+    html, fetch_url, start_time, fetch_time = page
+    method_used = venue['extraction_method']
+    website = venue.get('website', '')
     
-    # Extract contacts
-    emails = EnhancedContactExtractor.extract_emails(html)
-    phones = EnhancedContactExtractor.extract_phones(html)
+    # Look at contact/about pages when the homepage has no email
+    pages_crawled = 0
+    if wants_crawl(emails, config):
+        crawl_emails, crawl_phones, pages_crawled = crawl_contact_pages(
+            html, fetch_url, method_used, config, brightdata_client, extraction_pool, host_health)
+        emails = crawl_emails
+        phones = phones + [p for p in crawl_phones if p not in phones]
+        fetch_time = time.time() - start_time
     
     # Set primary and additional contacts
     if emails:
@@ -287,20 +790,30 @@ def process_venue(venue: Dict[str, str], config: Config,
             venue['website_actual'] = external_sites[0]
     
     # Set status
+    crawl_note = f" (+{pages_crawled} crawled pages)" if pages_crawled else ''
     if venue['email_found'] or venue['phone_found']:
         venue['extraction_status'] = 'success'
-        venue['extraction_notes'] = f"Found {len(emails)} emails, {len(phones)} phones in {fetch_time:.1f}s"
+        venue['extraction_notes'] = f"Found {len(emails)} emails, {len(phones)} phones in {fetch_time:.1f}s{crawl_note}"
     else:
         venue['extraction_status'] = 'no_contact'
-        venue['extraction_notes'] = f'No valid contact information found in {fetch_time:.1f}s'
+        venue['extraction_notes'] = f'No valid contact information found in {fetch_time:.1f}s{crawl_note}'
     
     return venue
 
 
-def enrich_venues():
-    """Main function to enrich all venues."""
+def enrich_venues(progress=None, stream: Optional[RowStream] = None):
+    """
+    Main function to enrich all venues.
+    
+    `progress`, if given, is called as progress(done, total, message) after
+    each venue; an exception it raises stops the run after saving progress.
+    
+    With a RowStream, venues are taken from the upstream stage as they
+    become final instead of from INPUT_FILE, so fetching starts while the
+    upstream stage is still running.
+    """
     config = Config()
-    filter_stats = FilterStatistics()
+    filter_stats = FilterStatistics("venue_enricher_filter_log.csv")
     
     # Initialize BrightData client
     brightdata_client = None
@@ -314,8 +827,8 @@ def enrich_venues():
         print("Falling back to direct HTTP requests only")
         config.use_brightdata = False
     
-    input_file = "essex_venues_enriched.csv"
-    output_file = "essex_venues_enriched_unified.csv"
+    input_file = INPUT_FILE
+    output_file = OUTPUT_FILE
     
     print(f"\nStarting enhanced venue contact enrichment")
     print(f"Configuration:")
@@ -323,85 +836,423 @@ def enrich_venues():
     print(f"  Max retries per venue: {config.retry_attempts}")
     print(f"  Delay between requests: {config.delay_seconds}s")
     print(f"  Save progress every: {config.save_every_n} venues")
-    print(f"  Timeout: {config.timeout}s")
+    print(f"  Timeout: {config.timeout}s (adaptive per host)")
+    print(f"  Deferred retries: {config.defer_retries}")
+    print(f"  Fetch workers: {config.fetch_workers}")
+    print(f"  Extraction processes: {config.extract_workers or 'inline'}")
     print(f"  BrightData enabled: {config.use_brightdata}")
+    print(f"  Contact page crawl: {'up to ' + str(config.crawl_max_pages) + ' pages' if config.crawl_enabled else 'disabled'}")
     print()
     
-    # Read input venues
-    with open(input_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        venues = list(reader)
-        original_fieldnames = reader.fieldnames
+    # Venues by position in the input, so output keeps input order even
+    # when a stream delivers them out of order
+    received: Dict[int, Dict[str, str]] = {}
+    if stream:
+        print(f"Streaming venues from the upstream stage")
+    else:
+        with open(input_file, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            received = dict(enumerate(reader))
+            original_fieldnames = reader.fieldnames
+        print(f"Loaded {len(received)} venues from {input_file}")
     
-    print(f"Loaded {len(venues)} venues from {input_file}")
+    def output_fieldnames():
+        fieldnames = list(stream.fieldnames if stream else original_fieldnames)
+        # Add result fields missing from the input (the Google output has none)
+        fieldnames += [field for field in RESULT_FIELDS if field not in fieldnames]
+        return fieldnames
     
-    # Add extraction_method field if not present
-    if 'extraction_method' not in original_fieldnames:
-        output_fieldnames = list(original_fieldnames) + ['extraction_method']
-    else:
-        output_fieldnames = list(original_fieldnames)
+    def all_venues():
+        return [received[i] for i in sorted(received)]
+    
+    # Failed fetches are retried later (this run or the next) and
+    # permanently failing venues are dead-lettered so reruns skip them
+    retry_queue = DeferredRetryQueue(
+        base_delay=config.retry_base_delay,
+        max_delay=3600,
+        path="cache/enricher_retry_queue.json",
+        dead_letter_path="venue_enricher_dead_letter.csv",
+        max_attempts=config.retry_max_attempts,
+    )
+    carried_over = retry_queue.carried_over()
+    if carried_over:
+        print(f"Picked up {len(carried_over)} pending retries from earlier runs")
+    
+    # Results from the previous run, so settled venues aren't fetched again
+    # and a retry-only run leaves the venues it doesn't retry as they were
+    previous_results: Dict[str, Dict[str, str]] = {}
+    if os.path.exists(output_file):
+        with open(output_file, 'r', encoding='utf-8') as f:
+            previous_results = {venue_key(row): row for row in csv.DictReader(f)}
+        print(f"Loaded {len(previous_results)} results from the previous run ({output_file})")
+    kept_results = 0
+    
+    def keep_previous(venue, previous):
+        nonlocal kept_results
+        for field in RESULT_FIELDS:
+            venue[field] = previous.get(field, '')
+        kept_results += 1
+    
+    def keep_unprocessed(venue):
+        """Keep last run's result for a venue this run won't get to."""
+        previous = previous_results.get(venue_key(venue))
+        if previous:
+            keep_previous(venue, previous)
     
     # Process venues
     processed_count = 0
     start_time = time.time()
     
-    # Apply filters at the start before processing
-    print("\nApplying filters...")
-    venues_to_process = []
+    resolver = URLResolver()
+    # Host health is per run: a host that failed in an earlier job (in the
+    # same long-lived app process) gets a fresh chance
+    host_health = HostHealth()
+    EnhancedContactExtractor.reset_budget()
+    # Share one fetch between venues pointing at the same website
+    coalescer = FetchCoalescer(config.fetch_cache_size)
+    # Transient failures are retried later instead of sleeping inline
+    retry_coalescer = FetchCoalescer(config.fetch_cache_size)
+    retried_count = 0
+    dead_lettered = 0
     
-    for venue in venues:
+    def defer_carried(venue, record):
+        # Carried-over retries keep their backoff unless this is a retry-only run
+        ready_at = time.time() if config.retry_only else float(record['ready_at'])
+        # Shows last run's result until the retry comes round
+        keep_unprocessed(venue)
+        retry_queue.push(venue, int(record['attempt']), key=venue_key(venue), reason=record.get('reason', ''),
+                         name=venue.get('name', ''), website=venue.get('website', ''),
+                         ready_at=ready_at)
+        retry_coalescer.register(resolver.canonical_url(venue.get('website', '')))
+    
+    def admit(venue):
+        """True if `venue` goes to the main pass; carried-over retries go to the retry queue."""
+        nonlocal dead_lettered
+        key = venue_key(venue)
         # Skip if already has email
         if venue.get('email') or venue.get('email_found'):
-            continue
+            retry_queue.discard(key)
+            return False
+        
+        # Keep last run's result if the website it was fetched from is unchanged
+        previous = previous_results.get(key)
+        if (previous and previous.get('extraction_status') in SETTLED_STATUSES
+                and previous.get('website', '') == venue.get('website', '')):
+            keep_previous(venue, previous)
+            retry_queue.discard(key)
+            return False
+        
+        dead_reason = retry_queue.dead_letter_reason(key)
+        if dead_reason:
+            venue['extraction_status'] = 'failed'
+            venue['extraction_notes'] = f'Dead-lettered: {dead_reason}'
+            dead_lettered += 1
+            return False
+        
+        # Venues with a pending retry go through the retry queue, not the main pass
+        if key in carried_over:
+            defer_carried(venue, carried_over[key])
+            return False
+        
+        if config.retry_only:
+            if previous:
+                keep_previous(venue, previous)
+            return False
             
         # Apply filter checks
         should_process, reason = filter_stats.process_venue(venue)
-        if should_process:
-            venues_to_process.append(venue)
+        if not should_process:
+            # Mark it the way process_venue would, so a re-filter can revisit it
+            venue['extraction_status'] = 'skipped'
+            venue['extraction_notes'] = reason
+        return should_process
     
-    print(f"\nAfter filtering:")
-    print(f"  Venues to process: {len(venues_to_process)}")
-    print(f"  Venues filtered out: {filter_stats.total_processed - len(venues_to_process)}")
+    def resolve_websites(websites):
+        """Resolve redirects once per unique website and share fetches between venues."""
+        for resolution in resolver.resolve_many(websites).values():
+            # Don't spend fetch attempts on domains that no longer exist
+            if resolution.get('error_type') == 'dns':
+                host_health.record_failure(_host(resolution['final_url']), 'resolver', 'dns')
+        for website in websites:
+            coalescer.register(resolver.canonical_url(website))
     
-    # Process filtered venues
-    for i, venue in enumerate(venues_to_process):
-        if processed_count >= config.max_requests:
-            print(f"\nReached maximum requests limit ({config.max_requests})")
-            break
+    venues_to_process = []
+    if not stream:
+        # Apply filters at the start before processing
+        print("\nApplying filters...")
+        venues_to_process = [venue for venue in all_venues() if admit(venue)]
         
-        # Process venue
-        print(f"\n[{i+1}/{len(venues_to_process)}] Processing: {venue.get('name', 'Unknown')[:50]:<50}")
+        print(f"\nAfter filtering:")
+        print(f"  Kept from the previous run: {kept_results}")
+        print(f"  Venues to process: {len(venues_to_process)}")
+        print(f"  Venues filtered out: {filter_stats.total_processed - len(venues_to_process)}")
+        print(f"  Pending retries: {len(retry_queue)}")
+        print(f"  Dead-lettered (skipped): {dead_lettered}")
         
-        venue = process_venue(venue, config, brightdata_client, filter_stats)
+        print(f"\nResolving canonical URLs...")
+        resolve_websites([v.get('website', '') for v in venues_to_process[:config.max_requests]])
+        print(f"  Websites shared by several venues: {coalescer.shared_count()}")
         
-        # Update in main list
-        for j, v in enumerate(venues):
-            if v.get('id') == venue.get('id') or v.get('name') == venue.get('name'):
-                venues[j] = venue
+        if len(venues_to_process) > config.max_requests:
+            print(f"\nReached maximum requests limit ({config.max_requests})")
+            for venue in venues_to_process[config.max_requests:]:
+                keep_unprocessed(venue)
+        venues_to_process = venues_to_process[:config.max_requests]
+    
+    def schedule_retry(venue, attempt):
+        key = venue_key(venue)
+        if venue.get('extraction_method') == 'host_dead':
+            # One DNS failure may be a blip: leave it for a later run, and only
+            # dead-letter once it has been unreachable for every attempt
+            queued = retry_queue.push(venue, attempt + 1, key=key, reason=venue['extraction_notes'],
+                                      name=venue.get('name', ''), website=venue.get('website', ''),
+                                      ready_at=time.time() + config.dead_host_retry_delay)
+            if not queued:
+                venue['extraction_notes'] = f'Dead-lettered after {attempt + 1} attempts (host unreachable)'
+        elif venue.get('extraction_status') == 'retry_pending':
+            queued = retry_queue.push(venue, attempt + 1, key=key, reason=venue['extraction_notes'],
+                                      name=venue.get('name', ''), website=venue.get('website', ''))
+            if queued:
+                retry_coalescer.register(resolver.canonical_url(venue.get('website', '')))
+            else:
+                venue['extraction_status'] = 'failed'
+                venue['extraction_notes'] = f'Dead-lettered after {attempt + 1} attempts'
+        else:
+            # Settled: a pending retry record, if any, is done with
+            retry_queue.discard(key)
+    
+    def run_retry(venue, attempt):
+        """Retry `venue` on a fetch thread; the main loop schedules what happens next."""
+        print(f"\n[retry {attempt + 1}] Processing: {venue.get('name', 'Unknown')[:50]:<50}")
+        process_venue(venue, config, brightdata_client, filter_stats, retry_coalescer, resolver,
+                      attempt, extraction_pool, host_health)
+        return venue
+    
+    # Fetch threads hand pages to a process pool for regex-heavy extraction
+    # and move on to their next venue; the main loop collects the results
+    extraction_pool = None
+    if config.extract_workers > 0:
+        extraction_pool = ExtractionPool(extract_contacts, config.extract_workers, config.extract_queue_size)
+    
+    def fetch_and_extract(i, venue):
+        """
+        Fetch `venue` on a fetch thread. Returns (venue, page, extraction
+        future), with page and future None once the venue is settled.
+        """
+        print(f"\n[{i+1}/{len(venues_to_process) if not stream else '?'}] Processing: {venue.get('name', 'Unknown')[:50]:<50}")
+        if stream:
+            # Streamed venues arrive one at a time, so resolve each as it comes
+            resolve_websites([venue.get('website', '')])
+        try:
+            if not extraction_pool:
+                process_venue(venue, config, brightdata_client, filter_stats, coalescer, resolver,
+                              host_health=host_health)
+                return venue, None, None
+            page = fetch_venue(venue, config, brightdata_client, filter_stats, coalescer, resolver,
+                               host_health=host_health)
+            if not page:
+                return venue, None, None
+            return venue, page, extraction_pool.submit(page[0])
+        finally:
+            time.sleep(config.delay_seconds)
+    
+    def crawl_and_finish(venue, page, emails, phones):
+        finish_venue(venue, page, emails, phones, config, brightdata_client, extraction_pool, host_health)
+        return venue, None, None
+    
+    submitted = 0
+    settled = 0
+    batch_source = iter(venues_to_process)
+    
+    def next_venue(timeout):
+        """The next venue to fetch, None if none is ready yet, or END_OF_INPUT."""
+        nonlocal settled
+        if not stream:
+            return next(batch_source, END_OF_INPUT)
+        while True:
+            try:
+                item = stream.get(timeout)
+            except queue.Empty:
+                return None
+            if item is None:
+                return END_OF_INPUT
+            index, venue = item
+            received[index] = venue
+            if submitted < config.max_requests:
+                if admit(venue):
+                    return venue
+            else:
+                keep_unprocessed(venue)
+            settled += 1
+            timeout = 0
+    
+    def report_progress(message):
+        if not progress:
+            return
+        if stream:
+            # Upstream row count is fixed, so rate and ETA stay meaningful
+            progress(settled + processed_count, stream.expected or len(received), message)
+        else:
+            progress(processed_count, len(venues_to_process), message)
+    
+    def save_output():
+        with open(output_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=output_fieldnames())
+            writer.writeheader()
+            writer.writerows(all_venues())
+        retry_queue.save()
+    
+    # Keep the pool busy without queueing the whole input, so cancellation
+    # and upstream rows take effect promptly
+    fetch_executor = ThreadPoolExecutor(max_workers=max(1, config.fetch_workers))
+    max_in_flight = max(1, config.fetch_workers) * 2
+    fetching = set()
+    # Extraction futures -> the venue and page they belong to
+    extracting: Dict[Future, Tuple[Dict[str, str], FetchedPage]] = {}
+    # Retry futures (also in `fetching`) -> the attempt they are running
+    retrying: Dict[Future, int] = {}
+    input_done = False
+    last_report = time.time()
+    
+    def submit_retry(venue, attempt):
+        future = fetch_executor.submit(run_retry, venue, attempt)
+        fetching.add(future)
+        retrying[future] = attempt
+    
+    def submit_ready_retries():
+        """Start retries whose backoff has elapsed, up to the in-flight limit."""
+        while len(fetching) < max_in_flight:
+            ready = retry_queue.pop_ready()
+            if not ready:
                 break
+            submit_retry(*ready)
+    
+    def settle_retry(future):
+        nonlocal retried_count
+        fetching.discard(future)
+        schedule_retry(future.result(), retrying.pop(future))
+        retried_count += 1
+    
+    try:
+        while not input_done or fetching or extracting:
+            while not input_done and len(fetching) < max_in_flight:
+                venue = next_venue(0 if fetching or extracting else STREAM_POLL_SECONDS)
+                if venue is END_OF_INPUT:
+                    input_done = True
+                elif venue is None:
+                    break
+                else:
+                    fetching.add(fetch_executor.submit(fetch_and_extract, submitted, venue))
+                    submitted += 1
+            
+            if not fetching and not extracting:
+                # Waiting on the upstream stage; still check for cancellation
+                if not input_done and time.time() - last_report >= 1:
+                    report_progress(f"Processed {processed_count} venues, waiting for upstream rows")
+                    last_report = time.time()
+                continue
+            
+            done, _ = wait(fetching | extracting.keys(), timeout=None if input_done else STREAM_POLL_SECONDS,
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in extracting:
+                    venue, page = extracting.pop(future)
+                    emails, phones, budget_hits = future.result()
+                    # Budget hits counted in a worker process are added to this process's total
+                    EnhancedContactExtractor.add_budget_hits(budget_hits)
+                    if wants_crawl(emails, config):
+                        # The crawl fetches pages, so it goes back to a fetch thread
+                        fetching.add(fetch_executor.submit(crawl_and_finish, venue, page, emails, phones))
+                        continue
+                    finish_venue(venue, page, emails, phones, config, brightdata_client, extraction_pool, host_health)
+                elif future in retrying:
+                    settle_retry(future)
+                    continue
+                else:
+                    fetching.discard(future)
+                    venue, page, extraction = future.result()
+                    if extraction:
+                        extracting[extraction] = (venue, page)
+                        continue
+                
+                schedule_retry(venue, 0)
+                
+                processed_count += 1
+                report_progress(f"Processed {processed_count}/{len(venues_to_process) if not stream else submitted} venues")
+                last_report = time.time()
+                
+                # Performance check
+                elapsed = time.time() - start_time
+                avg_time = elapsed / processed_count if processed_count > 0 else 0
+                if avg_time > 10:
+                    print(f"  ⚠️  Warning: Average time per venue is {avg_time:.1f}s")
+                
+                # Save progress periodically
+                if processed_count % config.save_every_n == 0:
+                    print(f"\n  → Saving progress after {processed_count} venues...")
+                    save_output()
+            
+            # Retry anything whose backoff has elapsed alongside the fresh venues
+            submit_ready_retries()
         
-        processed_count += 1
-        
-        # Performance check
-        elapsed = time.time() - start_time
-        avg_time = elapsed / processed_count if processed_count > 0 else 0
-        if avg_time > 10:
-            print(f"  ⚠️  Warning: Average time per venue is {avg_time:.1f}s")
+        if stream and submitted >= config.max_requests:
+            print(f"\nReached maximum requests limit ({config.max_requests})")
         
-        time.sleep(config.delay_seconds)
+        # All input seen: retries for venues no longer in it won't come round again
+        pruned = retry_queue.prune(venue_key(venue) for venue in received.values())
+        if pruned:
+            print(f"Dropped {pruned} pending retries for venues no longer in the input")
         
-        # Save progress periodically
-        if processed_count % config.save_every_n == 0:
-            print(f"\n  → Saving progress after {processed_count} venues...")
-            with open(output_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=output_fieldnames)
-                writer.writeheader()
-                writer.writerows(venues)
+        # Drain remaining retries, waiting out short backoffs; longer ones stay
+        # queued on disk for the next run
+        if len(retry_queue):
+            print(f"\nRetrying {len(retry_queue)} deferred venue(s)...")
+        while True:
+            submit_ready_retries()
+            if not fetching:
+                # Nothing in flight: sleep until the next short backoff is due
+                ready = retry_queue.pop_ready(wait=True, max_wait=config.retry_max_wait)
+                if not ready:
+                    break
+                submit_retry(*ready)
+                continue
+            report_progress(f"Retrying deferred venues ({len(retry_queue) + len(fetching)} left)")
+            # Wake up for the next backoff if there's room to start it
+            next_due = retry_queue.next_ready_at()
+            timeout = None
+            if next_due is not None and len(fetching) < max_in_flight:
+                timeout = max(0, next_due - time.time())
+            done, _ = wait(fetching, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                settle_retry(future)
+        fetch_executor.shutdown()
+    except BaseException:
+        # Cancelled or interrupted: drop queued fetches and keep what's done
+        if stream:
+            stream.cancel()
+        for future in fetching | extracting.keys():
+            future.cancel()
+        fetch_executor.shutdown()
+        if extraction_pool:
+            extraction_pool.shutdown()
+        if received:
+            print(f"\n  → Stopped after {processed_count} venues, saving progress...")
+            save_output()
+        raise
+    
+    if len(retry_queue):
+        next_retry = datetime.fromtimestamp(retry_queue.next_ready_at()).strftime('%Y-%m-%d %H:%M')
+        print(f"  {len(retry_queue)} venue(s) left in retry queue (next due {next_retry})")
+    retry_queue.save()
+    
+    if extraction_pool:
+        extraction_pool.shutdown()
     
     # Final save
     print(f"\n\nSaving final results to {output_file}...")
+    venues = all_venues()
     with open(output_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=output_fieldnames)
+        writer = csv.DictWriter(f, fieldnames=output_fieldnames())
         writer.writeheader()
         writer.writerows(venues)
     
@@ -417,6 +1268,12 @@ def enrich_venues():
     print(f"{'='*60}")
     print(f"Total venues:        {len(venues)}")
     print(f"Processed:           {processed_count}")
+    print(f"Kept from last run:  {kept_results}")
+    print(f"Deferred retries:    {retried_count}")
+    print(f"Still queued:        {len(retry_queue)}")
+    print(f"Dead-lettered:       {retry_queue.dead_lettered}")
+    print(f"Dead hosts skipped:  {host_health.dead_hosts()}")
+    print(f"Extraction budget hits: {EnhancedContactExtractor.budget_hits}")
     print(f"Successful:          {successful}")
     print(f"With email:          {with_email}")
     print(f"With phone:          {with_phone}")
@@ -424,7 +1281,15 @@ def enrich_venues():
     print(f"Results saved to:    {output_file}")
     print(f"{'='*60}")
     
-    # Print filter statistics
+    # Print fetch and filter statistics
+    resolver.finalize()
+    print(f"\n{coalescer.get_summary()}")
+    if extraction_pool:
+        print(f"\n{extraction_pool.get_summary()}")
+    if brightdata_client:
+        print(f"\n{brightdata_client.get_render_summary()}")
+        if brightdata_client.hedge_enabled:
+            print(f"\n{brightdata_client.get_hedge_summary()}")
     print(f"\n{filter_stats.get_summary()}")
     
     # Save filter log